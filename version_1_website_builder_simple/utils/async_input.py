@@ -0,0 +1,153 @@
+# =============================================================================
+# FILE: async_input.py
+# PURPOSE:
+#   Provides non-blocking terminal input for the async chat loops.
+#
+#   The built-in `input()` blocks the whole asyncio event loop while it waits
+#   for the user, which freezes every other task (parallel agents, keepalives,
+#   streaming events). `AsyncStdinReader` reads stdin on a background daemon
+#   thread and hands each line to the event loop, and `TurnScheduler` runs the
+#   agent turns one after another in the background so the user can keep
+#   typing, queue the next prompt, or cancel the running turn.
+# =============================================================================
+
+import asyncio
+import sys
+import threading
+from typing import Awaitable, Callable, Optional
+
+
+# -----------------------------------------------------------------------------
+# CLASS: AsyncStdinReader
+# -----------------------------------------------------------------------------
+class AsyncStdinReader:
+    """
+    Reads lines from stdin without blocking the asyncio event loop.
+
+    A daemon thread does the blocking `readline()` calls and pushes every line
+    into an asyncio.Queue. Because the thread is a daemon, a pending read never
+    keeps the process alive after the chat loop returns.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        # The queue and the thread are created lazily so they bind to the
+        # event loop that is actually running the chat.
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+        def read_forever() -> None:
+            while True:
+                line = sys.stdin.readline()
+                # An empty string means EOF (Ctrl-D or a closed pipe); we pass
+                # None to the loop so the chat can end cleanly.
+                value = line.rstrip("\n") if line else None
+                try:
+                    loop.call_soon_threadsafe(self._queue.put_nowait, value)
+                except RuntimeError:
+                    return  # The event loop is already closed.
+                if value is None:
+                    return
+
+        self._thread = threading.Thread(target=read_forever, name="stdin-reader", daemon=True)
+        self._thread.start()
+
+    async def readline(self, prompt: str = "") -> Optional[str]:
+        """
+        Waits for the next line typed by the user.
+
+        Args:
+            prompt (str): Text printed before waiting (like `input(prompt)`).
+
+        Returns:
+            Optional[str]: The line without its trailing newline, or None on EOF.
+        """
+        if self._queue is None:
+            self._start()
+        if prompt:
+            print(prompt, end="", flush=True)
+        return await self._queue.get()
+
+
+# -----------------------------------------------------------------------------
+# CLASS: TurnScheduler
+# -----------------------------------------------------------------------------
+class TurnScheduler:
+    """
+    Runs chat turns in the background, one at a time, in submission order.
+
+    Turns for the same session must not overlap, so queued prompts wait for
+    the running turn to finish. `cancel_current()` stops only the running
+    turn; queued prompts then start as usual.
+    """
+
+    def __init__(self, run_turn: Callable[[str], Awaitable[None]]) -> None:
+        """
+        Args:
+            run_turn: Async function that sends one user query to the agent
+                and processes its events.
+        """
+        self._run_turn = run_turn
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._current: Optional[asyncio.Task] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def pending_count(self) -> int:
+        """Number of prompts waiting behind the running turn."""
+        return self._pending.qsize()
+
+    @property
+    def busy(self) -> bool:
+        """True while a turn is running."""
+        return self._current is not None and not self._current.done()
+
+    def submit(self, user_query: str) -> None:
+        """Queues a prompt; it runs as soon as the previous turns are done."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._work())
+        self._pending.put_nowait(user_query)
+
+    def cancel_current(self) -> bool:
+        """Cancels the running turn. Returns False if nothing was running."""
+        if not self.busy:
+            return False
+        self._current.cancel()
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            user_query = await self._pending.get()
+            self._current = asyncio.create_task(self._run_turn(user_query))
+            try:
+                await self._current
+            except asyncio.CancelledError:
+                # If the scheduler is closing, stop; otherwise only the turn
+                # was cancelled and we move on to the next prompt.
+                if self._closing:
+                    raise
+                print("\n[Turn cancelled]\n")
+            except Exception as e:
+                print(f"\n[Turn failed] {type(e).__name__}: {e}\n")
+            finally:
+                self._current = None
+                self._pending.task_done()
+
+    async def wait_idle(self) -> None:
+        """Waits until the running turn and every queued prompt have finished."""
+        await self._pending.join()
+
+    async def close(self) -> None:
+        """Cancels the running turn, drops queued prompts and stops the worker."""
+        self._closing = True
+        self.cancel_current()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
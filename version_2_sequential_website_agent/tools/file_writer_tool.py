@@ -2,22 +2,31 @@
 # FILE: file_writer_tool.py
 # PURPOSE:
 #   This module defines a single tool function, `write_to_file`, which saves
-#   the provided HTML/CSS/JS content to a timestamped HTML file inside an
+#   the provided HTML/CSS/JS content to a uniquely named HTML file inside an
 #   output directory. This is used by agents to persist generated webpage content.
+#
+#   The write itself is done by utils/output_writer.py: the file name carries
+#   the run's invocation id and a random suffix (so concurrent sessions never overwrite
+#   each other), the file appears atomically, and the disk I/O runs in a thread
+#   pool instead of on the server's event loop.
 # =============================================================================
 
-# Import the `datetime` module to generate a unique timestamp for the filename.
-import datetime
+# ToolContext gives the tool the run (invocation) it belongs to (used in the file name).
+from google.adk.tools import ToolContext
+
+# The shared writer for the output folder (OUTPUT_DIR, default "output").
+from utils.output_writer import get_output_writer
+
+# One writer (and thread pool) for the whole process.
+output_writer = get_output_writer()
 
-# Import `Path` from `pathlib` for convenient and safe file/directory handling.
-from pathlib import Path
 
 # -----------------------------------------------------------------------------
 # TOOL FUNCTION: write_to_file
 # -----------------------------------------------------------------------------
-def write_to_file(content: str) -> dict:
+async def write_to_file(content: str, tool_context: ToolContext) -> dict:
     """
-    Writes the given HTML/CSS/JS content to a timestamped HTML file.
+    Writes the given HTML/CSS/JS content to a new HTML file.
 
     Args:
         content (str): Full HTML content as a string to be saved to disk.
@@ -26,25 +35,15 @@ def write_to_file(content: str) -> dict:
         dict: A dictionary containing the status and generated filename.
     """
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    # Example: "250611_142317"
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
-
-    # Construct the output filename using the timestamp.
-    # Example: "output/250611_142317_generated_page.html"
-    filename = f"output/{timestamp}_generated_page.html"
-
-    # Ensure the "output" directory exists. If it doesn’t, create it.
-    # `exist_ok=True` prevents an error if the directory already exists.
-    Path("output").mkdir(exist_ok=True)
+    # Build a name no other write can produce, e.g.
+    # "250611_142317_123456_3f2a9c1e_b7d04e5a_generated_page.html"
+    name = output_writer.unique_name(run_id=tool_context.invocation_id)
 
-    # Write the HTML content to the constructed file.
-    # `encoding='utf-8'` ensures proper character encoding.
-    Path(filename).write_text(content, encoding="utf-8")
+    # Write to a temporary file and rename it into place, in the writer's thread pool.
+    path = await output_writer.write_async(name, content)
 
     # Return a dictionary indicating success, and the filename that was written.
     return {
         "status": "success",
-        "file": filename
+        "file": path.as_posix()
     }
-    
\ No newline at end of file
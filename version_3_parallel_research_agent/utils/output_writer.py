@@ -0,0 +1,168 @@
+# =============================================================================
+# FILE: output_writer.py
+# PURPOSE:
+#   Writes the generated pages to the output folder, safely under load.
+#
+#   The old write_to_file
+#     - named files after the current second (250611_142317_generated_page.html),
+#       so two sessions finishing in the same second overwrote each other;
+#     - wrote straight into the final file, so a crash (or a reader) could see
+#       a half-written page;
+#     - did the disk I/O (and a mkdir) on the event loop thread, stalling every
+#       other request of the FastAPI server while it ran.
+#
+#   `OutputWriter`
+#     - builds unique names: timestamp with microseconds, the run (invocation)
+#       id and a random suffix (250611_142317_123456_3f2a9c1e_b7d04e5a_generated_page.html);
+#     - writes to a temporary file in the same folder and renames it over the
+#       final name (`os.replace` is atomic), so a file is either absent or complete;
+#     - creates the folder once (and again only if it was deleted);
+#     - `write_async` runs the I/O in its own thread pool, so the loop never blocks.
+#
+#   Configuration:
+#       OUTPUT_DIR=output              -> where pages are written (default "output")
+#       OUTPUT_WRITER_THREADS=2        -> size of the writer's thread pool (more threads
+#                                         help with OUTPUT_FSYNC, but contend with the
+#                                         event loop for the GIL)
+#       OUTPUT_FSYNC=TRUE              -> flush each page to the disk before the rename
+# =============================================================================
+
+import asyncio
+import contextlib
+import datetime
+import os
+import re
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+# Characters allowed in the run part of a file name.
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9-]")
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: atomic_write
+# -----------------------------------------------------------------------------
+def atomic_write(target: Path, content: Union[str, bytes], fsync: bool = False) -> None:
+    """
+    Writes `content` (text as UTF-8, or bytes) to a temporary file next to
+    `target` and renames it over `target`, so `target` is never half-written.
+    The folder must exist.
+    """
+    handle, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(content.encode("utf-8") if isinstance(content, str) else content)
+            if fsync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        # mkstemp creates the file readable by the owner only; use the usual permissions.
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+
+# -----------------------------------------------------------------------------
+# CLASS: OutputWriter
+# -----------------------------------------------------------------------------
+class OutputWriter:
+    """Atomic, collision-free writes into one output folder."""
+
+    def __init__(self, directory: str = "output", threads: int = 2, fsync: bool = False) -> None:
+        self.directory = Path(directory)
+        self.fsync = fsync
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="output-writer")
+        self._directory_ready = False
+        self._lock = threading.Lock()
+
+    # --- Names ------------------------------------------------------------------
+    def unique_name(self, run_id: Optional[str] = None, suffix: str = "generated_page.html") -> str:
+        """
+        A file name that no other write can produce, e.g.
+        "250611_142317_123456_3f2a9c1e_b7d04e5a_generated_page.html".
+
+        Args:
+            run_id (str): Optional; e.g. the ADK invocation id. Its last characters
+                are put in the name, so the pages of one run can be found together.
+            suffix (str): The end of the name (including the extension).
+        """
+        timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S_%f")
+        parts = [timestamp]
+        if run_id:
+            parts.append(_UNSAFE_CHARS.sub("", run_id)[-8:] or "run")
+        parts.append(uuid.uuid4().hex[:8])
+        parts.append(suffix)
+        return "_".join(parts)
+
+    # --- Writing ----------------------------------------------------------------
+    def _ensure_directory(self) -> None:
+        if not self._directory_ready:
+            with self._lock:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._directory_ready = True
+
+    def write(self, name: str, content: Union[str, bytes]) -> Path:
+        """
+        Writes `content` to `<directory>/<name>` atomically (blocking).
+
+        Returns:
+            Path: The written file.
+        """
+        self._ensure_directory()
+        target = self.directory / name
+        try:
+            atomic_write(target, content, fsync=self.fsync)
+        except FileNotFoundError:
+            # The folder was removed while the process was running.
+            self._directory_ready = False
+            self._ensure_directory()
+            atomic_write(target, content, fsync=self.fsync)
+        return target
+
+    async def write_async(self, name: str, content: Union[str, bytes]) -> Path:
+        """Like `write`, but runs in the writer's thread pool instead of the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.write, name, content)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The writer's thread pool, for other page writes (e.g. ArtifactStore.save_async)."""
+        return self._executor
+
+    def close(self) -> None:
+        """Waits for pending writes and stops the thread pool."""
+        self._executor.shutdown(wait=True)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: output_writer_from_env
+# -----------------------------------------------------------------------------
+def output_writer_from_env() -> OutputWriter:
+    """Builds the OutputWriter configured by OUTPUT_DIR, OUTPUT_WRITER_THREADS and OUTPUT_FSYNC."""
+    return OutputWriter(
+        directory=os.environ.get("OUTPUT_DIR", "output"),
+        threads=int(os.environ.get("OUTPUT_WRITER_THREADS", "2")),
+        fsync=os.environ.get("OUTPUT_FSYNC", "FALSE").upper() == "TRUE",
+    )
+
+
+_shared_writer: Optional[OutputWriter] = None
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_output_writer
+# -----------------------------------------------------------------------------
+def get_output_writer() -> OutputWriter:
+    """
+    Returns the process-wide OutputWriter (see output_writer_from_env), so
+    everything that writes pages shares one thread pool.
+    """
+    global _shared_writer
+    if _shared_writer is None:
+        _shared_writer = output_writer_from_env()
+    return _shared_writer
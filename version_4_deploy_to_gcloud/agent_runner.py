@@ -1,10 +1,10 @@
 # --- A. IMPORTING THE NECESSARY TOOLS ---
 # 'asyncio' is a Python library that helps run multiple tasks at the same time.
 import asyncio
+import argparse
 import json
-from typing import Any
-from rich import print as rprint    # Enhanced print function to support colors and formatting
-from rich.syntax import Syntax      # Used to highlight JSON output in the terminal
+import time
+import uuid
 
 # These are specific classes from Google's AI library for structuring messages.
 from google.genai.types import Content, Part
@@ -14,28 +14,59 @@ load_dotenv()
 
 # --- B. IMPORTING OUR AGENT ---
 # We are importing the "brain" of our AI agent from our project.
-from agents.root_website_builder.agent import root_agent
+from agents.root_website_builder.agent import root_agent, response_cache
 
 # --- C. IMPORTING ADK (AGENT DEVELOPMENT KIT) COMPONENTS ---
 # These are special tools from the ADK to run our agent programmatically.
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 
+# Non-blocking terminal input, so waiting for the user never freezes the event loop.
+from utils.async_input import AsyncStdinReader, TurnScheduler
+
+# Event sinks print each event at the chosen verbosity (silent / summary / json).
+from utils.event_sink import VERBOSITY_LEVELS, make_event_sink
+
+# The shared model rate limiter (enabled with MODEL_RATE_LIMITS); batch prompts queue behind interactive turns.
+from utils.rate_limiter import get_rate_limiter, use_priority
+# Per-stage escalation rates of the model cascade (MODEL_CASCADE=TRUE)
+from utils.cascade import cascade_report
+# The streaming page preview (STREAMING_PAGE=TRUE); it switches code_writer_agent to SSE streaming itself.
+from google.adk.agents.run_config import RunConfig
+from utils.page_stream import get_page_streamer
+# Recovery of pages cut off by the output token limit (PAGE_CONTINUATIONS)
+from utils.truncation import get_page_recovery
+
 # --- 1. SETTING UP IDENTIFIERS (CONSTANTS) ---
 # We define constant text variables to identify our application and conversation.
 APP_NAME = "website_builder_app"
 USER_ID = "user_12345"
 SESSION_ID = "session_chat_loop_1" # A unique ID for this entire chat session.
+# The agent whose final answer is the result of a run (it also writes the HTML file).
+FINAL_AGENT_NAME = "code_writer_agent"
+
+
+def make_run_config() -> RunConfig:
+    """
+    The run's settings. No streaming: with the page preview on, only
+    code_writer_agent streams (PageStreamer switches its own run to SSE).
+    """
+    return RunConfig()
+
 
 # --- 2. THE MAIN CHAT LOOP FUNCTION ---
 # This async function will set everything up once, then loop to allow for continuous chat.
-async def chat_loop():
+async def chat_loop(verbosity: str = "json"):
     """
     Initializes the agent and session, then enters a loop to
     continuously accept user queries and provide agent responses.
+
+    Args:
+        verbosity (str): How much of each event to print (see utils/event_sink.py).
     """
     print("Agent Chat Session Started.")
-    print("Type 'quit', 'exit', or ':q' to end the session.\n")
+    print("Type 'quit', 'exit', or ':q' to end the session.")
+    print("You can type the next query while a turn is running; ':cancel' stops the running turn.\n")
 
     # --- SETUP (Done Once) ---
     # The Session Service stores the conversation history (memory).
@@ -54,19 +85,14 @@ async def chat_loop():
         session_service=session_service,
     )
 
-    # --- THE INTERACTIVE LOOP ---
-    # This 'while True' loop will run indefinitely until the user decides to quit.
-    while True:
-        # Prompt the user for their next message.
-        user_query = input("Enter your query: ")
-
-        # Check if the user wants to exit the chat.
-        # .lower() makes the text lowercase so "Quit" or "QUIT" also work.
-        if user_query.lower() in ["quit", "exit", ":q"]:
-            print("Ending chat session. Goodbye!")
-            break  # This command exits the 'while' loop.
+    # The event sink decides how each event is printed.
+    sink = make_event_sink(verbosity)
 
-        # --- Agent Interaction (Inside the Loop) ---
+    # --- ONE TURN OF THE CONVERSATION ---
+    # A turn sends one query to the agent and prints its events. Turns run as
+    # background tasks (see TurnScheduler), so the event loop keeps working -
+    # and the user can keep typing - while the agent is still streaming.
+    async def run_turn(user_query: str) -> None:
         # Format the user's query into the structure the agent understands.
         new_message = Content(role="user", parts=[Part(text=user_query)])
 
@@ -76,20 +102,22 @@ async def chat_loop():
         events = runner.run_async(
             user_id=USER_ID,
             session_id=SESSION_ID,
-            new_message=new_message
+            new_message=new_message,
+            run_config=make_run_config()
         )
 
         # --- Process the Event Stream ---
         # We loop through the agent's "thinking steps" (events) to find the final answer.
         final_response = ""
         i = 0
+        sink.start_turn()
         async for event in events:
             i+= 1  # Increment the event counter
-            # Print each event as it comes in, with a title for clarity.
+            # Print each event as it comes in (at the chosen verbosity).
             # This helps us see the agent's thought process step-by-step.
-            print_json_response(event, f"============Event #{i}=============")
+            sink.emit(event, i)
 
-            if hasattr(event, "author") and event.author == "code_writer_agent":
+            if hasattr(event, "author") and event.author == FINAL_AGENT_NAME:
 
                 if event.is_final_response():
                     # If the event is a final response, we extract the text.
@@ -99,30 +127,204 @@ async def chat_loop():
                     print(f"\nAgent Response:\n------------------------\n{final_response}\n")
                     break # Stop processing events once we have the final answer.
 
+    # --- THE INTERACTIVE LOOP ---
+    # The reader waits for input without blocking the event loop, and the
+    # scheduler runs the submitted queries one after another in the background.
+    reader = AsyncStdinReader()
+    scheduler = TurnScheduler(run_turn)
+
+    # This 'while True' loop will run indefinitely until the user decides to quit.
+    while True:
+        # Wait for the user's next message (other tasks keep running meanwhile).
+        user_query = await reader.readline("Enter your query: ")
+
+        # Check if the user wants to exit the chat (None means stdin was closed).
+        # .lower() makes the text lowercase so "Quit" or "QUIT" also work.
+        if user_query is None or user_query.lower() in ["quit", "exit", ":q"]:
+            if user_query is None:
+                # Input was piped in: let the queued queries finish first.
+                await scheduler.wait_idle()
+            print("Ending chat session. Goodbye!")
+            break  # This command exits the 'while' loop.
+
+        # ':cancel' stops the turn that is currently running.
+        if user_query.strip().lower() == ":cancel":
+            if not scheduler.cancel_current():
+                print("No turn is running.")
+            continue
+
+        if not user_query.strip():
+            continue
+
+        # Anything typed while a turn is running waits in the queue.
+        if scheduler.busy:
+            print(f"Queued behind the running turn (position {scheduler.pending_count + 1}).")
+        scheduler.submit(user_query)
+
+    # Stop the running turn (if any) before the program exits.
+    await scheduler.close()
 
 
 # -----------------------------------------------------------------------------
-# Helper: Pretty print JSON objects using syntax coloring
+# BATCH MODE: Run many prompts headlessly with bounded concurrency
 # -----------------------------------------------------------------------------
-def print_json_response(response: Any, title: str) -> None:
-    # Displays a formatted and color-highlighted view of the response
-    print(f"\n=== {title} ===")  # Section title for clarity
-    try:
-        if hasattr(response, "root"):  # Check if response is wrapped by SDK
-            data = response.root.model_dump(mode="json", exclude_none=True)
-        else:
-            data = response.model_dump(mode="json", exclude_none=True)
-
-        json_str = json.dumps(data, indent=2, ensure_ascii=False)  # Convert dict to pretty JSON string
-        syntax = Syntax(json_str, "json", theme="monokai", line_numbers=False)  # Apply syntax highlighting
-        rprint(syntax)  # Print it with color
-    except Exception as e:
-        # Print fallback text if something fails
-        rprint(f"[red bold]Error printing JSON:[/red bold] {e}")
-        rprint(repr(response))
+# Instead of typing one topic at a time, we can read a JSONL file where every
+# line is one prompt, e.g. {"id": "ai", "prompt": "artificial intelligence"}.
+# Each prompt gets its OWN session, so the runs never see each other's history,
+# and an asyncio.Semaphore caps how many pipelines run at the same time.
+def load_batch_prompts(prompts_path: str) -> list[dict]:
+    """
+    Reads prompts from a JSONL file.
+
+    Args:
+        prompts_path (str): Path to a JSONL file. Each line is an object with a
+            "prompt" (or "topic") field and an optional "id" field.
+
+    Returns:
+        list[dict]: One {"id": ..., "prompt": ...} dictionary per non-empty line.
+    """
+    prompts = []
+    with open(prompts_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue  # Skip blank lines so hand-written files stay forgiving.
+            record = json.loads(line)
+            prompt = record.get("prompt") or record.get("topic")
+            if not prompt:
+                raise ValueError(f"{prompts_path}:{line_number} has no 'prompt' or 'topic' field")
+            prompts.append({"id": str(record.get("id", line_number)), "prompt": prompt})
+    return prompts
+
+
+async def run_batch_prompt(runner: Runner, session_service: InMemorySessionService,
+                           record: dict, semaphore: asyncio.Semaphore,
+                           verbosity: str = "silent") -> dict:
+    """
+    Runs one prompt through the agent in a fresh session and collects the result.
+
+    Args:
+        runner (Runner): The shared runner (it is safe to use across sessions).
+        session_service (InMemorySessionService): Where the per-prompt session lives.
+        record (dict): One {"id": ..., "prompt": ...} entry from the prompts file.
+        semaphore (asyncio.Semaphore): Limits how many prompts run concurrently.
+        verbosity (str): How much of each event to print (default: nothing).
+
+    Returns:
+        dict: The final response, output file path and wall time for this prompt.
+    """
+    async with semaphore:
+        # A unique session per prompt keeps the conversations isolated.
+        session_id = f"batch_{record['id']}_{uuid.uuid4().hex[:8]}"
+        await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id
+        )
+
+        result = {
+            "id": record["id"],
+            "prompt": record["prompt"],
+            "session_id": session_id,
+            "status": "success",
+            "final_response": "",
+            "output_file": None,
+            "event_count": 0,
+        }
+        sink = make_event_sink(verbosity)
+        sink.start_turn()
+        start = time.perf_counter()
+        try:
+            new_message = Content(role="user", parts=[Part(text=record["prompt"])])
+            async for event in runner.run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=new_message,
+                run_config=make_run_config()
+            ):
+                result["event_count"] += 1
+                sink.emit(event, result["event_count"])
+
+                # The write_to_file tool (or continue_page, for a page that was cut off)
+                # reports the path it wrote in its response.
+                for function_response in event.get_function_responses():
+                    if function_response.name in ("write_to_file", "continue_page") and function_response.response:
+                        result["output_file"] = function_response.response.get("file") or result["output_file"]
+
+                if event.author == FINAL_AGENT_NAME and event.is_final_response():
+                    if event.content and event.content.parts and event.content.parts[0].text:
+                        result["final_response"] = event.content.parts[0].text
+        except Exception as e:
+            # One failing prompt must not take down the whole batch.
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+
+        result["wall_time_s"] = round(time.perf_counter() - start, 3)
+        return result
+
+
+async def batch_run(prompts_path: str, results_path: str, concurrency: int,
+                    verbosity: str = "silent") -> None:
+    """
+    Runs every prompt in `prompts_path` and writes one JSON line per result.
+
+    Results are appended as soon as each prompt finishes, so a long nightly job
+    keeps its partial progress even if it is interrupted.
+    """
+    prompts = load_batch_prompts(prompts_path)
+    print(f"Batch started: {len(prompts)} prompts, concurrency={concurrency}")
+
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=root_agent,
+        app_name=APP_NAME,
+        session_service=session_service,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Tasks inherit the "batch" priority, so a shared rate limiter serves interactive calls first.
+    with use_priority("batch"):
+        tasks = [
+            asyncio.create_task(run_batch_prompt(runner, session_service, record, semaphore, verbosity))
+            for record in prompts
+        ]
+
+    batch_start = time.perf_counter()
+    failures = 0
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        for completed in asyncio.as_completed(tasks):
+            result = await completed
+            failures += result["status"] != "success"
+            results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            results_file.flush()
+            print(f"[{result['status']}] {result['id']} in {result['wall_time_s']}s -> {result['output_file']}")
+
+    print(f"Batch finished in {time.perf_counter() - batch_start:.1f}s "
+          f"({len(prompts) - failures} succeeded, {failures} failed). Results: {results_path}")
+    if response_cache is not None:
+        print(response_cache.format_report())
+    if get_rate_limiter() is not None:
+        print("Rate limiter:", json.dumps(get_rate_limiter().report(), indent=2))
+    if cascade_report():
+        print("Model cascade:", json.dumps(cascade_report(), indent=2))
+    if get_page_streamer() is not None:
+        print("Page streaming:", json.dumps(get_page_streamer().report(), indent=2))
+    if get_page_recovery() is not None and get_page_recovery().truncated:
+        print("Cut-off pages:", json.dumps(get_page_recovery().report(), indent=2))
 
 
 # --- 3. STARTING THE PROGRAM ---
-# This is the entry point that runs our chat loop.
+# This is the entry point that runs our chat loop (or the batch mode).
 if __name__ == '__main__':
-    asyncio.run(chat_loop())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chat with the agent, or run a batch of prompts headlessly.")
+    parser.add_argument("--batch", metavar="PROMPTS_JSONL", help="Run every prompt in this JSONL file instead of chatting.")
+    parser.add_argument("--results", default="batch_results.jsonl", help="Where batch results are appended (JSONL).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of prompts running at once.")
+    parser.add_argument("--verbosity", choices=VERBOSITY_LEVELS,
+                        help="How much of each event to print (default: 'json' when chatting, 'silent' in batch mode).")
+    args = parser.parse_args()
+
+    if args.batch:
+        asyncio.run(batch_run(args.batch, args.results, max(1, args.concurrency), args.verbosity or "silent"))
+    else:
+        asyncio.run(chat_loop(args.verbosity or "json"))
\ No newline at end of file
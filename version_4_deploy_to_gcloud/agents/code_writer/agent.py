@@ -24,11 +24,21 @@ from google.adk.agents import LlmAgent  # Core agent class for creating LLM-base
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_cascade_model
+
+# Import the answer checks that decide when the cheap model's answer must be escalated
+from utils.validators import all_of, html_document, not_empty
 
 # Import the file writing tool that allows the agent to save the generated webpage
 from tools.file_writer_tool import write_to_file  # Custom tool for writing HTML files to disk
+from tools.file_writer_tool import continue_page, page_recovery  # Completes a page that was cut off
+
+# Import the page streamer (STREAMING_PAGE=TRUE) that writes a preview while the page is generated
+from utils.page_stream import get_page_streamer
 
 # Create the Code Writer Agent instance
 code_writer_agent = LlmAgent(
@@ -37,21 +47,37 @@ code_writer_agent = LlmAgent(
     
     # AI model to use - Gemini 2.5 Flash Lite for sophisticated code generation and implementation
     # Uses 2.5 lite for advanced HTML/CSS/JS generation and design system implementation
-    model = "gemini-2.5-flash-lite",
-    
-    # Load detailed instructions from external text file
-    # Instructions contain systematic approach for converting design specs to working code
-    # Includes guidelines for semantic HTML, responsive CSS, and interactive JavaScript
-    instruction=load_instructions_file("agents/code_writer/instructions.txt"),
-    
-    # Load agent description from external text file
-    # Provides a brief summary of this agent's front-end developer role
-    description=load_instructions_file("agents/code_writer/description.txt"),
+    # With MODEL_CASCADE=TRUE, a page that is cut off or does not parse is regenerated with Gemini 2.5 Flash
+    model = get_cascade_model(
+        ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+        all_of(not_empty, html_document()),
+    ),
     
     # Tools available to this agent - file writing capability for saving the generated webpage
     # The write_to_file tool allows the agent to save the complete HTML/CSS/JS to disk
-    tools=[write_to_file],
+    # continue_page sends the rest of a page that write_to_file found cut off
+    tools=[write_to_file, continue_page],
     
     # No output_key needed - this is the final agent that produces the actual webpage file
     # The file_writer_tool handles the final output by writing directly to the filesystem
-)
\ No newline at end of file
+)
+
+# Load the instructions and description from their text files in the agent's folder.
+# The instructions contain the step-by-step behavior of this agent; the description is a
+# brief summary of its role. Both are reloaded when the files change (PROMPT_HOT_RELOAD)
+prompts.bind_agent(
+    code_writer_agent,
+    instruction="agents/code_writer/instructions.txt",
+    description="agents/code_writer/description.txt",
+)
+
+# A page cut off by the output token limit before write_to_file was called is handed to
+# write_to_file, which asks for the rest of it (PAGE_CONTINUATIONS)
+if page_recovery is not None:
+    page_recovery.instrument(code_writer_agent)
+
+# With STREAMING_PAGE=TRUE, the ```html block the agent shows is written to a preview file
+# (and served at /previews/<invocation id>) while it is being generated
+page_streamer = get_page_streamer()
+if page_streamer is not None:
+    page_streamer.instrument(code_writer_agent)
@@ -24,8 +24,11 @@ from google.adk.agents import LlmAgent  # Core agent class for creating LLM-base
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_model
 
 # Create the Designer Agent instance
 designer_agent = LlmAgent(
@@ -34,16 +37,7 @@ designer_agent = LlmAgent(
     
     # AI model to use - Gemini 2.5 Flash Lite for sophisticated design analysis and specification
     # Uses 2.5 lite for advanced visual design reasoning and systematic design system creation
-    model = "gemini-2.5-flash-lite",
-    
-    # Load detailed instructions from external text file
-    # Instructions contain systematic approach for creating design systems and visual specs
-    # Includes step-by-step logic for translating requirements to concrete design values
-    instruction=load_instructions_file("agents/designer/instructions.txt"),
-    
-    # Load agent description from external text file
-    # Provides a brief summary of this agent's UI/UX designer role
-    description=load_instructions_file("agents/designer/description.txt"),
+    model = get_model("gemini-2.5-flash-lite"),
     
     # No tools needed - this agent works with pure design analysis and specification generation
     # It processes requirements from requirements_writer without external API calls
@@ -51,4 +45,13 @@ designer_agent = LlmAgent(
     # Output key - where this agent stores the design specifications in the session state
     # The code_writer agent will reference this key to get the detailed design guidelines
     output_key="designer_output"
-)
\ No newline at end of file
+)
+
+# Load the instructions and description from their text files in the agent's folder.
+# The instructions contain the step-by-step behavior of this agent; the description is a
+# brief summary of its role. Both are reloaded when the files change (PROMPT_HOT_RELOAD)
+prompts.bind_agent(
+    designer_agent,
+    instruction="agents/designer/instructions.txt",
+    description="agents/designer/description.txt",
+)
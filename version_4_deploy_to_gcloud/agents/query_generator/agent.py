@@ -24,8 +24,11 @@ from google.adk.agents import LlmAgent  # Core agent class for creating LLM-base
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_model
 
 # Create the Query Generator Agent instance
 query_generator_agent = LlmAgent(
@@ -33,15 +36,7 @@ query_generator_agent = LlmAgent(
     name = "query_generator_agent",
     
     # AI model to use - Gemini 2.5 Flash Lite for fast, high-quality synthesis
-    model = "gemini-2.5-flash-lite",
-    
-    # Load detailed instructions from external text file
-    # Instructions contain logic for synthesizing multiple research outputs into one query
-    instruction=load_instructions_file("agents/query_generator/instructions.txt"),
-    
-    # Load agent description from external text file
-    # Provides a brief summary of this agent's synthesis and merging role
-    description=load_instructions_file("agents/query_generator/description.txt"),
+    model = get_model("gemini-2.5-flash-lite"),
     
     # No tools needed - this agent works purely with text synthesis and analysis
     # It processes the research outputs from previous agents without external API calls
@@ -49,4 +44,13 @@ query_generator_agent = LlmAgent(
     # Output key - where this agent stores the merged query in the session state
     # The requirements_writer agent will reference this key to get the comprehensive query
     output_key="merged_query_output"
-)
\ No newline at end of file
+)
+
+# Load the instructions and description from their text files in the agent's folder.
+# The instructions contain the step-by-step behavior of this agent; the description is a
+# brief summary of its role. Both are reloaded when the files change (PROMPT_HOT_RELOAD)
+prompts.bind_agent(
+    query_generator_agent,
+    instruction="agents/query_generator/instructions.txt",
+    description="agents/query_generator/description.txt",
+)
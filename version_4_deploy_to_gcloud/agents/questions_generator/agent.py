@@ -18,15 +18,21 @@ import sys  # System-specific parameters and functions
 # Import the main LlmAgent class from Google ADK (Agent Development Kit)
 from google.adk.agents import LlmAgent  # Core agent class for creating LLM-based agents
 
-# Import Google search tool that allows the agent to perform web searches
-from google.adk.tools import google_search  # Pre-built tool for Google search functionality
-
 # Add the project root directory to Python path so we can import utility modules
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_cascade_model
+
+# Import the answer checks that decide when the cheap model's answer must be escalated
+from utils.validators import all_of, not_empty, numbered_list
+
+# Import the search tool selector (built-in google_search, or the cached web_search when SEARCH_CACHE is set)
+from tools.search_tool import get_search_tool
 
 # Create the Questions Generator Agent instance
 questions_generator_agent = LlmAgent(
@@ -34,21 +40,27 @@ questions_generator_agent = LlmAgent(
     name = "questions_generator_agent",
     
     # AI model to use - Gemini 2.5 Flash Lite for fast, high-quality responses
-    model = "gemini-2.5-flash-lite",
-    
-    # Load detailed instructions from external text file
-    # This keeps the code clean and allows easy modification of agent behavior
-    instruction=load_instructions_file("agents/questions_generator/instructions.txt"),
-    
-    # Load agent description from external text file
-    # Provides a brief summary of what this agent does
-    description=load_instructions_file("agents/questions_generator/description.txt"),
+    # With MODEL_CASCADE=TRUE, answers that are not a numbered list of 2-10 questions
+    # are retried on Gemini 2.5 Flash
+    model = get_cascade_model(
+        ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+        all_of(not_empty, numbered_list(2, 10)),
+    ),
     
     # Tools available to this agent - Google search for researching topics
     # This allows the agent to gather current information before generating questions
-    tools=[google_search],
+    tools=[get_search_tool()],
     
     # Output key - where this agent stores its results in the session state
     # Other agents in the pipeline will reference this key to access the generated questions
     output_key="questions_generator_output"
-)
\ No newline at end of file
+)
+
+# Load the instructions and description from their text files in the agent's folder.
+# The instructions contain the step-by-step behavior of this agent; the description is a
+# brief summary of its role. Both are reloaded when the files change (PROMPT_HOT_RELOAD)
+prompts.bind_agent(
+    questions_generator_agent,
+    instruction="agents/questions_generator/instructions.txt",
+    description="agents/questions_generator/description.txt",
+)
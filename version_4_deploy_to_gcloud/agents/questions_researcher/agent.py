@@ -1,127 +1,117 @@
 """
 File: agents/questions_researcher/agent.py
-Purpose: Defines the Questions Researcher Agent system that contains five specialized LLM agents
-         running in parallel to research and answer the five questions generated by the 
+Purpose: Defines the Questions Researcher Agent system: a dynamic fan-out of specialized LLM
+         agents running in parallel to research and answer the questions generated by the
          questions_generator agent. Each sub-agent focuses on researching one specific question
          using Google search to provide comprehensive, well-researched answers.
 
 This is the second agent in the website building pipeline that:
-1. Receives 5 questions from questions_generator_output
-2. Runs 5 specialized agents in parallel (one per question)
+1. Receives the numbered question list from questions_generator_output
+2. Starts one researcher per question (between RESEARCH_MIN_QUESTIONS and RESEARCH_MAX_QUESTIONS),
+   running at most RESEARCH_CONCURRENCY of them at the same time
 3. Each agent researches its assigned question using Google search
-4. Outputs 5 separate research results for the query_generator to merge
+4. Outputs one research result per question, plus all of them combined in
+   questions_research_output for the query_generator to merge
 """
 
 # Import required system modules for path manipulation
 import os  # Operating system interface for file paths
 import sys  # System-specific parameters and functions
 
-# Import agent classes from Google ADK (Agent Development Kit)
-from google.adk.agents import LlmAgent, ParallelAgent  # LlmAgent for individual agents, ParallelAgent for orchestration
-
-# Import Google search tool that allows agents to perform web searches
-from google.adk.tools import google_search  # Pre-built tool for Google search functionality
+# Import the LlmAgent class from Google ADK (Agent Development Kit) for the individual researchers
+from google.adk.agents import LlmAgent
 
 # Add the project root directory to Python path so we can import utility modules
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_model
+
+# Import the search tool selector (built-in google_search, or the cached web_search when SEARCH_CACHE is set)
+from tools.search_tool import get_search_tool
+
+# Import the parallel agent that decides at runtime how many researchers to run
+from utils.fanout import DynamicFanOutAgent
 
-# Load shared instructions and description that will be used by all 5 sub-agents
+# Fan-out limits, configurable from the environment:
+# simple topics get as few as RESEARCH_MIN_QUESTIONS researchers, deep topics up to RESEARCH_MAX_QUESTIONS
+MIN_RESEARCHERS = int(os.environ.get("RESEARCH_MIN_QUESTIONS", "2"))
+MAX_RESEARCHERS = int(os.environ.get("RESEARCH_MAX_QUESTIONS", "10"))
+# How many researchers may call the model at the same time (independent of how many run in total)
+RESEARCH_CONCURRENCY = int(os.environ.get("RESEARCH_CONCURRENCY", "5"))
+# Quorum mode: move on once RESEARCH_QUORUM researchers are done, giving the rest
+# RESEARCH_STRAGGLER_GRACE_S more seconds (unset = always wait for every researcher)
+RESEARCH_QUORUM = int(os.environ["RESEARCH_QUORUM"]) if os.environ.get("RESEARCH_QUORUM") else None
+RESEARCH_STRAGGLER_GRACE_S = float(os.environ.get("RESEARCH_STRAGGLER_GRACE_S", "15"))
+# Hard deadline for the whole research stage; unfinished researchers are marked as missing (unset = no deadline)
+RESEARCH_DEADLINE_S = float(os.environ["RESEARCH_DEADLINE_S"]) if os.environ.get("RESEARCH_DEADLINE_S") else None
+# Hedging: a researcher still running after this percentile of recent researcher latencies gets a
+# duplicate request, and the first answer wins (unset = no hedging). Until enough latencies are known,
+# RESEARCH_HEDGE_INITIAL_DELAY_S is used instead (unset = no hedging until then)
+RESEARCH_HEDGE_PERCENTILE = float(os.environ["RESEARCH_HEDGE_PERCENTILE"]) if os.environ.get("RESEARCH_HEDGE_PERCENTILE") else None
+RESEARCH_HEDGE_INITIAL_DELAY_S = float(os.environ["RESEARCH_HEDGE_INITIAL_DELAY_S"]) if os.environ.get("RESEARCH_HEDGE_INITIAL_DELAY_S") else None
+
+# Shared instructions and description used by all sub-agents
 # These files contain the common behavior and guidelines for question research
-base_instructions = load_instructions_file("agents/questions_researcher/instructions.txt")  # Common research instructions
-base_description = load_instructions_file("agents/questions_researcher/description.txt")    # Common agent description
-
-# --- 1. Define Question Researcher Sub-Agents (to run in parallel) ---
-# Each agent is specialized to handle exactly one question from the list of 5 questions
-# They all share the same base instructions but are assigned different question numbers
-
-# Question Researcher 1 - Handles the first question from the questions list
-question_researcher_agent_1 = LlmAgent(
-    name="QuestionResearcher1",  # Unique identifier for this specific researcher
-    model="gemini-2.5-flash-lite",    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
-    # Combine question assignment with base instructions using f-string formatting
-    instruction=f"You are assigned to answer QUESTION NUMBER 1 only.\n\n{base_instructions}",
-    # Combine base description with specific role information
-    description=f"{base_description} This agent specifically handles question #1.",
-    tools=[google_search],  # Google search tool for researching the assigned question
-    # Unique output key where this agent stores its research results
-    output_key="question_1_research_output"
-)
+BASE_INSTRUCTIONS = "agents/questions_researcher/instructions.txt"  # Common research instructions
+BASE_DESCRIPTION = "agents/questions_researcher/description.txt"    # Common agent description
 
-# Question Researcher 2 - Handles the second question from the questions list
-question_researcher_agent_2 = LlmAgent(
-    name="QuestionResearcher2",  # Unique identifier for this specific researcher
-    model="gemini-2.5-flash-lite",    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
-    # Combine question assignment with base instructions using f-string formatting
-    instruction=f"You are assigned to answer QUESTION NUMBER 2 only.\n\n{base_instructions}",
-    # Combine base description with specific role information
-    description=f"{base_description} This agent specifically handles question #2.",
-    tools=[google_search],  # Google search tool for researching the assigned question
-    # Unique output key where this agent stores its research results
-    output_key="question_2_research_output"
-)
 
-# Question Researcher 3 - Handles the third question from the questions list
-question_researcher_agent_3 = LlmAgent(
-    name="QuestionResearcher3",  # Unique identifier for this specific researcher
-    model="gemini-2.5-flash-lite",    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
-    # Combine question assignment with base instructions using f-string formatting
-    instruction=f"You are assigned to answer QUESTION NUMBER 3 only.\n\n{base_instructions}",
+# --- 1. Define Question Researcher Sub-Agents ---
+# Each agent is specialized to handle exactly one question from the question list.
+# They all share the same base instructions but are assigned different question numbers.
+# {research_question_N?} is filled in by ADK from the session state right before the agent runs.
+def build_question_researcher(number: int) -> LlmAgent:
+    """Creates the researcher for question `number` (1-based)."""
+    researcher = LlmAgent(
+        name=f"QuestionResearcher{number}",  # Unique identifier for this specific researcher
+        model=get_model("gemini-2.5-flash-lite"),    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
+        tools=[get_search_tool()],  # Google search tool for researching the assigned question
+        # Unique output key where this agent stores its research results
+        output_key=f"question_{number}_research_output"
+    )
+    # Assign the question number (and the question itself) in front of the base instructions
+    prompts.bind(researcher, "instruction", BASE_INSTRUCTIONS, render=lambda base_instructions: (
+        f"You are assigned to answer QUESTION NUMBER {number} only.\n"
+        f"Your question: {{research_question_{number}?}}\n\n{base_instructions}"
+    ))
     # Combine base description with specific role information
-    description=f"{base_description} This agent specifically handles question #3.",
-    tools=[google_search],  # Google search tool for researching the assigned question
-    # Unique output key where this agent stores its research results
-    output_key="question_3_research_output"
-)
+    prompts.bind(researcher, "description", BASE_DESCRIPTION,
+                 render=lambda base_description: f"{base_description} This agent specifically handles question #{number}.")
+    return researcher
 
-# Question Researcher 4 - Handles the fourth question from the questions list
-question_researcher_agent_4 = LlmAgent(
-    name="QuestionResearcher4",  # Unique identifier for this specific researcher
-    model="gemini-2.5-flash-lite",    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
-    # Combine question assignment with base instructions using f-string formatting
-    instruction=f"You are assigned to answer QUESTION NUMBER 4 only.\n\n{base_instructions}",
-    # Combine base description with specific role information
-    description=f"{base_description} This agent specifically handles question #4.",
-    tools=[google_search],  # Google search tool for researching the assigned question
-    # Unique output key where this agent stores its research results
-    output_key="question_4_research_output"
-)
 
-# Question Researcher 5 - Handles the fifth question from the questions list
-question_researcher_agent_5 = LlmAgent(
-    name="QuestionResearcher5",  # Unique identifier for this specific researcher
-    model="gemini-2.5-flash-lite",    # AI model - Gemini 2.5 Flash Lite for fast, high-quality responses
-    # Combine question assignment with base instructions using f-string formatting
-    instruction=f"You are assigned to answer QUESTION NUMBER 5 only.\n\n{base_instructions}",
-    # Combine base description with specific role information
-    description=f"{base_description} This agent specifically handles question #5.",
-    tools=[google_search],  # Google search tool for researching the assigned question
-    # Unique output key where this agent stores its research results
-    output_key="question_5_research_output"
-)
+# Researchers are built up front for the maximum fan-out; only the ones needed run
+question_researcher_agents = [build_question_researcher(number) for number in range(1, MAX_RESEARCHERS + 1)]
 
-# --- 2. Create the ParallelAgent (Runs all question researchers concurrently) ---
-# ParallelAgent orchestrates the concurrent execution of all five question researchers
-# This significantly reduces total execution time compared to running them sequentially
-# The parallel agent completes when ALL sub-agents have finished their research
-parallel_questions_researcher_agent = ParallelAgent(
+# --- 2. Create the dynamic fan-out agent (runs one researcher per question, concurrently) ---
+# It reads the numbered list in questions_generator_output, gives researcher N its question
+# in state['research_question_N'], folds every finished answer into questions_research_output,
+# and completes when all started researchers have finished (or when the quorum and grace period,
+# or the deadline, are reached). Slow researchers can be hedged with a duplicate request
+parallel_questions_researcher_agent = DynamicFanOutAgent(
     name="ParallelQuestionsResearchAgent",  # Identifier for the parallel orchestrator
-    # List of all 5 sub-agents that will run simultaneously
-    sub_agents=[
-        question_researcher_agent_1,  # Researcher for question 1
-        question_researcher_agent_2,  # Researcher for question 2
-        question_researcher_agent_3,  # Researcher for question 3
-        question_researcher_agent_4,  # Researcher for question 4
-        question_researcher_agent_5   # Researcher for question 5
-    ],
+    sub_agents=question_researcher_agents,
+    items_state_key="questions_generator_output",
+    item_state_key_template="research_question_{n}",
+    # All research answers together, one section per question, for the query generator
+    combined_output_key="questions_research_output",
+    min_agents=MIN_RESEARCHERS,
+    max_concurrency=RESEARCH_CONCURRENCY,
+    quorum=RESEARCH_QUORUM,
+    straggler_grace_s=RESEARCH_STRAGGLER_GRACE_S,
+    deadline_s=RESEARCH_DEADLINE_S,
+    hedge_percentile=RESEARCH_HEDGE_PERCENTILE,
+    hedge_initial_delay_s=RESEARCH_HEDGE_INITIAL_DELAY_S,
     # Description of what this parallel agent accomplishes
-    description="Runs five question research agents in parallel to research and answer all five questions simultaneously."
+    description="Runs one question research agent per generated question, in parallel, to research and answer all questions simultaneously."
 )
 
 # Set the main export variable to the parallel agent
 # This is what gets imported when other modules import from this file
-# The parallel agent becomes the single entry point that manages all 5 researchers
-questions_researcher_agent = parallel_questions_researcher_agent
\ No newline at end of file
+# The parallel agent becomes the single entry point that manages all researchers
+questions_researcher_agent = parallel_questions_researcher_agent
@@ -24,8 +24,11 @@ from google.adk.agents import LlmAgent  # Core agent class for creating LLM-base
 # This allows importing from the utils directory two levels up from current file
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
 
-# Import utility function to load instruction files from text files
-from utils.file_loader import load_instructions_file  # Helper to read instruction text files
+# Import the prompt registry that loads (and hot-reloads) instruction files
+from utils.prompt_registry import prompts
+
+# Import the model selector (returns the Gemini model name, or a local fake model for benchmarks)
+from utils.models import get_model
 
 # Create the Requirements Writer Agent instance
 requirements_writer_agent = LlmAgent(
@@ -34,16 +37,7 @@ requirements_writer_agent = LlmAgent(
     
     # AI model to use - Gemini 2.5 Flash Lite for detailed requirement analysis and generation
     # Note: This uses 2.5 lite for more sophisticated requirement writing
-    model = "gemini-2.5-flash-lite",
-    
-    # Load detailed instructions from external text file
-    # Instructions contain systematic approach for converting queries to webpage requirements
-    # Includes step-by-step logic for analyzing queries and structuring requirements
-    instruction=load_instructions_file("agents/requirements_writer/instructions.txt"),
-    
-    # Load agent description from external text file
-    # Provides a brief summary of this agent's technical business analyst role
-    description=load_instructions_file("agents/requirements_writer/description.txt"),
+    model = get_model("gemini-2.5-flash-lite"),
     
     # No tools needed - this agent works with pure text analysis and requirement generation
     # It processes the merged query from query_generator without external API calls
@@ -51,4 +45,13 @@ requirements_writer_agent = LlmAgent(
     # Output key - where this agent stores the detailed requirements in the session state
     # The designer agent will reference this key to get the structured requirements document
     output_key="requirements_writer_output"
-)
\ No newline at end of file
+)
+
+# Load the instructions and description from their text files in the agent's folder.
+# The instructions contain the step-by-step behavior of this agent; the description is a
+# brief summary of its role. Both are reloaded when the files change (PROMPT_HOT_RELOAD)
+prompts.bind_agent(
+    requirements_writer_agent,
+    instruction="agents/requirements_writer/instructions.txt",
+    description="agents/requirements_writer/description.txt",
+)
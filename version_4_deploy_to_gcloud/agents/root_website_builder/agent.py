@@ -3,23 +3,51 @@ import sys
 from google.adk.agents import SequentialAgent
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),"..","..")))
-from utils.file_loader import load_instructions_file
-from agents.questions_generator.agent import questions_generator_agent
-from agents.questions_researcher.agent import questions_researcher_agent
-from agents.query_generator.agent import query_generator_agent
-from agents.requirements_writer.agent import requirements_writer_agent
-from agents.designer.agent import designer_agent
-from agents.code_writer.agent import code_writer_agent
+from utils.prompt_registry import prompts
+from utils.lazy_agent import lazy_agent
+from utils.tracing import tracer_from_env
+from utils.response_cache import response_cache_from_env
+from tools.search_tool import attach_search_report
+from utils.checkpoints import checkpointer_from_env
 
 root_agent = SequentialAgent(
     name="root_website_builder_agent",
+    # Each stage is imported and built when it first runs (LAZY_AGENTS=FALSE builds them all now),
+    # so a cold start does not pay for reading every prompt and building every agent up front.
     sub_agents=[
-        questions_generator_agent,
-        questions_researcher_agent,
-        query_generator_agent,
-        requirements_writer_agent,
-        designer_agent,
-        code_writer_agent
+        lazy_agent("questions_generator_agent", "agents.questions_generator.agent:questions_generator_agent"),
+        lazy_agent("ParallelQuestionsResearchAgent", "agents.questions_researcher.agent:questions_researcher_agent"),
+        lazy_agent("query_generator_agent", "agents.query_generator.agent:query_generator_agent"),
+        lazy_agent("requirements_writer_agent", "agents.requirements_writer.agent:requirements_writer_agent"),
+        lazy_agent("designer_agent", "agents.designer.agent:designer_agent"),
+        lazy_agent("code_writer_agent", "agents.code_writer.agent:code_writer_agent"),
     ],
-    description=load_instructions_file("agents/root_website_builder/description.txt")
-)
\ No newline at end of file
+)
+prompts.bind_agent(root_agent, description="agents/root_website_builder/description.txt")
+
+# Prompt hot reload: before an agent runs, changed instruction/description files
+# are read again and put into the live agents (PROMPT_HOT_RELOAD=FALSE turns it off).
+prompts.instrument(root_agent)
+
+# Optional latency tracing: when PIPELINE_TRACE_DIR is set, every agent, model
+# and tool call is recorded and one Chrome trace file is written per run.
+pipeline_tracer = tracer_from_env()
+if pipeline_tracer is not None:
+    pipeline_tracer.instrument(root_agent)
+
+# Optional response cache: when LLM_RESPONSE_CACHE is set, repeated model
+# requests (same model, instruction, state, tools and conversation) are served
+# from memory or SQLite instead of calling Gemini again.
+response_cache = response_cache_from_env()
+if response_cache is not None:
+    response_cache.instrument(root_agent)
+
+# When the shared search cache is enabled (SEARCH_CACHE), report how many
+# searches each run saved.
+attach_search_report(root_agent)
+
+# Optional checkpoint/resume: when PIPELINE_CHECKPOINT_DIR is set, every stage
+# output is saved, and a rerun with the same inputs skips the finished stages.
+stage_checkpointer = checkpointer_from_env()
+if stage_checkpointer is not None:
+    stage_checkpointer.instrument(root_agent)
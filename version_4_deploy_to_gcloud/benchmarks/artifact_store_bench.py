@@ -0,0 +1,110 @@
+# =============================================================================
+# FILE: artifact_store_bench.py
+# PURPOSE:
+#   Benchmark of utils/artifact_store.py against loose files in output/.
+#
+#   N pages are saved (a share of them repeats earlier pages, as happens when
+#   the same topic is generated again or answers come from the response
+#   cache), both as loose files and into the artifact store. Reported:
+#     - save time per page (new content vs. a page that is already stored)
+#     - bytes on disk for the pages (loose vs. deduplicated), and for the
+#       precompressed variants
+#     - "newest 50 of one session": a directory scan (list + stat + sort)
+#       vs. one query on the SQLite index
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.artifact_store_bench
+#       uv run python -m benchmarks.artifact_store_bench --pages 5000 --duplicates 0.3 --page-kb 60
+# =============================================================================
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.artifact_store import ArtifactStore
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+def make_page(number: int, page_kb: int) -> str:
+    """A page of about `page_kb` KB with some variety, like generated HTML."""
+    rng = random.Random(number)
+    words = ["solar", "system", "planet", "orbit", "moon", "gravity", "comet", "star", "light", "space"]
+    sections = []
+    while sum(len(section) for section in sections) < page_kb * 1024:
+        text = " ".join(rng.choice(words) for _ in range(40))
+        sections.append(f'<section class="card"><h2>Topic {number}</h2><p>{text}</p></section>\n')
+    return f"<!DOCTYPE html><html><head><title>Page {number}</title></head><body>{''.join(sections)}</body></html>"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Artifact store vs. loose files: dedupe, save time and listing.")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Share of saves that repeat an earlier page.")
+    parser.add_argument("--page-kb", type=int, default=40)
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    distinct: list[str] = []
+    saves = []
+    for number in range(args.pages):
+        if distinct and rng.random() < args.duplicates:
+            saves.append((rng.choice(distinct), f"session-{rng.randrange(args.sessions)}"))
+        else:
+            distinct.append(make_page(number, args.page_kb))
+            saves.append((distinct[-1], f"session-{rng.randrange(args.sessions)}"))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        loose = Path(workdir) / "output"
+        loose.mkdir()
+        store = ArtifactStore(str(Path(workdir) / "artifacts"))
+
+        new_s, duplicate_s = [], []
+        for index, (page, session_id) in enumerate(saves):
+            (loose / f"{index:08d}_{session_id}_generated_page.html").write_text(page, encoding="utf-8")
+            start = time.perf_counter()
+            artifact = store.save(page, session_id=session_id, topic=f"topic {index}")
+            (duplicate_s if artifact.deduplicated else new_s).append(time.perf_counter() - start)
+
+        session_id = saves[-1][1]
+        start = time.perf_counter()
+        scanned = sorted((entry for entry in os.scandir(loose) if session_id in entry.name),
+                         key=lambda entry: entry.stat().st_mtime, reverse=True)[:50]
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        indexed = store.list_artifacts(session_id, limit=50)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        stats = store.stats()
+        report = {
+            "pages": args.pages,
+            "distinct_pages": len(distinct),
+            "save_new_ms_p50": round(_percentile(new_s, 50) * 1000, 2),
+            "save_duplicate_ms_p50": round(_percentile(duplicate_s, 50) * 1000, 2) if duplicate_s else None,
+            "loose_bytes": sum(entry.stat().st_size for entry in os.scandir(loose)),
+            "store_page_bytes": stats["blob_bytes"],
+            "store_variant_bytes": stats["variant_bytes"],
+            "dedupe_saved_bytes": stats["dedupe_saved_bytes"],
+            "list_session_scan_ms": round(scan_ms, 2),
+            "list_session_index_ms": round(index_ms, 2),
+            "listed": [len(scanned), len(indexed)],
+        }
+        store.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# =============================================================================
+# FILE: cold_start_bench.py
+# PURPOSE:
+#   Cold-start benchmark of the Cloud Run entry point (main.py).
+#
+#   Every run starts `uvicorn main:app` in a fresh process, like Cloud Run does
+#   when it scales from zero, and measures from the moment the process starts:
+#     - listen_s:        the port accepts connections (Cloud Run's default
+#                        startup probe passes and traffic is routed)
+#     - first_request_s: the first request (GET /list-apps) has been answered
+#   and, separately, how long importing the root agent takes (agent_import_s),
+#   which the first /run pays on top.
+#
+#   Modes:
+#     eager     LAZY_AGENTS=FALSE   every stage is built when the agent is imported
+#     lazy      (default)           stages are built when they first run
+#     deferred  lazy + DEFERRED_STARTUP=TRUE, uvicorn binds before google.adk is imported
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.cold_start_bench
+#       uv run python -m benchmarks.cold_start_bench --runs 10 --modes lazy deferred
+# =============================================================================
+
+import argparse
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    "eager": {"LAZY_AGENTS": "FALSE", "DEFERRED_STARTUP": "FALSE"},
+    "lazy": {"LAZY_AGENTS": "TRUE", "DEFERRED_STARTUP": "FALSE"},
+    "deferred": {"LAZY_AGENTS": "TRUE", "DEFERRED_STARTUP": "TRUE"},
+}
+
+# Runs in a child process: time the import of the root agent alone.
+AGENT_IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+from agents.root_website_builder.agent import root_agent
+print(time.perf_counter() - start)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: measure_server_start
+# -----------------------------------------------------------------------------
+def measure_server_start(env: dict, timeout_s: float) -> dict:
+    """Starts uvicorn once and times the port bind and the first answered request."""
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as workdir:   # sessions.db goes here, not into the project
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(PROJECT_DIR),
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        listen_s = first_request_s = None
+        try:
+            while time.perf_counter() - start < timeout_s:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited:\n{server.stderr.read().decode()[-2000:]}")
+                if listen_s is None:
+                    try:
+                        socket.create_connection(("127.0.0.1", port), timeout=0.05).close()
+                        listen_s = time.perf_counter() - start
+                    except OSError:
+                        time.sleep(0.005)
+                        continue
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/list-apps", timeout=timeout_s) as response:
+                        if response.status == 200:
+                            first_request_s = time.perf_counter() - start
+                            break
+                except OSError:
+                    time.sleep(0.005)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    if first_request_s is None:
+        raise RuntimeError(f"No answer within {timeout_s}s")
+    return {"listen_s": listen_s, "first_request_s": first_request_s}
+
+
+def measure_agent_import(env: dict) -> float:
+    completed = subprocess.run([sys.executable, "-c", AGENT_IMPORT_SCRIPT], cwd=PROJECT_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start time of main.py (uvicorn) per startup mode.")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--runs", type=int, default=5, help="Process starts per mode.")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for the first answer.")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        env = dict(os.environ, PYTHONPATH=str(PROJECT_DIR), **MODES[mode])
+        runs = [measure_server_start(env, args.timeout) for _ in range(args.runs)]
+        imports = [measure_agent_import(env) for _ in range(args.runs)]
+        results[mode] = {
+            metric: {"p50_s": round(_percentile(values, 50), 3), "p95_s": round(_percentile(values, 95), 3)}
+            for metric, values in (
+                ("listen_s", [run["listen_s"] for run in runs]),
+                ("first_request_s", [run["first_request_s"] for run in runs]),
+                ("agent_import_s", imports),
+            )
+        }
+        print(f"{mode:>9}: listen p50 {results[mode]['listen_s']['p50_s']}s, "
+              f"first request p50 {results[mode]['first_request_s']['p50_s']}s, "
+              f"agent import p50 {results[mode]['agent_import_s']['p50_s']}s")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
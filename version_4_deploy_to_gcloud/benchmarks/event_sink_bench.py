@@ -0,0 +1,99 @@
+# =============================================================================
+# FILE: event_sink_bench.py
+# PURPOSE:
+#   Micro-benchmark for utils/event_sink.py. Measures how much time each
+#   verbosity level spends per event, so we can see what printing costs the
+#   runners.
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.event_sink_bench --events 2000
+#
+#   The events are synthetic but shaped like a real pipeline run: long text
+#   answers from the researchers, a function call with a whole HTML page as
+#   its argument, a function response, and usage metadata on every event.
+#   Output goes to os.devnull (with a forced terminal for the highlighted JSON
+#   level), so the numbers measure rendering work rather than the terminal.
+# =============================================================================
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.adk.events import Event
+from google.genai import types
+from rich.console import Console
+
+from utils.event_sink import EventSink, JsonEventSink, SummaryEventSink
+
+
+def build_sample_events() -> list[Event]:
+    """Creates a small, representative mix of pipeline events."""
+    usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=1800, candidates_token_count=650)
+    research_text = "Research finding with a citation. " * 120   # ~4 KB answer
+    page = "<!DOCTYPE html><html><body>" + "<section><p>content</p></section>" * 300 + "</body></html>"
+
+    def text_event(author: str, text: str, partial: bool = False) -> Event:
+        return Event(
+            invocation_id="bench", author=author, partial=partial, usage_metadata=usage,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+        )
+
+    call = Event(
+        invocation_id="bench", author="code_writer_agent", usage_metadata=usage,
+        content=types.Content(role="model", parts=[types.Part(
+            function_call=types.FunctionCall(name="write_to_file", args={"content": page}))]),
+    )
+    response = Event(
+        invocation_id="bench", author="code_writer_agent",
+        content=types.Content(role="user", parts=[types.Part(
+            function_response=types.FunctionResponse(
+                name="write_to_file", response={"status": "success", "file": "output/page.html"}))]),
+    )
+    return [
+        text_event("questions_generator_agent", "1. What is it?\n2. Why?\n3. How?\n4. Compared?\n5. Impact?"),
+        text_event("QuestionResearcher1", research_text),
+        text_event("QuestionResearcher2", research_text[:200], partial=True),
+        text_event("query_generator_agent", research_text),
+        call,
+        response,
+    ]
+
+
+def bench_sink(name: str, sink: EventSink, events: list[Event], total: int) -> float:
+    """Emits `total` events through `sink` and returns microseconds per event."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        sink.start_turn()
+        start = time.perf_counter()
+        for index in range(total):
+            sink.emit(events[index % len(events)], index + 1)
+        elapsed = time.perf_counter() - start
+    return elapsed / total * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-event overhead of each event sink verbosity level.")
+    parser.add_argument("--events", type=int, default=1000, help="Events emitted per level.")
+    args = parser.parse_args()
+
+    events = build_sample_events()
+    devnull = open(os.devnull, "w")
+    sinks = [
+        ("silent", EventSink()),
+        ("summary", SummaryEventSink(stream=devnull)),
+        ("json (plain)", JsonEventSink(highlight=False)),
+        ("json (highlighted)", JsonEventSink(console=Console(file=devnull, force_terminal=True))),
+    ]
+
+    print(f"{'level':<20} {'us/event':>12} {'events/s':>12}")
+    for name, sink in sinks:
+        per_event_us = bench_sink(name, sink, events, args.events)
+        print(f"{name:<20} {per_event_us:>12.1f} {1_000_000 / per_event_us:>12.0f}")
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
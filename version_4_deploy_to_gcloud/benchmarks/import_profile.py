@@ -0,0 +1,119 @@
+# =============================================================================
+# FILE: import_profile.py
+# PURPOSE:
+#   Import-time profile of the deployment entry points, to see what a Cloud
+#   Run cold start spends its time on before the first request.
+#
+#   The module is imported in a fresh interpreter with `python -X importtime`,
+#   and Python's per-module report is summarised:
+#     - the total import time
+#     - the slowest modules (self time and cumulative time)
+#     - the time per top-level package (google.adk, fastapi, sqlalchemy, ...)
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.import_profile                          # main (the FastAPI app)
+#       uv run python -m benchmarks.import_profile agents.root_website_builder.agent
+#       LAZY_AGENTS=FALSE uv run python -m benchmarks.import_profile agents.root_website_builder.agent
+#       uv run python -m benchmarks.import_profile --output import_profile.json
+# =============================================================================
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# One line of -X importtime output: "import time:   self [us] | cumulative | imported package"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: profile_imports
+# -----------------------------------------------------------------------------
+def profile_imports(module: str) -> list[dict]:
+    """
+    Imports `module` in a new interpreter with -X importtime.
+
+    Returns:
+        list[dict]: One entry per imported module: name, depth, self_ms, cumulative_ms.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, env=dict(os.environ, PYTHONPATH=str(PROJECT_DIR)),
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "depth": len(indent) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    return modules
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: summarize
+# -----------------------------------------------------------------------------
+def summarize(modules: list[dict], top: int) -> dict:
+    """Totals, the slowest modules, and the self time per top-level package."""
+    by_package = defaultdict(float)
+    for entry in modules:
+        name = entry["module"]
+        # google.* is split one level deeper so google.adk and google.genai show up separately.
+        parts = name.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "google" and len(parts) > 1 else parts[0]
+        by_package[package] += entry["self_ms"]
+
+    def rounded(entries: list[dict], key: str) -> list[dict]:
+        return [{"module": entry["module"], key: round(entry[key], 1)} for entry in entries]
+
+    return {
+        "total_ms": round(sum(entry["self_ms"] for entry in modules), 1),
+        "modules_imported": len(modules),
+        "by_package_ms": {package: round(ms, 1) for package, ms in
+                          sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]},
+        "slowest_self": rounded(sorted(modules, key=lambda entry: entry["self_ms"], reverse=True)[:top], "self_ms"),
+        "slowest_cumulative": rounded(
+            sorted(modules, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top], "cumulative_ms"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time profile (python -X importtime) of a module.")
+    parser.add_argument("module", nargs="?", default="main", help="Module to import (default: main).")
+    parser.add_argument("--top", type=int, default=15, help="How many modules / packages to list.")
+    parser.add_argument("--output", help="Also save the report (and the raw per-module times) as JSON.")
+    args = parser.parse_args()
+
+    modules = profile_imports(args.module)
+    report = {"module": args.module, **summarize(modules, args.top)}
+
+    print(f"import {args.module}: {report['total_ms']} ms, {report['modules_imported']} modules")
+    print("\nSelf time per package:")
+    for package, ms in report["by_package_ms"].items():
+        print(f"  {ms:>9.1f} ms  {package}")
+    print("\nSlowest modules (cumulative, includes what they import):")
+    for entry in report["slowest_cumulative"]:
+        print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({**report, "modules": modules}, output_file, indent=2)
+        print(f"\nSaved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
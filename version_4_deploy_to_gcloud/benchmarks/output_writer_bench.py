@@ -0,0 +1,134 @@
+# =============================================================================
+# FILE: output_writer_bench.py
+# PURPOSE:
+#   Benchmark of the page writer behind write_to_file with many sessions
+#   finishing at the same time (default: 100 concurrent writers).
+#
+#   Two writers are compared, each in a fresh temporary folder:
+#     blocking   the old write_to_file: second-resolution names, mkdir on every
+#                call, Path.write_text on the event loop thread
+#     offloaded  utils/output_writer.py: unique names, temp file + rename,
+#                I/O in the writer's thread pool
+#
+#   Reported per writer:
+#     - wall_s / writes_per_s / mb_per_s   throughput of the whole batch
+#     - files_on_disk                      pages that survived (lower than the
+#                                          number of writers = overwritten pages)
+#     - loop_lag_max_ms / loop_lag_p95_ms  how late a 1 ms heartbeat task woke up,
+#                                          i.e. how long the event loop was blocked
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.output_writer_bench
+#       uv run python -m benchmarks.output_writer_bench --writers 100 --page-kb 60 --rounds 5 --threads 4 --fsync
+# =============================================================================
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.output_writer import OutputWriter
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+async def _write_blocking(directory: Path, writer_id: int, content: str) -> None:
+    """The previous write_to_file, run on the event loop like the tool did."""
+    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+    filename = directory / f"{timestamp}_generated_page.html"
+    directory.mkdir(exist_ok=True)
+    filename.write_text(content, encoding="utf-8")
+
+
+def _make_offloaded(threads: int, fsync: bool):
+    writers: dict[Path, OutputWriter] = {}
+
+    async def write(directory: Path, writer_id: int, content: str) -> None:
+        if directory not in writers:
+            writers[directory] = OutputWriter(str(directory), threads=threads, fsync=fsync)
+        writer = writers[directory]
+        await writer.write_async(writer.unique_name(run_id=f"e-{writer_id:08d}"), content)
+
+    return write, writers
+
+
+async def _heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    """Sleeps 1 ms at a time and records how late it woke up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(max(0.0, time.perf_counter() - start - 0.001))
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: run_round
+# -----------------------------------------------------------------------------
+async def run_round(write, writers: int, content: str) -> dict:
+    """Starts `writers` concurrent writes into a new folder and measures them."""
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = Path(workdir) / "output"
+        lags: list[float] = []
+        stop = asyncio.Event()
+        heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+        await asyncio.sleep(0.005)   # let the heartbeat start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(write(directory, writer_id, content) for writer_id in range(writers)))
+        wall_s = time.perf_counter() - start
+
+        stop.set()
+        await heartbeat
+        files = [path for path in directory.iterdir() if not path.name.startswith(".")]
+        return {"wall_s": wall_s, "files_on_disk": len(files), "lags": lags or [0.0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent write_to_file benchmark: blocking vs offloaded writer.")
+    parser.add_argument("--writers", type=int, default=100, help="Concurrent writes per round.")
+    parser.add_argument("--page-kb", type=int, default=60, help="Size of each page in KB.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=2, help="Thread pool size of the offloaded writer.")
+    parser.add_argument("--fsync", action="store_true", help="fsync every page in the offloaded writer.")
+    args = parser.parse_args()
+
+    content = ("<section><p>Generated content.</p></section>\n" * (args.page_kb * 1024 // 46 + 1))[:args.page_kb * 1024]
+    offloaded, pools = _make_offloaded(args.threads, args.fsync)
+
+    results = {}
+    for mode, write in (("blocking", _write_blocking), ("offloaded", offloaded)):
+        rounds = [asyncio.run(run_round(write, args.writers, content)) for _ in range(args.rounds)]
+        walls = [result["wall_s"] for result in rounds]
+        lags = [lag for result in rounds for lag in result["lags"]]
+        wall_p50 = _percentile(walls, 50)
+        results[mode] = {
+            "wall_s_p50": round(wall_p50, 4),
+            "writes_per_s": round(args.writers / wall_p50, 1),
+            "mb_per_s": round(args.writers * args.page_kb / 1024 / wall_p50, 1),
+            "files_on_disk_min": min(result["files_on_disk"] for result in rounds),
+            "loop_lag_max_ms": round(max(lags) * 1000, 2),
+            "loop_lag_p95_ms": round(_percentile(lags, 95) * 1000, 2),
+        }
+        print(f"{mode:>9}: {results[mode]['writes_per_s']} writes/s, "
+              f"{results[mode]['files_on_disk_min']}/{args.writers} files kept, "
+              f"loop blocked up to {results[mode]['loop_lag_max_ms']} ms")
+
+    for pool in pools.values():
+        pool.close()
+    print(json.dumps({"writers": args.writers, "page_kb": args.page_kb, "threads": args.threads,
+                      "fsync": args.fsync, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
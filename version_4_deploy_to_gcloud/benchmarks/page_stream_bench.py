@@ -0,0 +1,112 @@
+# =============================================================================
+# FILE: page_stream_bench.py
+# PURPOSE:
+#   Benchmark of utils/page_stream.py: when can a reader see the page?
+#
+#   A simulated model streams a reply (a short intro, then the page in an
+#   ```html block) in chunks at a fixed rate, the way partial SSE responses
+#   arrive. A reader follows the preview (PageStreamer.follow) meanwhile.
+#   Reported, for N runs streamed at the same time:
+#     - first byte: when the reader got the first bytes of the page
+#     - head complete: when the reader had the whole <head> (styles), which
+#       is when a browser can start rendering the body progressively
+#     - total: when the page was complete (without streaming, the first
+#       moment anything exists on disk)
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.page_stream_bench
+#       uv run python -m benchmarks.page_stream_bench --runs 20 --page-kb 40 --chars-per-s 2000
+# =============================================================================
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.output_writer import OutputWriter
+from utils.page_stream import PageStreamer
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+def make_reply(page_kb: int) -> str:
+    """A code_writer-style reply: a sentence, then the page in an ```html block."""
+    style = "<style>" + "".join(f".card-{i}{{padding:{i}px;margin:{i}px}}" for i in range(60)) + "</style>"
+    cards = []
+    while sum(len(card) for card in cards) < page_kb * 1024:
+        cards.append(f'<section class="card-{len(cards) % 60}"><h2>Section {len(cards)}</h2>'
+                     f'<p>{"Planets orbit the sun. " * 12}</p></section>\n')
+    page = (f"<!DOCTYPE html>\n<html>\n<head><title>Solar system</title>{style}</head>\n"
+            f"<body>\n{''.join(cards)}</body>\n</html>")
+    return f"Here is the complete webpage:\n\n```html\n{page}\n```\n\nSaving it now."
+
+
+async def simulate_run(streamer: PageStreamer, run_id: str, reply: str, chunk_chars: int, chars_per_s: float) -> None:
+    """Feeds `reply` to the streamer like a model streaming at `chars_per_s`, then saves the page like write_to_file."""
+    for start in range(0, len(reply), chunk_chars):
+        await asyncio.sleep(chunk_chars / chars_per_s)
+        await streamer.on_text(run_id, "code_writer_agent", reply[start:start + chunk_chars])
+    page = reply[reply.index("<!DOCTYPE"):reply.rindex("```")]
+    path = await streamer.writer.write_async(streamer.writer.unique_name(run_id=run_id), page)
+    await streamer.finish(run_id, path.as_posix())
+
+
+async def follow_run(streamer: PageStreamer, run_id: str, started: float) -> dict:
+    """Reads the preview as it grows; records when the first byte and the whole <head> arrived."""
+    while streamer.stream(run_id) is None:
+        await asyncio.sleep(0.01)
+    received = b""
+    first_byte_s = head_s = None
+    async for chunk in streamer.follow(run_id, poll_s=0.05):
+        received += chunk
+        now = time.perf_counter() - started
+        if first_byte_s is None:
+            first_byte_s = now
+        if head_s is None and b"</head>" in received:
+            head_s = now
+    return {"first_byte_s": first_byte_s, "head_s": head_s, "bytes": len(received)}
+
+
+async def bench(args) -> dict:
+    reply = make_reply(args.page_kb)
+    with tempfile.TemporaryDirectory() as workdir:
+        streamer = PageStreamer(OutputWriter(workdir))
+        started = time.perf_counter()
+        run_ids = [f"run-{index:04d}" for index in range(args.runs)]
+        followers = [asyncio.create_task(follow_run(streamer, run_id, started)) for run_id in run_ids]
+        await asyncio.gather(*(simulate_run(streamer, run_id, reply, args.chunk_chars, args.chars_per_s)
+                               for run_id in run_ids))
+        reads = await asyncio.gather(*followers)
+        totals = [stream["total_s"] for stream in streamer.report()["runs"]]
+        streamer.writer.close()
+    return {
+        "runs": args.runs,
+        "reply_chars": len(reply),
+        "first_byte_s_p50": round(_percentile([read["first_byte_s"] for read in reads], 50), 3),
+        "head_complete_s_p50": round(_percentile([read["head_s"] for read in reads], 50), 3),
+        "total_s_p50": round(_percentile(totals, 50), 3),
+        "bytes_read_p50": _percentile([read["bytes"] for read in reads], 50),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time until a reader sees the page, with streaming.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--page-kb", type=int, default=30)
+    parser.add_argument("--chunk-chars", type=int, default=400, help="Characters per partial response.")
+    parser.add_argument("--chars-per-s", type=float, default=4000, help="Model output rate.")
+    print(json.dumps(asyncio.run(bench(parser.parse_args())), indent=2))
+
+
+if __name__ == "__main__":
+    main()
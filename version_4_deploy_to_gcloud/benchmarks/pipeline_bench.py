@@ -0,0 +1,287 @@
+# =============================================================================
+# FILE: pipeline_bench.py
+# PURPOSE:
+#   End-to-end benchmark of the website builder pipelines in versions 1-4:
+#     version 1: single agent
+#     version 2: 3-stage sequential pipeline
+#     version 3: 6-stage research pipeline (sequential + parallel)
+#     version 4: the same research pipeline, cloud-ready
+#
+#   Every pipeline runs against the local FakeLlm (utils/fake_llm.py) and a
+#   fake google_search tool, so the numbers show the cost of the ADK
+#   orchestration itself rather than Gemini's latency. For each pipeline and
+#   each concurrency level (1, 10 and 100 sessions at once) we report:
+#     - p50 / p95 end-to-end latency per run
+#     - events per run
+#     - orchestration CPU time per run
+#     - peak RSS of the process
+#     - session-state bytes (and full session bytes) per run
+#
+#   Each (pipeline, concurrency) pair runs in its own worker process, because
+#   every version has a top-level `agents` package and because peak RSS is
+#   only meaningful per process.
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.pipeline_bench
+#       uv run python -m benchmarks.pipeline_bench --pipelines v2 v4 --concurrency 1 10
+#       uv run python -m benchmarks.pipeline_bench --compare benchmarks/baselines/<file>.json
+#
+#   Results are saved as a JSON baseline in benchmarks/baselines/, named after
+#   the installed google-adk version, so a regression after bumping
+#   google-adk shows up when comparing the new file with the old one.
+# =============================================================================
+
+import argparse
+import asyncio
+import datetime
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent.parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+FAKE_CONFIG_PATH = BENCH_DIR / "fake_pipeline_config.json"
+
+# The pipelines we can benchmark: short name -> (project folder, agent module)
+PIPELINES = {
+    "v1": ("version_1_website_builder_simple", "agents.website_builder_simple.agent"),
+    "v2": ("version_2_sequential_website_agent", "agents.root_website_builder.agent"),
+    "v3": ("version_3_parallel_research_agent", "agents.root_website_builder.agent"),
+    "v4": ("version_4_deploy_to_gcloud", "agents.root_website_builder.agent"),
+}
+
+# Metrics where a higher value is worse (used by --compare).
+COMPARED_METRICS = ["latency_p50_s", "latency_p95_s", "cpu_per_run_ms", "peak_rss_mb", "state_bytes_per_run"]
+
+RESULT_MARKER = "BENCH_RESULT "
+
+
+# -----------------------------------------------------------------------------
+# WORKER: runs ONE pipeline at ONE concurrency level (in a child process)
+# -----------------------------------------------------------------------------
+def _load_fake_llm_module():
+    """Loads version 4's utils/fake_llm.py by path (every version has its own `utils`)."""
+    spec = importlib.util.spec_from_file_location("bench_fake_llm", BENCH_DIR.parent / "utils" / "fake_llm.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _walk(agent):
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _walk(sub_agent)
+
+
+def _use_fake_search(root_agent, latency_ms: float) -> None:
+    """Replaces the built-in google_search tool with a local function tool of the same name."""
+    from google.adk.tools import FunctionTool
+    from google.adk.tools.google_search_tool import GoogleSearchTool
+
+    async def google_search(query: str) -> dict:
+        """Searches the web and returns the top results for the query."""
+        await asyncio.sleep(latency_ms / 1000)
+        return {"results": [
+            {"title": f"Result {i} for {query}", "snippet": f"Deterministic snippet {i} about {query}."}
+            for i in range(1, 6)
+        ]}
+
+    fake_search = FunctionTool(google_search)
+    for agent in _walk(root_agent):
+        tools = getattr(agent, "tools", None)
+        if tools:
+            agent.tools = [fake_search if isinstance(tool, GoogleSearchTool) else tool for tool in tools]
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _run_level(root_agent, concurrency: int, rounds: int) -> dict:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai.types import Content, Part
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=root_agent, app_name="bench", session_service=session_service)
+
+    async def one_run(index: int) -> dict:
+        session_id = f"bench_{index}_{uuid.uuid4().hex[:6]}"
+        await session_service.create_session(app_name="bench", user_id="bench", session_id=session_id)
+        start = time.perf_counter()
+        event_count = 0
+        async for _ in runner.run_async(
+            user_id="bench", session_id=session_id,
+            new_message=Content(role="user", parts=[Part(text=f"benchmark topic {index}")]),
+        ):
+            event_count += 1
+        latency = time.perf_counter() - start
+        session = await session_service.get_session(app_name="bench", user_id="bench", session_id=session_id)
+        return {
+            "latency_s": latency,
+            "events": event_count,
+            "state_bytes": len(json.dumps(session.state, default=str).encode("utf-8")),
+            "session_bytes": len(session.model_dump_json().encode("utf-8")),
+        }
+
+    runs: list[dict] = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for round_index in range(rounds):
+        runs += await asyncio.gather(*(one_run(round_index * concurrency + i) for i in range(concurrency)))
+    cpu_s, wall_s = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    latencies = [run["latency_s"] for run in runs]
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    return {
+        "concurrency": concurrency,
+        "runs": len(runs),
+        "latency_p50_s": round(_percentile(latencies, 50), 4),
+        "latency_p95_s": round(_percentile(latencies, 95), 4),
+        "events_per_run": round(sum(run["events"] for run in runs) / len(runs), 2),
+        "cpu_per_run_ms": round(cpu_s / len(runs) * 1000, 2),
+        "throughput_runs_per_s": round(len(runs) / wall_s, 2),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "state_bytes_per_run": round(sum(run["state_bytes"] for run in runs) / len(runs)),
+        "session_bytes_per_run": round(sum(run["session_bytes"] for run in runs) / len(runs)),
+    }
+
+
+def worker_main(args: argparse.Namespace) -> None:
+    project_dir, agent_module = PIPELINES[args.pipeline]
+    project_path = REPO_DIR / project_dir
+
+    # The fake model must be registered for the Gemini names before any call.
+    os.environ["FAKE_LLM_CONFIG"] = str(FAKE_CONFIG_PATH)
+    _load_fake_llm_module().install_fake_llm_override()
+
+    # The agents read their instruction files relative to the project folder,
+    # so version 4's stages are built now rather than lazily after the chdir below.
+    os.environ["LAZY_AGENTS"] = "FALSE"
+    os.chdir(project_path)
+    sys.path.insert(0, str(project_path))
+    root_agent = importlib.import_module(agent_module).root_agent
+    _use_fake_search(root_agent, args.search_latency_ms)
+
+    # Generated pages go to a scratch folder instead of the project's output/.
+    os.chdir(tempfile.mkdtemp(prefix=f"bench_{args.pipeline}_"))
+
+    result = asyncio.run(_run_level(root_agent, args.concurrency[0], args.rounds))
+    result["pipeline"] = args.pipeline
+    print(RESULT_MARKER + json.dumps(result), flush=True)
+
+
+# -----------------------------------------------------------------------------
+# DRIVER: starts the workers, prints the table, saves / compares baselines
+# -----------------------------------------------------------------------------
+def run_worker(pipeline: str, concurrency: int, args: argparse.Namespace) -> dict:
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--worker",
+        "--pipelines", pipeline, "--concurrency", str(concurrency),
+        "--rounds", str(args.rounds), "--search-latency-ms", str(args.search_latency_ms),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"{pipeline} @ {concurrency} failed:\n{completed.stderr[-2000:]}")
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> bool:
+    """Prints metric changes against a baseline. Returns False on a regression."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    old = {(r["pipeline"], r["concurrency"]): r for r in baseline["results"]}
+    ok = True
+    print(f"\nComparison with {baseline_path} (google-adk {baseline['meta']['google_adk']}):")
+    for result in results:
+        previous = old.get((result["pipeline"], result["concurrency"]))
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            flag = "REGRESSION" if change > tolerance else ""
+            ok = ok and not flag
+            print(f"  {result['pipeline']} c={result['concurrency']:<4} {metric:<22} "
+                  f"{before:>12} -> {after:<12} {change:+7.1%} {flag}")
+    return ok
+
+
+def driver_main(args: argparse.Namespace) -> None:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        adk_version = version("google-adk")
+    except PackageNotFoundError:
+        adk_version = "unknown"
+
+    results = []
+    header = (f"{'pipeline':<9}{'conc':>5}{'runs':>6}{'p50 s':>9}{'p95 s':>9}{'events':>8}"
+              f"{'cpu ms/run':>12}{'rss MB':>9}{'state B':>10}{'session B':>11}")
+    print(header)
+    for pipeline in args.pipelines:
+        for concurrency in args.concurrency:
+            r = run_worker(pipeline, concurrency, args)
+            results.append(r)
+            print(f"{pipeline:<9}{concurrency:>5}{r['runs']:>6}{r['latency_p50_s']:>9}{r['latency_p95_s']:>9}"
+                  f"{r['events_per_run']:>8}{r['cpu_per_run_ms']:>12}{r['peak_rss_mb']:>9}"
+                  f"{r['state_bytes_per_run']:>10}{r['session_bytes_per_run']:>11}")
+
+    baseline = {
+        "meta": {
+            "google_adk": adk_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "rounds": args.rounds,
+            "search_latency_ms": args.search_latency_ms,
+            "fake_llm_config": json.loads(FAKE_CONFIG_PATH.read_text(encoding="utf-8")),
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else BASELINE_DIR / f"pipeline_bench_adk-{adk_version}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(baseline, indent=2), encoding="utf-8")
+    print(f"\nBaseline written to {output}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the version 1-4 pipelines.")
+    parser.add_argument("--pipelines", nargs="+", choices=sorted(PIPELINES), default=sorted(PIPELINES))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 10, 100],
+                        help="Concurrent sessions per level.")
+    parser.add_argument("--rounds", type=int, default=3, help="How many times each level is repeated.")
+    parser.add_argument("--search-latency-ms", type=float, default=300, help="Latency of the fake google_search.")
+    parser.add_argument("--output", help="Baseline file to write (default: benchmarks/baselines/pipeline_bench_adk-<version>.json).")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Compare against an earlier baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown before flagging.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.pipeline = args.pipelines[0]
+        worker_main(args)
+    else:
+        driver_main(args)
+
+
+if __name__ == "__main__":
+    main()
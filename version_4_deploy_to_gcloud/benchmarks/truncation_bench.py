@@ -0,0 +1,103 @@
+# =============================================================================
+# FILE: truncation_bench.py
+# PURPOSE:
+#   Benchmark of utils/truncation.py: cut-off pages completed by continuation
+#   vs. generated again from scratch.
+#
+#   N pages are cut at a random point (as a model hitting its output token
+#   limit does). Each cut page goes through PageRecovery.check, and the rest
+#   is sent back with resume() the way the model would send it (sometimes
+#   repeating the last few hundred characters, sometimes inside a fence).
+#   Reported:
+#     - the time of the local check, for complete and for cut pages
+#     - how many stitched pages equal the original
+#     - output tokens of a continuation vs. a full regeneration, and the time
+#       both take at the given model output rate (--chars-per-s)
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m benchmarks.truncation_bench
+#       uv run python -m benchmarks.truncation_bench --pages 500 --page-kb 60 --chars-per-s 1000
+# =============================================================================
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.prompt_registry import CHARS_PER_TOKEN
+from utils.truncation import PageRecovery, find_truncation
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Nearest-rank percentile (no interpolation, works for small samples)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))]
+
+
+def make_page(number: int, page_kb: int) -> str:
+    """A page of about `page_kb` KB with styles, sections and a script, like code_writer's pages."""
+    rng = random.Random(number)
+    words = ["solar", "system", "planet", "orbit", "moon", "gravity", "comet", "star", "light", "space",
+             "telescope", "eclipse", "asteroid", "nebula", "galaxy", "mission"]
+    sections = []
+    while sum(len(section) for section in sections) < page_kb * 1024:
+        text = " ".join(rng.choice(words) for _ in range(40))
+        sections.append(f'<section class="card"><h2>Topic {len(sections)}</h2><p>{text} &amp; more</p>'
+                        f'<!-- card {len(sections)} --><img src="img{len(sections)}.png" alt="{text[:20]}"></section>\n')
+    return ("<!DOCTYPE html>\n<html lang=\"en\">\n<head><title>Page</title><style>.card{padding:1rem}</style></head>\n"
+            f"<body>\n{''.join(sections)}<script>\nconst cards = document.querySelectorAll('.card');\n"
+            "cards.forEach(card => card.classList.add('ready'));\n</script>\n</body>\n</html>")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Continuation of cut-off pages vs. full regeneration.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-kb", type=int, default=40)
+    parser.add_argument("--chars-per-s", type=float, default=1500, help="Model output rate, for the modeled times.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    recovery = PageRecovery(max_continuations=3)
+    complete_ms, cut_ms, exact = [], [], 0
+    regenerate_s, continue_s = [], []
+    for number in range(args.pages):
+        page = make_page(number, args.page_kb)
+        start = time.perf_counter()
+        assert find_truncation(page) is None
+        complete_ms.append((time.perf_counter() - start) * 1000)
+
+        cut = rng.randrange(len(page) // 10, len(page) - 10)
+        start = time.perf_counter()
+        check = recovery.check(f"run-{number}", page[:cut])
+        cut_ms.append((time.perf_counter() - start) * 1000)
+
+        # The model's continuation: from the kept text on, sometimes repeating its end or fenced.
+        repeat = rng.choice([0, 0, 80, 400])
+        continuation = page[max(0, len(check.page) - repeat):]
+        if rng.random() < 0.3:
+            continuation = f"```html\n{continuation}\n```"
+        result = recovery.resume(f"run-{number}", continuation)
+        exact += result.page.strip() == page.strip()
+        regenerate_s.append(len(page) / args.chars_per_s)
+        continue_s.append(len(continuation) / args.chars_per_s)
+
+    report = recovery.report()
+    print(json.dumps({
+        "pages": args.pages,
+        "check_complete_ms_p50": round(_percentile(complete_ms, 50), 3),
+        "check_cut_ms_p50": round(_percentile(cut_ms, 50), 3),
+        "stitched_exactly": f"{exact}/{args.pages}",
+        "regenerate_tokens_per_page": round(sum(regenerate_s) * args.chars_per_s / CHARS_PER_TOKEN / args.pages),
+        "tokens_saved_per_page": round(report["tokens_saved"] / max(1, report["recovered"])),
+        "regenerate_s_p50": round(_percentile(regenerate_s, 50), 2),
+        "continue_s_p50": round(_percentile(continue_s, 50), 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
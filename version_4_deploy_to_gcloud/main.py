@@ -11,11 +11,19 @@ Key Components:
 3. Session management setup
 4. CORS configuration for web access
 5. Web interface enablement
+6. Optional deferred startup for faster Cloud Run cold starts (DEFERRED_STARTUP)
+7. Routes serving the generated pages from the artifact store (ARTIFACT_STORE)
+8. A live preview of the page being generated (STREAMING_PAGE)
 """
 
+import asyncio
+import importlib
 import os
+import sys
 import uvicorn
-from google.adk.cli.fast_api import get_fast_api_app
+
+# Lets uvicorn bind its port before google.adk has been imported (see DEFERRED_STARTUP below)
+from utils.deferred_app import DeferredApp
 
 # =============================================================================
 # DIRECTORY AND PATH CONFIGURATION
@@ -62,27 +70,71 @@ SERVE_WEB_INTERFACE = True
 # FASTAPI APPLICATION CREATION
 # =============================================================================
 
-# Create the FastAPI application instance using ADK's built-in function
-# This function automatically sets up all the necessary routes and middleware
-# for serving ADK agents through a web interface and REST API
-app = get_fast_api_app(
-    # Path to the directory containing all agent folders
-    # Each subdirectory in 'agents/' represents a different agent
-    # The ADK will automatically discover and load all agents from this directory
-    agents_dir=os.path.join(AGENT_DIR, "agents"),
-    
-    # Database connection string for session persistence
-    # Sessions allow maintaining conversation context across multiple requests
-    session_service_uri=SESSION_SERVICE_URI,
-    
-    # CORS configuration to allow web browser access
-    # Essential for the web interface to function properly
-    allow_origins=ALLOWED_ORIGINS,
-    
-    # Enable/disable the web interface
-    # When enabled, provides HTML pages for agent interaction
-    web=SERVE_WEB_INTERFACE,
-)
+def create_app():
+    """Creates the FastAPI application instance using ADK's built-in function"""
+    # Importing google.adk is the slowest part of a cold start, so it happens here
+    # (and, with DEFERRED_STARTUP, in a background thread after uvicorn has bound its port)
+    from google.adk.cli.fast_api import get_fast_api_app
+
+    # This function automatically sets up all the necessary routes and middleware
+    # for serving ADK agents through a web interface and REST API
+    app = get_fast_api_app(
+        # Path to the directory containing all agent folders
+        # Each subdirectory in 'agents/' represents a different agent
+        # The ADK will automatically discover and load all agents from this directory
+        agents_dir=os.path.join(AGENT_DIR, "agents"),
+
+        # Database connection string for session persistence
+        # Sessions allow maintaining conversation context across multiple requests
+        session_service_uri=SESSION_SERVICE_URI,
+
+        # CORS configuration to allow web browser access
+        # Essential for the web interface to function properly
+        allow_origins=ALLOWED_ORIGINS,
+
+        # Enable/disable the web interface
+        # When enabled, provides HTML pages for agent interaction
+        web=SERVE_WEB_INTERFACE,
+    )
+
+    # When ARTIFACT_STORE is set, the pages written by code_writer_agent are served from
+    # /artifacts (list, metadata, and the page itself with ETag, Range and gzip/brotli)
+    from utils.artifact_store import get_artifact_store
+    artifact_store = get_artifact_store()
+    if artifact_store is not None:
+        from utils.artifact_routes import artifact_router
+        app.include_router(artifact_router(artifact_store))
+
+    # With STREAMING_PAGE=TRUE, the page code_writer_agent is still writing can be
+    # followed at /previews/<invocation id>
+    from utils.page_stream import get_page_streamer, page_preview_router
+    page_streamer = get_page_streamer()
+    if page_streamer is not None:
+        app.include_router(page_preview_router(page_streamer))
+
+    return app
+
+
+async def warm_up_agents():
+    """Builds the lazy pipeline stages now, so a broken stage (e.g. a missing prompt) fails at startup"""
+    from utils.lazy_agent import build_lazy_agents
+
+    # Imported under the same name ADK's agent loader uses, so these are the stages it will run
+    agents_dir = os.path.join(AGENT_DIR, "agents")
+    if agents_dir not in sys.path:
+        sys.path.insert(0, agents_dir)
+    module = await asyncio.to_thread(importlib.import_module, "root_website_builder.agent")
+    await build_lazy_agents(module.root_agent)
+
+
+# Deferred startup (DEFERRED_STARTUP=TRUE): uvicorn starts listening right away and the
+# ADK app is built in the background, then every pipeline stage is built once;
+# requests that arrive before that is done wait for it.
+# Otherwise the app is built here, before uvicorn binds (the classic behaviour).
+if os.environ.get("DEFERRED_STARTUP", "FALSE").upper() == "TRUE":
+    app = DeferredApp(create_app, warm_up=warm_up_agents)
+else:
+    app = create_app()
 
 # =============================================================================
 # CUSTOM ROUTE EXTENSIONS (OPTIONAL)
@@ -92,7 +144,7 @@ app = get_fast_api_app(
 # This allows extending the application with additional functionality
 # beyond what ADK provides out of the box
 
-# Example custom route:
+# Example custom route (with DEFERRED_STARTUP, add routes inside create_app()):
 # @app.get("/health")
 # async def health_check():
 #     """Health check endpoint for monitoring"""
@@ -0,0 +1,5 @@
+# Lets the tests import the project's packages (utils, tools, agents) however pytest is started.
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.artifact_routes import artifact_router
+from utils.artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_ADMIN_TOKEN", "secret")
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    app = FastAPI()
+    app.include_router(artifact_router(store))
+    client = TestClient(app)
+    client.pages = [store.save("<html><script>alert(1)</script></html>", session_id="s1", topic="alerts"),
+                    store.save("<html>other</html>", session_id="s2", topic="other alerts")]
+    return client
+
+
+def test_pages_are_sandboxed(client):
+    response = client.get(f"/artifacts/{client.pages[0].id}")
+    assert response.status_code == 200
+    assert response.headers["content-security-policy"].startswith("sandbox")
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_listing_and_search_stay_in_the_session(client):
+    assert client.get("/artifacts").status_code == 403
+    listed = client.get("/artifacts", params={"session": "s1"}).json()["artifacts"]
+    assert [artifact["id"] for artifact in listed] == [client.pages[0].id]
+    found = client.get("/artifacts", params={"session": "s1", "q": "alerts"}).json()["artifacts"]
+    assert [artifact["id"] for artifact in found] == [client.pages[0].id]
+    everything = client.get("/artifacts", headers={"Authorization": "Bearer secret"}).json()["artifacts"]
+    assert len(everything) == 2
+
+
+def test_record_hides_the_session(client):
+    record = client.get(f"/artifacts/{client.pages[0].id}/meta").json()
+    assert "session_id" not in record and "user_id" not in record
+    assert client.get("/artifacts/unknown/meta").status_code == 404
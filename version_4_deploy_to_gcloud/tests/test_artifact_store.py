@@ -0,0 +1,31 @@
+import asyncio
+
+from utils.artifact_store import ArtifactStore
+from utils.output_writer import OutputWriter
+
+
+def test_identical_pages_share_one_blob(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    first = store.save("<html><body>Solar system</body></html>", session_id="s1")
+    second = store.save("<html><body>Solar system</body></html>", session_id="s2")
+    assert first.sha256 == second.sha256 and first.id != second.id
+    assert not first.deduplicated and second.deduplicated
+    assert store.stats()["blobs"] == 1
+    assert [artifact.id for artifact in store.list_artifacts("s2")] == [second.id]
+
+
+def test_search_takes_wildcards_literally(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    store.save("<html>1</html>", topic="100% renewable energy", name="energy_page.html")
+    store.save("<html>2</html>", topic="1000 renewable energy", name="energyXpage.html")
+    assert [artifact.topic for artifact in store.search("100%")] == ["100% renewable energy"]
+    assert [artifact.name for artifact in store.search("energy_page")] == ["energy_page.html"]
+    assert len(store.search("renewable")) == 2
+
+
+def test_save_async_runs_in_the_given_executor(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    writer = OutputWriter(str(tmp_path / "output"), threads=1)
+    artifact = asyncio.run(store.save_async("<html></html>", executor=writer.executor, topic="empty"))
+    writer.close()
+    assert store.get(artifact.id).topic == "empty"
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from utils.deferred_app import DeferredApp
+
+
+async def hello_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"hello"})
+
+
+async def request(app) -> list:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "path": "/"}, receive, send)
+    return sent
+
+
+def test_warm_up_runs_before_the_first_request():
+    warmed = []
+
+    async def warm_up():
+        await asyncio.sleep(0.01)
+        warmed.append(True)
+
+    sent = asyncio.run(request(DeferredApp(lambda: hello_app, warm_up=warm_up)))
+    assert warmed == [True]
+    assert sent[-1]["body"] == b"hello"
+
+
+def test_failed_warm_up_fails_the_build_and_is_retried():
+    attempts = []
+
+    async def warm_up():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise FileNotFoundError("agents/designer/instruction.txt")
+
+    async def scenario():
+        app = DeferredApp(lambda: hello_app, warm_up=warm_up)
+        with pytest.raises(FileNotFoundError):
+            await request(app)
+        return await request(app)
+
+    sent = asyncio.run(scenario())
+    assert len(attempts) == 2
+    assert sent[-1]["body"] == b"hello"
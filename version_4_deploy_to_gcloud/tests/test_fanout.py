@@ -0,0 +1,109 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.agents import BaseAgent
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from utils.checkpoints import StageCheckpointer
+from utils.fanout import DynamicFanOutAgent, parse_numbered_list
+
+
+class StubResearcher(BaseAgent):
+    """Answers with the item it was given, after `delay_s` seconds (`hedge_delay_s` on a hedge branch)."""
+
+    output_key: str
+    item_key: str
+    # What StageCheckpointer fingerprints on an LlmAgent.
+    model: str = "stub-model"
+    instruction: str = "Research {item}"
+    tools: list = []
+    delay_s: float = 0.0
+    hedge_delay_s: Optional[float] = None
+
+    async def _run_async_impl(self, ctx):
+        on_hedge_branch = (ctx.branch or "").endswith(".hedge")
+        await asyncio.sleep(self.hedge_delay_s if on_hedge_branch and self.hedge_delay_s is not None else self.delay_s)
+        answer = f"{self.name} researched: {ctx.session.state.get(self.item_key)!r}"
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(text=answer)]),
+                    actions=EventActions(state_delta={self.output_key: answer}))
+
+
+def make_researchers(count: int, delays: dict = None) -> list:
+    return [StubResearcher(name=f"Researcher{n}", output_key=f"output_{n}", item_key=f"item_{n}",
+                           delay_s=(delays or {}).get(n, 0.0)) for n in range(1, count + 1)]
+
+
+def run(agent: BaseAgent, state: dict) -> tuple[list, dict]:
+    async def scenario():
+        runner = InMemoryRunner(agent=agent, app_name="fanout_test")
+        session = await runner.session_service.create_session(app_name="fanout_test", user_id="user", state=state)
+        events = [event async for event in runner.run_async(
+            user_id="user", session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text="go")]))]
+        session = await runner.session_service.get_session(app_name="fanout_test", user_id="user", session_id=session.id)
+        return events, session.state
+
+    return asyncio.run(scenario())
+
+
+def test_parse_numbered_list():
+    assert parse_numbered_list("Intro\n1. What is X?\n2) Why Y?\n- Question 3: How Z?") == [
+        "What is X?", "Why Y?", "How Z?"]
+
+
+def test_items_left_by_a_previous_turn_are_never_researched():
+    agent = DynamicFanOutAgent(name="fanout", sub_agents=make_researchers(4), items_state_key="questions",
+                               item_state_key_template="item_{n}", min_agents=2)
+    _, state = run(agent, {
+        "questions": "1. Only question",
+        # Left over from an earlier turn with more questions
+        "item_2": "stale 2", "item_3": "stale 3", "item_4": "stale 4",
+    })
+    assert state["fanout_count"] == 2
+    assert state["item_1"] == "Only question"
+    assert state["item_2"] == state["item_3"] == state["item_4"] == ""
+    assert state["output_2"] == "Researcher2 researched: ''"
+    assert "output_3" not in state
+
+
+def test_a_winning_hedge_does_not_share_keys_with_the_slow_original():
+    researchers = make_researchers(2)
+    # Researcher1 is slow; its hedge is fast.
+    researchers[0].delay_s, researchers[0].hedge_delay_s = 2.0, 0.01
+    agent = DynamicFanOutAgent(name="fanout", sub_agents=researchers, items_state_key="questions",
+                               item_state_key_template="item_{n}", hedge_percentile=95,
+                               hedge_initial_delay_s=0.05)
+    events, state = run(agent, {"questions": "1. Slow question\n2. Fast question"})
+
+    assert agent.metrics.hedges_fired == 1 and agent.metrics.hedge_wins == 1
+    # The hedge ran under its own name and answered under its private key ...
+    authors = {event.author for event in events}
+    assert "Researcher1_hedge" in authors
+    assert state["output_1_hedge"] == "Researcher1_hedge researched: 'Slow question'"
+    # ... and its answer was copied to the original key; the cancelled original wrote nothing.
+    assert state["output_1"] == state["output_1_hedge"]
+    assert not any(event.author == "Researcher1" and event.actions.state_delta for event in events)
+    assert state["output_2"] == "Researcher2 researched: 'Fast question'"
+
+
+def test_a_hedge_wins_when_the_stages_are_checkpointed(tmp_path):
+    researchers = make_researchers(2)
+    researchers[0].delay_s, researchers[0].hedge_delay_s = 2.0, 0.01
+    agent = DynamicFanOutAgent(name="fanout", sub_agents=researchers, items_state_key="questions",
+                               item_state_key_template="item_{n}", hedge_percentile=95,
+                               hedge_initial_delay_s=0.05)
+    # The hedge copy inherits the checkpoint callbacks, which look stages up by name.
+    checkpointer = StageCheckpointer(str(tmp_path))
+    checkpointer.instrument(agent)
+    _, state = run(agent, {"questions": "1. Slow question\n2. Fast question"})
+
+    assert agent.metrics.hedge_wins == 1
+    assert state["output_1"] == "Researcher1_hedge researched: 'Slow question'"
+    assert checkpointer.saved == {"Researcher2": 1}
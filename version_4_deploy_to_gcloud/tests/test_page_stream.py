@@ -0,0 +1,36 @@
+import asyncio
+
+from utils.output_writer import OutputWriter
+from utils.page_stream import PageStreamer
+
+PAGE = "<!DOCTYPE html>\n<html><head><title>Solar system</title></head><body>" + "<p>Planets</p>" * 50 + "</body></html>\n"
+
+
+async def read_preview(streamer: PageStreamer, final_page: str) -> bytes:
+    """Streams half the page, then saves `final_page` while a reader follows the preview."""
+    await streamer.on_text("run", "code_writer_agent", "Here it is:\n```html\n" + PAGE[:len(PAGE) // 2])
+    received = []
+
+    async def reader():
+        async for chunk in streamer.follow("run", poll_s=0.01):
+            received.append(chunk)
+
+    task = asyncio.create_task(reader())
+    await asyncio.sleep(0.05)
+    path = await streamer.writer.write_async("final.html", final_page)
+    await streamer.finish("run", path.as_posix())
+    await asyncio.wait_for(task, 1)
+    return b"".join(received)
+
+
+def test_reader_gets_the_rest_of_the_final_page(tmp_path):
+    streamer = PageStreamer(OutputWriter(str(tmp_path)))
+    received = asyncio.run(read_preview(streamer, PAGE))
+    assert received == PAGE.encode()
+
+
+def test_reader_stops_when_the_final_page_differs(tmp_path):
+    streamer = PageStreamer(OutputWriter(str(tmp_path)))
+    other = PAGE.replace("Solar system", "Moons")
+    received = asyncio.run(read_preview(streamer, other))
+    assert received == PAGE[:len(PAGE) // 2].encode()
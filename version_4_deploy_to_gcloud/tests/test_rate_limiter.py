@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+
+from utils import rate_limiter
+from utils.rate_limiter import Permit, RateLimitedLlm, RateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def make_gate(limit: float = 4.0):
+    limiter = RateLimiter({"*": {"rpm": 1000, "tpm": 1_000_000, "max_concurrency": 16}})
+    gate = limiter._gate("gemini-2.5-flash-lite")
+    gate.limit = limit
+    return limiter, gate
+
+
+def finish(limiter, gate, clock, latency_s: float, output_tokens=None, throttled=False):
+    """One call that took `latency_s` on the fake clock."""
+    gate.in_flight += 1
+    permit = Permit(limiter, gate, reserved_tokens=1000)
+    clock.now += latency_s
+    permit.done(used_tokens=1000, output_tokens=output_tokens, throttled=throttled)
+
+
+def test_cancelled_permit_does_not_feed_the_controller(clock):
+    limiter, gate = make_gate()
+    gate.in_flight = 1
+    permit = Permit(limiter, gate, reserved_tokens=500)
+    clock.now += 0.001
+    permit.cancel(used_tokens=0)
+    assert gate.in_flight == 0
+    assert gate.limit == 4.0
+    assert gate.best_s_per_token is None
+    assert gate.stats.throttled == 0
+
+
+def test_short_calls_do_not_shrink_the_limit_for_long_generations(clock):
+    limiter, gate = make_gate()
+    for _ in range(5):
+        finish(limiter, gate, clock, 0.3, output_tokens=12)     # too short to be a latency sample
+        finish(limiter, gate, clock, 0.8, output_tokens=200)    # 4 ms per token
+    limit = gate.limit
+    finish(limiter, gate, clock, 40.0, output_tokens=8000)      # a long page, 5 ms per token
+    assert gate.limit > limit
+
+
+def test_slower_generation_shrinks_the_limit(clock):
+    limiter, gate = make_gate()
+    finish(limiter, gate, clock, 0.8, output_tokens=200)        # 4 ms per token
+    limit = gate.limit
+    finish(limiter, gate, clock, 10.0, output_tokens=400)       # 25 ms per token
+    assert gate.limit == pytest.approx(limit * 0.9)
+
+
+def test_one_fast_call_does_not_stay_the_baseline(clock):
+    limiter, gate = make_gate()
+    finish(limiter, gate, clock, 0.1, output_tokens=200)        # 0.5 ms per token, a fluke
+    for _ in range(60):
+        finish(limiter, gate, clock, 8.0, output_tokens=2000)   # 4 ms per token
+    limit = gate.limit
+    finish(limiter, gate, clock, 8.0, output_tokens=2000)
+    assert gate.limit > limit
+
+
+def test_throttled_call_halves_the_limit_and_pauses(clock):
+    limiter, gate = make_gate(limit=8.0)
+    finish(limiter, gate, clock, 1.0, throttled=True)
+    assert gate.limit == 4.0
+    assert gate.stats.throttled == 1
+    assert gate.paused_until >= clock.now + 1.5
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+class AlwaysThrottled(BaseLlm):
+    async def generate_content_async(self, llm_request, stream=False):
+        raise QuotaError("RESOURCE_EXHAUSTED")
+        yield
+
+
+def test_429_on_the_last_attempt_is_recorded_as_throttled():
+    limiter, gate = make_gate(limit=8.0)
+    llm = RateLimitedLlm(model="gemini-2.5-flash-lite", inner=AlwaysThrottled(model="gemini-2.5-flash-lite"),
+                         limiter=limiter, max_retries=0)
+
+    async def scenario():
+        async for _ in llm.generate_content_async(LlmRequest()):
+            pass
+
+    with pytest.raises(QuotaError):
+        asyncio.run(scenario())
+    assert gate.stats.throttled == 1
+    assert gate.limit == 4.0
+    assert gate.in_flight == 0
@@ -0,0 +1,58 @@
+import asyncio
+
+from utils.search_cache import SearchCache
+
+
+def make_backend(calls: list, latency_s: float = 0.05):
+    async def backend(query: str) -> dict:
+        calls.append(query)
+        await asyncio.sleep(latency_s)
+        return {"query": query, "answer": f"answer {len(calls)}"}
+    return backend
+
+
+def test_identical_searches_are_coalesced():
+    async def scenario():
+        calls = []
+        cache = SearchCache(make_backend(calls))
+        results = await asyncio.gather(*(cache.search("What is AI?", "run") for _ in range(5)))
+        return calls, results, cache.run_report("run")
+
+    calls, results, report = asyncio.run(scenario())
+    assert calls == ["What is AI?"]
+    assert all(result == results[0] for result in results)
+    assert report["backend_calls"] == 1 and report["coalesced"] == 4
+
+
+def test_cancelled_owner_does_not_cancel_waiters():
+    async def scenario():
+        calls = []
+        cache = SearchCache(make_backend(calls))
+        owner = asyncio.create_task(cache.search("solar system", "owner"))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.search("solar system", "waiter")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        return calls, results, owner, cache
+
+    calls, results, owner, cache = asyncio.run(scenario())
+    assert owner.cancelled()
+    # One waiter searched again; the others waited for it.
+    assert len(calls) == 2
+    assert all(result == results[0] for result in results)
+    assert cache.run_report("waiter")["backend_calls"] == 1
+    assert cache._in_flight == {}
+
+
+def test_backend_errors_reach_the_waiters():
+    async def scenario():
+        async def failing(query: str) -> dict:
+            await asyncio.sleep(0.02)
+            raise RuntimeError("quota")
+
+        cache = SearchCache(failing)
+        return await asyncio.gather(*(cache.search("q") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from utils.truncation import PageRecovery, find_truncation, stitch
+
+PAGE = ("<!DOCTYPE html>\n<html><head><title>Solar system</title></head><body>\n"
+        + "".join(f"<section><h2>Planet {number}</h2><p>Planet {number} orbits the sun.</p></section>\n"
+                  for number in range(20))
+        + "</body></html>\n")
+
+
+def test_complete_pages_and_fragments_are_not_truncated():
+    assert find_truncation(PAGE) is None
+    assert find_truncation("<section><p>Only a fragment") is None
+
+
+def test_cut_inside_a_tag_drops_the_unfinished_tag():
+    cut = PAGE.index("<p>", 200) + 2
+    truncation = find_truncation(PAGE[:cut])
+    assert truncation.reason == "cut inside a tag"
+    assert truncation.kept == PAGE[:cut - 2]
+    assert truncation.open_elements == ["html", "body", "section"]
+
+
+def test_cut_inside_a_comment_drops_the_comment():
+    cut = PAGE.index("<section>", 200)
+    truncation = find_truncation(PAGE[:cut] + "<!-- next sect")
+    assert truncation.reason == "cut inside a comment"
+    assert truncation.kept == PAGE[:cut]
+
+
+def test_short_repeat_of_a_word_cut_in_half_is_dropped():
+    assert stitch("<p>The sola", "The solar system</p>") == "<p>The solar system</p>"
+
+
+def test_short_repeat_of_a_whole_element_is_dropped():
+    assert stitch("<ul><li>One</li>", "<li>One</li><li>Two</li></ul>") == "<ul><li>One</li><li>Two</li></ul>"
+
+
+def test_short_chance_matches_are_kept():
+    # Closing tags may simply be the next ones to close.
+    assert stitch("<div><p>x</p></div>", "</div></html>") == "<div><p>x</p></div></div></html>"
+    # The end of a word is not a repeat of it.
+    assert stitch("<p>Recommendation", "mendations follow</p>") == "<p>Recommendationmendations follow</p>"
+
+
+def test_long_repeat_and_fences_are_dropped():
+    cut = len(PAGE) // 2
+    continuation = "```html\n" + PAGE[cut - 200:] + "```"
+    assert stitch(PAGE[:cut], continuation) == PAGE
+
+
+def test_whole_new_document_replaces_the_cut_page():
+    assert stitch(PAGE[:100], PAGE) == PAGE
+
+
+def test_recoveries_are_capped():
+    recovery = PageRecovery(keep_recoveries=2)
+    for number in range(3):
+        recovery.check(f"run-{number}", PAGE[:len(PAGE) // 2])
+        recovery.resume(f"run-{number}", PAGE[len(PAGE) // 2:])
+    assert len(recovery.recoveries) == 2
+
+
+def test_a_cut_page_the_agent_never_completes_is_dropped():
+    recovery = PageRecovery()
+    assert recovery.check("run", PAGE[:len(PAGE) // 2]).request
+    recovery.after_agent(SimpleNamespace(invocation_id="run", agent_name="code_writer_agent"))
+    assert recovery.resume("run", PAGE[len(PAGE) // 2:]) is None
+    assert recovery.report()["abandoned"] == 1
+
+
+def test_held_pages_are_capped():
+    recovery = PageRecovery(max_pending=2)
+    for number in range(3):
+        recovery.check(f"run-{number}", PAGE[:len(PAGE) // 2])
+    assert recovery.resume("run-0", PAGE[len(PAGE) // 2:]) is None
+    assert recovery.resume("run-2", PAGE[len(PAGE) // 2:]).page == PAGE
@@ -2,22 +2,84 @@
 # FILE: file_writer_tool.py
 # PURPOSE:
 #   This module defines a single tool function, `write_to_file`, which saves
-#   the provided HTML/CSS/JS content to a timestamped HTML file inside an
+#   the provided HTML/CSS/JS content to a uniquely named HTML file inside an
 #   output directory. This is used by agents to persist generated webpage content.
+#
+#   The write itself is done by utils/output_writer.py: the file name carries
+#   the run's invocation id and a random suffix (so concurrent sessions never overwrite
+#   each other), the file appears atomically, and the disk I/O runs in a thread
+#   pool instead of on the server's event loop.
+#
+#   With ARTIFACT_STORE set, the page goes into the content-addressed artifact
+#   store (utils/artifact_store.py) instead, together with the session, topic,
+#   model and run time; identical pages are stored once.
+#
+#   A page that was cut off (no closing </html>) is not saved: the agent is
+#   asked for the rest, which it sends with `continue_page`, and the pieces
+#   are stitched together (utils/truncation.py, PAGE_CONTINUATIONS).
 # =============================================================================
 
-# Import the `datetime` module to generate a unique timestamp for the filename.
-import datetime
+import time
+
+# ToolContext gives the tool the run (invocation) it belongs to (used in the file name).
+from google.adk.tools import ToolContext
+
+# The shared writer for the output folder (OUTPUT_DIR, default "output").
+from utils.output_writer import get_output_writer
+
+# The optional artifact store (ARTIFACT_STORE).
+from utils.artifact_store import get_artifact_store
+
+# The optional page streamer (STREAMING_PAGE=TRUE); its preview is finished once the page is saved.
+from utils.page_stream import get_page_streamer
+
+# The check for cut-off pages and their continuation (None if PAGE_CONTINUATIONS=0).
+from utils.truncation import PageCheck, get_page_recovery
+
+# One writer (and thread pool) for the whole process, shared with the page streamer.
+output_writer = get_output_writer()
+
+# One artifact store for the whole process (None unless ARTIFACT_STORE is set).
+artifact_store = get_artifact_store()
+
+# One holder of cut-off pages for the whole process (shared with code_writer_agent's callback).
+page_recovery = get_page_recovery()
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: artifact_metadata
+# -----------------------------------------------------------------------------
+def artifact_metadata(tool_context: ToolContext) -> dict:
+    """Session, user, topic, model and run time of the run that wrote the page."""
+    invocation = tool_context._invocation_context
+    session = invocation.session
+    user_content = tool_context.user_content
+    topic = " ".join(part.text for part in user_content.parts or [] if part.text) if user_content else ""
+    model = getattr(invocation.agent, "model", "")
+    # The run started with the first event of this invocation (the user's message).
+    started = next((event.timestamp for event in session.events if event.invocation_id == tool_context.invocation_id), None)
+    return {
+        "session_id": session.id,
+        "user_id": session.user_id,
+        "topic": topic.strip(),
+        "model": model if isinstance(model, str) else getattr(model, "model", type(model).__name__),
+        "timings": {"run_s": round(time.time() - started, 3)} if started else {},
+    }
+
+
+async def finish_preview(tool_context: ToolContext, final_path: str) -> None:
+    """Tells the page streamer (if on) that the run's page is saved, so its preview is removed."""
+    page_streamer = get_page_streamer()
+    if page_streamer is not None:
+        await page_streamer.finish(tool_context.invocation_id, final_path)
 
-# Import `Path` from `pathlib` for convenient and safe file/directory handling.
-from pathlib import Path
 
 # -----------------------------------------------------------------------------
 # TOOL FUNCTION: write_to_file
 # -----------------------------------------------------------------------------
-def write_to_file(content: str) -> dict:
+async def write_to_file(content: str, tool_context: ToolContext) -> dict:
     """
-    Writes the given HTML/CSS/JS content to a timestamped HTML file.
+    Writes the given HTML/CSS/JS content to a new HTML file.
 
     Args:
         content (str): Full HTML content as a string to be saved to disk.
@@ -25,25 +87,75 @@ def write_to_file(content: str) -> dict:
     Returns:
         dict: A dictionary containing the status and generated filename.
     """
+    if page_recovery is None:
+        return await save_page(content, tool_context)
+    return await save_checked(page_recovery.check(tool_context.invocation_id, content), tool_context)
 
-    # Get the current date and time, format it as YYMMDD_HHMMSS.
-    # Example: "250611_142317"
-    timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
 
-    # Construct the output filename using the timestamp.
-    # Example: "output/250611_142317_generated_page.html"
-    filename = f"output/{timestamp}_generated_page.html"
+# -----------------------------------------------------------------------------
+# TOOL FUNCTION: continue_page
+# -----------------------------------------------------------------------------
+async def continue_page(content: str, tool_context: ToolContext) -> dict:
+    """
+    Adds the rest of a page that write_to_file reported as cut off, and saves
+    the page once it is complete.
+
+    Args:
+        content (str): Only the missing end of the page, starting where the cut page stops.
+
+    Returns:
+        dict: The same result as write_to_file, or a request for the next part.
+    """
+    check = page_recovery.resume(tool_context.invocation_id, content) if page_recovery is not None else None
+    if check is None:
+        return {"status": "error", "message": "There is no cut-off page to continue. Call write_to_file with the complete page."}
+    return await save_checked(check, tool_context)
+
+
+async def save_checked(check: PageCheck, tool_context: ToolContext) -> dict:
+    """Saves a checked page, or returns the request for the rest of a cut page."""
+    if check.request:
+        return {"status": "incomplete", "kept_chars": len(check.page), "message": check.request}
+    result = await save_page(check.page, tool_context)
+    if check.recovery:
+        result["recovery"] = check.recovery
+    if check.incomplete:
+        result["warning"] = f"The page is still cut off ({check.incomplete}); it was saved as it is."
+    return result
+
+
+async def save_page(content: str, tool_context: ToolContext) -> dict:
+    """
+    Saves a page to the artifact store or the output folder. `tool_context`
+    may also be an agent callback's context (the page streamer saves a page
+    the model did not hand to write_to_file).
+    """
+    # With the artifact store, save the page there (once per distinct content).
+    if artifact_store is not None:
+        # In the writer's thread pool, like the writes to the output folder
+        artifact = await artifact_store.save_async(content, executor=output_writer.executor,
+                                                   name="generated_page.html", **artifact_metadata(tool_context))
+        await finish_preview(tool_context, artifact_store.blob_path(artifact.sha256).as_posix())
+        return {
+            "status": "success",
+            "file": artifact_store.blob_path(artifact.sha256).as_posix(),
+            "artifact_id": artifact.id,
+            # Where main.py serves the page (GET /artifacts/<id>)
+            "url": f"/artifacts/{artifact.id}",
+            "sha256": artifact.sha256,
+            "deduplicated": artifact.deduplicated,
+        }
 
-    # Ensure the "output" directory exists. If it doesn’t, create it.
-    # `exist_ok=True` prevents an error if the directory already exists.
-    Path("output").mkdir(exist_ok=True)
+    # Build a name no other write can produce, e.g.
+    # "250611_142317_123456_3f2a9c1e_b7d04e5a_generated_page.html"
+    name = output_writer.unique_name(run_id=tool_context.invocation_id)
 
-    # Write the HTML content to the constructed file.
-    # `encoding='utf-8'` ensures proper character encoding.
-    Path(filename).write_text(content, encoding="utf-8")
+    # Write to a temporary file and rename it into place, in the writer's thread pool.
+    path = await output_writer.write_async(name, content)
+    await finish_preview(tool_context, path.as_posix())
 
     # Return a dictionary indicating success, and the filename that was written.
     return {
         "status": "success",
-        "file": filename
-    }
\ No newline at end of file
+        "file": path.as_posix()
+    }
@@ -0,0 +1,78 @@
+# =============================================================================
+# FILE: search_tool.py
+# PURPOSE:
+#   Chooses the search tool for the research agents.
+#
+#   By default this is ADK's built-in `google_search`. That search runs inside
+#   Gemini's model call, so nothing on our side can see or reuse its results.
+#   With SEARCH_CACHE set, the agents get `web_search` instead: a function tool
+#   that runs each (normalized) query once through utils/search_cache.py and
+#   shares the result with every agent of the run and with later runs.
+#
+#   Switching it on:
+#       SEARCH_CACHE=cache/searches.sqlite   -> memory + SQLite (shared between runs)
+#       SEARCH_CACHE=memory                  -> memory only
+#       SEARCH_CACHE_TTL_HOURS=24            -> how long results stay fresh
+# =============================================================================
+
+import logging
+from typing import Any, Optional
+
+from google.adk.tools import ToolContext, google_search
+
+from utils.agent_hooks import add_callback
+from utils.fake_llm import fake_llm_enabled
+from utils.search_cache import fake_search_backend, gemini_search_backend, search_cache_from_env
+
+logger = logging.getLogger(__name__)
+
+# One cache for the whole process, shared by every agent that searches.
+search_cache = search_cache_from_env(fake_search_backend if fake_llm_enabled() else gemini_search_backend)
+
+
+# -----------------------------------------------------------------------------
+# TOOL FUNCTION: web_search
+# -----------------------------------------------------------------------------
+async def web_search(query: str, tool_context: ToolContext) -> dict:
+    """
+    Searches the web with Google Search and returns a short answer with its sources.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        dict: The query, a summary answer, the source pages (title and url)
+              and the search queries that were run.
+    """
+    return await search_cache.search(query, run_id=tool_context.invocation_id)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_search_tool
+# -----------------------------------------------------------------------------
+def get_search_tool() -> Any:
+    """Returns the cached `web_search` tool if SEARCH_CACHE is set, else `google_search`."""
+    return web_search if search_cache is not None else google_search
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: attach_search_report
+# -----------------------------------------------------------------------------
+def attach_search_report(root_agent: Any) -> Any:
+    """
+    Logs a search report when `root_agent` finishes a run and stores it in
+    the session state under "search_report".
+    """
+    if search_cache is None:
+        return root_agent
+
+    def report_searches(callback_context) -> Optional[Any]:
+        report = search_cache.pop_run_report(callback_context.invocation_id)
+        callback_context.state["search_report"] = report
+        logger.info("Search cache: %s searches, %s saved (%s cached, %s coalesced), %s sent to the backend in %ss",
+                    report["requested"], report["saved"], report["cache_hits"], report["coalesced"],
+                    report["backend_calls"], report["backend_time_s"])
+        return None
+
+    add_callback(root_agent, "after_agent_callback", report_searches)
+    return root_agent
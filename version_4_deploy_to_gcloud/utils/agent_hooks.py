@@ -0,0 +1,133 @@
+# =============================================================================
+# FILE: agent_hooks.py
+# PURPOSE:
+#   Small helpers for attaching ADK callbacks to a whole tree of agents.
+#
+#   Features such as tracing or caching need the same callback on every agent
+#   of the pipeline (the root SequentialAgent, the ParallelAgent and all the
+#   LlmAgents inside them). These helpers walk the agent tree and add a
+#   callback next to any callbacks the agent already has, instead of
+#   replacing them.
+#
+#   Stages that are built lazily (utils/lazy_agent.py) are not in the tree
+#   yet when a feature is switched on; `for_each_agent` reaches them once
+#   they are built.
+# =============================================================================
+
+import re
+from typing import Any, Callable, Iterator
+
+# State references in instructions: ADK placeholders ({designer_output}, or
+# {designer_output?} when optional) and the
+# literal state['designer_output'] form used by most instruction files.
+_STATE_REFERENCE_PATTERN = re.compile(r"\{(\w+)\??\}|state\['(\w+)'\]")
+
+# ADK tells every model its agent's name in the system instruction.
+_AGENT_NAME_PATTERN = re.compile(r'Your internal name is "([^"]+)"')
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: iter_agents
+# -----------------------------------------------------------------------------
+def iter_agents(root_agent: Any) -> Iterator[Any]:
+    """
+    Yields the root agent and every sub-agent below it (depth first).
+
+    Args:
+        root_agent: Any ADK agent (BaseAgent subclass).
+    """
+    yield root_agent
+    for sub_agent in root_agent.sub_agents:
+        yield from iter_agents(sub_agent)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: for_each_agent
+# -----------------------------------------------------------------------------
+def for_each_agent(root_agent: Any, function: Callable[[Any], Any]) -> None:
+    """
+    Calls `function(agent)` for the root agent and every sub-agent below it,
+    including lazily built stages: those get the call once they are built.
+    The lazy stand-ins themselves are skipped.
+
+    Args:
+        root_agent: Any ADK agent (BaseAgent subclass).
+        function (Callable): Called once per agent.
+    """
+    for agent in iter_agents(root_agent):
+        when_built = getattr(agent, "when_built", None)
+        if when_built is not None:
+            when_built(lambda built_agent: for_each_agent(built_agent, function))
+        else:
+            function(agent)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: add_callback
+# -----------------------------------------------------------------------------
+def add_callback(agent: Any, field_name: str, callback: Callable, first: bool = False) -> bool:
+    """
+    Adds `callback` to one of the agent's callback fields, keeping the
+    callbacks that are already there.
+
+    ADK runs a list of callbacks in order and stops at the first one that
+    returns a value, so observers that must always run (like tracing) should
+    use `first=True`.
+
+    Args:
+        agent: The agent to modify.
+        field_name (str): e.g. "before_agent_callback" or "after_model_callback".
+        callback (Callable): The function to add.
+        first (bool): Put the callback in front of the existing ones.
+
+    Returns:
+        bool: False if this kind of agent has no such callback field
+              (e.g. model callbacks on a SequentialAgent).
+    """
+    if field_name not in type(agent).model_fields:
+        return False
+
+    existing = getattr(agent, field_name)
+    if existing is None:
+        callbacks = []
+    elif isinstance(existing, list):
+        callbacks = list(existing)
+    else:
+        callbacks = [existing]
+
+    if first:
+        callbacks.insert(0, callback)
+    else:
+        callbacks.append(callback)
+    setattr(agent, field_name, callbacks)
+    return True
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: referenced_state_keys
+# -----------------------------------------------------------------------------
+def referenced_state_keys(agent: Any) -> list[str]:
+    """
+    Returns the session-state keys the agent's instruction refers to, e.g.
+    ["designer_output", "requirements_writer_output"] for the code writer.
+    Instructions given as functions are not inspected.
+    """
+    instruction = getattr(agent, "instruction", None)
+    if not isinstance(instruction, str):
+        return []
+    return sorted({a or b for a, b in _STATE_REFERENCE_PATTERN.findall(instruction)})
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: request_agent_name
+# -----------------------------------------------------------------------------
+def request_agent_name(llm_request: Any, default: str = "agent") -> str:
+    """
+    Returns the name of the agent that built `llm_request` (read from the
+    system instruction, where ADK puts it), for code that only sees the
+    model request, such as a model wrapper.
+    """
+    config = getattr(llm_request, "config", None)
+    instruction = config.system_instruction if config else None
+    match = _AGENT_NAME_PATTERN.search(instruction) if isinstance(instruction, str) else None
+    return match.group(1) if match else default
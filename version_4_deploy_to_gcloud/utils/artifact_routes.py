@@ -0,0 +1,264 @@
+# =============================================================================
+# FILE: artifact_routes.py
+# PURPOSE:
+#   HTTP routes that serve the pages in the artifact store
+#   (utils/artifact_store.py) from the same FastAPI app as the agents:
+#
+#       GET /artifacts                      newest artifacts of a session (?session=, ?q=, ?before=, ?limit=)
+#       GET /artifacts/{artifact_id}/meta   the index record as JSON
+#       GET /artifacts/{artifact_id}        the page (HEAD works too)
+#
+#   Who may see what:
+#     - listing and searching need the session (?session=<session id>) and
+#       only return that session's pages; with ARTIFACT_ADMIN_TOKEN set, a
+#       request with "Authorization: Bearer <token>" may list everything;
+#     - the record of a page leaves out the session and user ids unless the
+#       request carries the admin token, so a shared page link does not lead
+#       to the other pages of its session;
+#     - a page is served with "Content-Security-Policy: sandbox allow-scripts"
+#       and "X-Content-Type-Options: nosniff": the generated HTML (model
+#       output) runs in an opaque origin, so its scripts cannot read the
+#       app's cookies or storage or call the agent API as the user.
+#
+#   A page never changes once it is saved (its id points to a content hash),
+#   so the page route
+#     - sends a strong ETag (the content hash, one per encoding) and answers
+#       If-None-Match with 304 Not Modified;
+#     - marks the response as cacheable forever (`immutable`);
+#     - picks the precompressed brotli or gzip variant written at save time
+#       according to Accept-Encoding (no compression per request);
+#     - answers single byte ranges (Range / If-Range) with 206, or 416 when
+#       the range is outside the page;
+#     - sends small pages from an in-memory LRU (the bytes object goes to the
+#       server as it is, with no copy in Python) and larger ones with
+#       FileResponse, which hands the path to the server when it supports the
+#       ASGI pathsend extension (a sendfile-style transfer).
+#
+#   Configuration:
+#       ARTIFACT_MEMORY_BYTES=67108864   -> size of the in-memory LRU (default 64 MB)
+#       ARTIFACT_MEMORY_ITEM_BYTES=2097152 -> larger files are always sent from disk
+#       ARTIFACT_ADMIN_TOKEN=<secret>    -> lets its bearer list all artifacts
+# =============================================================================
+
+import asyncio
+import hmac
+import os
+import re
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from utils.artifact_store import ENCODINGS, Artifact, ArtifactStore
+from utils.response_cache import MemoryTier
+
+# A year: the longest max-age caches are asked to honour.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Sent with every generated page: model-written HTML must not run with the
+# app's origin, and must not be sniffed into another type.
+PAGE_SECURITY_HEADERS = {
+    "content-security-policy": "sandbox allow-scripts",
+    "x-content-type-options": "nosniff",
+}
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: choose_encoding
+# -----------------------------------------------------------------------------
+def choose_encoding(accept_encoding: str, available: dict) -> Optional[str]:
+    """
+    The best precompressed variant the client accepts ("br" before "gzip"),
+    or None for the page itself.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header, e.g. "gzip, br;q=0.8".
+        available (dict): The variants the artifact has ("gzip"/"br" -> size).
+    """
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _etag(artifact: Artifact, encoding: Optional[str]) -> str:
+    # Each encoding is a different sequence of bytes, so it gets its own strong ETag.
+    return f'"{artifact.sha256}-{encoding}"' if encoding else artifact.etag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    The (start, end) byte range (end exclusive) of a single-range header.
+    Returns None for headers it does not handle (several ranges, other units),
+    which are answered with the whole page; raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:                        # "bytes=-500": the last 500 bytes
+        start, end = max(0, size - int(last)), size
+    else:
+        start = int(first)
+        end = min(size, int(last) + 1) if last else size
+    if start >= size or start >= end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+# -----------------------------------------------------------------------------
+# CLASS: ArtifactServer
+# -----------------------------------------------------------------------------
+class ArtifactServer:
+    """Builds the responses for the artifact routes."""
+
+    def __init__(self, store: ArtifactStore, memory_bytes: int = 64 * 1024 * 1024,
+                 memory_item_bytes: int = 2 * 1024 * 1024) -> None:
+        self.store = store
+        self.memory_item_bytes = memory_item_bytes
+        self.memory = MemoryTier(memory_bytes)
+        self._lock = threading.Lock()
+
+    async def _read(self, artifact: Artifact, encoding: Optional[str]) -> Optional[bytes]:
+        """The file's bytes from the memory LRU (loaded on first use), or None for large files."""
+        size = artifact.encodings[encoding] if encoding else artifact.size
+        if size > self.memory_item_bytes:
+            return None
+        key = artifact.sha256 + (ENCODINGS[encoding] if encoding else "")
+        with self._lock:
+            data = self.memory.get(key)
+        if data is None:
+            data = await asyncio.to_thread(self.store.blob_path(artifact.sha256, encoding).read_bytes)
+            with self._lock:
+                self.memory.put(key, data)
+        return data
+
+    async def serve(self, request: Request, artifact: Artifact) -> Response:
+        """The page, a variant of it, a byte range of it, or 304."""
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL, "vary": "Accept-Encoding", "accept-ranges": "bytes",
+                   **PAGE_SECURITY_HEADERS}
+        http_range = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        use_range = http_range is not None and (if_range is None or if_range.strip() == artifact.etag)
+
+        # Ranges are always taken from the page itself, not from a compressed variant.
+        encoding = None if use_range else choose_encoding(request.headers.get("accept-encoding", ""), artifact.encodings)
+        headers["etag"] = _etag(artifact, encoding)
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, headers["etag"]):
+            headers.pop("content-encoding", None)
+            return Response(status_code=304, headers=headers)
+
+        size = artifact.encodings[encoding] if encoding else artifact.size
+        status_code, byte_range = 200, None
+        if use_range:
+            try:
+                byte_range = _parse_range(http_range, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+            if byte_range is not None:
+                status_code = 206
+                headers["content-range"] = f"bytes {byte_range[0]}-{byte_range[1] - 1}/{size}"
+
+        data = await self._read(artifact, encoding)
+        if data is None and byte_range is None:
+            return FileResponse(self.store.blob_path(artifact.sha256, encoding), media_type=artifact.content_type,
+                                headers=headers, stat_result=os.stat(self.store.blob_path(artifact.sha256, encoding)))
+        if byte_range is not None:
+            start, end = byte_range
+            if data is not None:
+                body = data[start:end]
+            else:
+                path = self.store.blob_path(artifact.sha256)
+                body = await asyncio.to_thread(_read_range, path, start, end)
+        else:
+            body = data
+        if request.method == "HEAD":
+            headers["content-length"] = str(len(body))
+            body = b""
+        return Response(content=body, status_code=status_code, media_type=artifact.content_type, headers=headers)
+
+
+def _read_range(path, start: int, end: int) -> bytes:
+    with open(path, "rb") as file:
+        return os.pread(file.fileno(), end - start, start)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: artifact_router
+# -----------------------------------------------------------------------------
+def artifact_router(store: ArtifactStore) -> APIRouter:
+    """The /artifacts routes for `store`, ready for `app.include_router(...)`."""
+    server = ArtifactServer(
+        store,
+        memory_bytes=int(os.environ.get("ARTIFACT_MEMORY_BYTES", str(64 * 1024 * 1024))),
+        memory_item_bytes=int(os.environ.get("ARTIFACT_MEMORY_ITEM_BYTES", str(2 * 1024 * 1024))),
+    )
+    admin_token = os.environ.get("ARTIFACT_ADMIN_TOKEN", "")
+    router = APIRouter(prefix="/artifacts", tags=["artifacts"])
+
+    def is_admin(request: Request) -> bool:
+        authorization = request.headers.get("authorization", "")
+        return bool(admin_token) and hmac.compare_digest(authorization, f"Bearer {admin_token}")
+
+    async def lookup(artifact_id: str) -> Artifact:
+        artifact = await asyncio.to_thread(store.get, artifact_id)
+        if artifact is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        return artifact
+
+    @router.get("")
+    async def list_artifacts(request: Request, session: Optional[str] = None, q: Optional[str] = None,
+                             before: Optional[float] = None, limit: int = 50) -> JSONResponse:
+        if not session and not is_admin(request):
+            raise HTTPException(status_code=403, detail="Pass ?session=<session id> to list its artifacts")
+        limit = max(1, min(limit, 500))
+        if q:
+            artifacts = await asyncio.to_thread(store.search, q, limit, session)
+        else:
+            artifacts = await asyncio.to_thread(store.list_artifacts, session, before, limit)
+        return JSONResponse({"artifacts": [artifact.to_dict() for artifact in artifacts]})
+
+    @router.get("/{artifact_id}/meta")
+    async def artifact_meta(artifact_id: str, request: Request) -> JSONResponse:
+        record = (await lookup(artifact_id)).to_dict()
+        if not is_admin(request):
+            record.pop("session_id")
+            record.pop("user_id")
+        return JSONResponse(record)
+
+    @router.api_route("/{artifact_id}", methods=["GET", "HEAD"])
+    async def artifact_content(artifact_id: str, request: Request) -> Response:
+        return await server.serve(request, await lookup(artifact_id))
+
+    return router
@@ -0,0 +1,351 @@
+# =============================================================================
+# FILE: artifact_store.py
+# PURPOSE:
+#   Content-addressed store for the generated pages.
+#
+#   Without it every page is a loose file in output/: identical pages are
+#   stored again and again, and finding a page means listing the folder.
+#
+#   `ArtifactStore` keeps
+#     - one blob per distinct content, named after its SHA-256:
+#         artifacts/objects/3f/3f2a...e1        the page itself
+#         artifacts/objects/3f/3f2a...e1.gz     gzip variant
+#         artifacts/objects/3f/3f2a...e1.br     brotli variant (needs `brotli`)
+#       The variants are written at save time, so a server can send them as
+#       they are. Saving a page that is already stored writes nothing;
+#     - one artifact record per save in a SQLite index (artifacts/index.sqlite):
+#       id, blob hash, name, session, user, topic, model, timings and time.
+#       Listing and searching use the index, never the folders.
+#
+#   Every file is written to a temporary name and renamed into place, and the
+#   blob row is only added once all of its files exist.
+#
+#   Switching it on (write_to_file then saves into the store instead of output/):
+#       ARTIFACT_STORE=artifacts           -> folder of the store
+#       ARTIFACT_BROTLI_QUALITY=11         -> brotli quality (0-11)
+#
+#   Usage (from the version_4_deploy_to_gcloud folder):
+#       uv run python -m utils.artifact_store stats
+#       uv run python -m utils.artifact_store list --session <session id>
+#       uv run python -m utils.artifact_store search "solar system"
+# =============================================================================
+
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+from utils.output_writer import atomic_write
+
+try:
+    import brotli
+except ImportError:   # Optional: without it only gzip variants are written.
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Content-Encoding name -> file suffix of the precompressed variant.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: like_pattern
+# -----------------------------------------------------------------------------
+def like_pattern(text: str) -> str:
+    """A LIKE pattern (for ESCAPE '\\') that finds `text` anywhere, with % and _ taken literally."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: Artifact
+# -----------------------------------------------------------------------------
+@dataclass
+class Artifact:
+    """One saved page: the index record plus the blob it points to."""
+    id: str
+    sha256: str
+    size: int
+    content_type: str
+    created_at: float
+    name: str = ""
+    session_id: str = ""
+    user_id: str = ""
+    topic: str = ""
+    model: str = ""
+    timings: dict = field(default_factory=dict)
+    encodings: dict = field(default_factory=dict)   # "gzip"/"br" -> compressed size
+    deduplicated: bool = False                      # True if the blob already existed
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag: the content hash."""
+        return f'"{self.sha256}"'
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "etag": self.etag}
+
+
+# -----------------------------------------------------------------------------
+# CLASS: ArtifactStore
+# -----------------------------------------------------------------------------
+class ArtifactStore:
+    """Deduplicated page blobs with precompressed variants and a SQLite index."""
+
+    def __init__(self, root: str = "artifacts", brotli_quality: int = 11, gzip_level: int = 9) -> None:
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self.objects.mkdir(parents=True, exist_ok=True)
+        if brotli is None:
+            logger.info("brotli is not installed; artifacts get gzip variants only")
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, content_type TEXT NOT NULL,"
+            " gzip_size INTEGER, br_size INTEGER, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id TEXT PRIMARY KEY, sha256 TEXT NOT NULL REFERENCES blobs(sha256),"
+            " name TEXT, session_id TEXT, user_id TEXT, topic TEXT, model TEXT,"
+            " timings TEXT, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS artifacts_by_time ON artifacts (created_at);"
+            "CREATE INDEX IF NOT EXISTS artifacts_by_session ON artifacts (session_id, created_at);"
+            "CREATE INDEX IF NOT EXISTS artifacts_by_sha ON artifacts (sha256);"
+        )
+        self._db.commit()
+
+    # --- Paths --------------------------------------------------------------------
+    def blob_path(self, sha256: str, encoding: Optional[str] = None) -> Path:
+        """Path of a blob, or of its "gzip" / "br" variant."""
+        return self.objects / sha256[:2] / (sha256 + (ENCODINGS[encoding] if encoding else ""))
+
+    # --- Saving -------------------------------------------------------------------
+    def _write_blob(self, sha256: str, data: bytes, content_type: str) -> dict:
+        """Writes the blob and its variants; returns the variant sizes."""
+        self.blob_path(sha256).parent.mkdir(exist_ok=True)
+        variants = {"gzip": gzip.compress(data, compresslevel=self.gzip_level, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(data, quality=self.brotli_quality)
+        sizes = {}
+        for encoding, compressed in variants.items():
+            # A variant that is not smaller than the page is not worth sending.
+            if len(compressed) < len(data):
+                atomic_write(self.blob_path(sha256, encoding), compressed)
+                sizes[encoding] = len(compressed)
+        atomic_write(self.blob_path(sha256), data)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, content_type, gzip_size, br_size, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, len(data), content_type, sizes.get("gzip"), sizes.get("br"), time.time()),
+            )
+            self._db.commit()
+        return sizes
+
+    def save(self, content: Union[str, bytes], *, name: str = "", session_id: str = "", user_id: str = "",
+             topic: str = "", model: str = "", timings: Optional[dict] = None,
+             content_type: str = "text/html; charset=utf-8") -> Artifact:
+        """
+        Stores a page (once per distinct content) and records one artifact for it.
+
+        Args:
+            content (str | bytes): The page (text is stored as UTF-8).
+            name (str): A display name, e.g. "generated_page.html".
+            session_id, user_id (str): The ADK session that produced the page.
+            topic (str): What the page is about (e.g. the user's request); searchable.
+            model (str): The model that wrote it.
+            timings (dict): Any timings worth keeping, e.g. {"run_s": 41.2}.
+            content_type (str): Sent as the Content-Type when the page is served.
+
+        Returns:
+            Artifact: The new record; `deduplicated` tells whether the blob already existed.
+        """
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        sha256 = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            row = self._db.execute("SELECT gzip_size, br_size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        deduplicated = row is not None and self.blob_path(sha256).exists()
+        if deduplicated:
+            sizes = {encoding: size for encoding, size in (("gzip", row["gzip_size"]), ("br", row["br_size"])) if size}
+        else:
+            sizes = self._write_blob(sha256, data, content_type)
+
+        artifact = Artifact(
+            id=uuid.uuid4().hex, sha256=sha256, size=len(data), content_type=content_type,
+            created_at=time.time(), name=name, session_id=session_id, user_id=user_id, topic=topic,
+            model=model, timings=timings or {}, encodings=sizes, deduplicated=deduplicated,
+        )
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO artifacts (id, sha256, name, session_id, user_id, topic, model, timings, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (artifact.id, sha256, name, session_id, user_id, topic, model,
+                 json.dumps(artifact.timings), artifact.created_at),
+            )
+            self._db.commit()
+        return artifact
+
+    async def save_async(self, content: Union[str, bytes], executor: Optional[Executor] = None,
+                         **metadata) -> Artifact:
+        """
+        Like `save`, but hashes, compresses and writes in `executor` (e.g. the
+        OutputWriter's pool, so page writes share one bounded set of threads;
+        None uses the event loop's default executor).
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(self.save, content, **metadata))
+
+    # --- Reading ------------------------------------------------------------------
+    _SELECT = (
+        "SELECT a.*, b.size, b.content_type, b.gzip_size, b.br_size"
+        " FROM artifacts a JOIN blobs b ON a.sha256 = b.sha256"
+    )
+
+    @staticmethod
+    def _artifact(row: sqlite3.Row) -> Artifact:
+        return Artifact(
+            id=row["id"], sha256=row["sha256"], size=row["size"], content_type=row["content_type"],
+            created_at=row["created_at"], name=row["name"] or "", session_id=row["session_id"] or "",
+            user_id=row["user_id"] or "", topic=row["topic"] or "", model=row["model"] or "",
+            timings=json.loads(row["timings"] or "{}"),
+            encodings={encoding: size for encoding, size in (("gzip", row["gzip_size"]), ("br", row["br_size"])) if size},
+        )
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """The artifact with this id, or None."""
+        with self._lock:
+            row = self._db.execute(f"{self._SELECT} WHERE a.id = ?", (artifact_id,)).fetchone()
+        return self._artifact(row) if row else None
+
+    def list_artifacts(self, session_id: Optional[str] = None, before: Optional[float] = None, limit: int = 50) -> list[Artifact]:
+        """
+        The newest artifacts first, optionally of one session. Pass the
+        `created_at` of the last artifact as `before` to get the next page.
+        """
+        conditions, params = [], []
+        if session_id:
+            conditions.append("a.session_id = ?")
+            params.append(session_id)
+        if before is not None:
+            conditions.append("a.created_at < ?")
+            params.append(before)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._db.execute(f"{self._SELECT}{where} ORDER BY a.created_at DESC LIMIT ?",
+                                    (*params, limit)).fetchall()
+        return [self._artifact(row) for row in rows]
+
+    def search(self, text: str, limit: int = 50, session_id: Optional[str] = None) -> list[Artifact]:
+        """
+        Artifacts whose topic, name or model contains `text` literally
+        (case-insensitive), newest first, optionally of one session only.
+        """
+        pattern = like_pattern(text)
+        condition = "(a.topic LIKE ? ESCAPE '\\' OR a.name LIKE ? ESCAPE '\\' OR a.model LIKE ? ESCAPE '\\')"
+        params = [pattern, pattern, pattern]
+        if session_id:
+            condition += " AND a.session_id = ?"
+            params.append(session_id)
+        with self._lock:
+            rows = self._db.execute(
+                f"{self._SELECT} WHERE {condition} ORDER BY a.created_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._artifact(row) for row in rows]
+
+    def stats(self) -> dict:
+        """Counts and sizes, including the bytes saved by deduplication."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT (SELECT COUNT(*) FROM artifacts) AS artifacts,"
+                " (SELECT COUNT(*) FROM blobs) AS blobs,"
+                " (SELECT COALESCE(SUM(size), 0) FROM blobs) AS blob_bytes,"
+                " (SELECT COALESCE(SUM(COALESCE(gzip_size, 0) + COALESCE(br_size, 0)), 0) FROM blobs) AS variant_bytes,"
+                " (SELECT COALESCE(SUM(b.size), 0) FROM artifacts a JOIN blobs b ON a.sha256 = b.sha256) AS logical_bytes"
+            ).fetchone()
+        return {
+            "artifacts": row["artifacts"],
+            "blobs": row["blobs"],
+            "blob_bytes": row["blob_bytes"],
+            "variant_bytes": row["variant_bytes"],
+            "stored_bytes": row["blob_bytes"] + row["variant_bytes"],
+            "page_bytes": row["logical_bytes"],
+            "dedupe_saved_bytes": row["logical_bytes"] - row["blob_bytes"],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_shared_store: Optional[ArtifactStore] = None
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_artifact_store
+# -----------------------------------------------------------------------------
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """
+    Returns the process-wide ArtifactStore if ARTIFACT_STORE is set, otherwise
+    None. Every caller (the write_to_file tool, the artifact routes) gets the
+    same instance.
+    """
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = artifact_store_from_env()
+    return _shared_store
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: artifact_store_from_env
+# -----------------------------------------------------------------------------
+def artifact_store_from_env() -> Optional[ArtifactStore]:
+    """Builds the ArtifactStore configured by ARTIFACT_STORE, or None if it is not set."""
+    root = os.environ.get("ARTIFACT_STORE")
+    if not root:
+        return None
+    return ArtifactStore(root, brotli_quality=int(os.environ.get("ARTIFACT_BROTLI_QUALITY", "11")))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the artifact store.")
+    parser.add_argument("--root", default=os.environ.get("ARTIFACT_STORE", "artifacts"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats")
+    list_parser = commands.add_parser("list")
+    list_parser.add_argument("--session")
+    list_parser.add_argument("--limit", type=int, default=20)
+    search_parser = commands.add_parser("search")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+    artifacts = store.list_artifacts(args.session, limit=args.limit) if args.command == "list" else store.search(args.text, args.limit)
+    for artifact in artifacts:
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(artifact.created_at))
+        print(f"{artifact.id}  {created}  {artifact.size:>8} B  {artifact.sha256[:12]}  {artifact.topic[:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# =============================================================================
+# FILE: cascade.py
+# PURPOSE:
+#   A model cascade: try the cheapest/fastest model first, check its answer
+#   with a local validator (utils/validators.py), and only call a stronger
+#   model when the check fails.
+#
+#   `CascadeLlm` is a model like any other (a BaseLlm), so an LlmAgent just
+#   gets it as its `model`. For every call it walks its tiers in order:
+#       gemini-2.5-flash-lite  --validator fails-->  gemini-2.5-flash  --> ...
+#   The answer of the first tier that passes is returned; if none passes, the
+#   last tier's answer is returned anyway.
+#
+#   Answers of the lower tiers are held back until they are validated; the
+#   last tier streams as usual. In streaming (SSE) mode an answer is a run of
+#   partial chunks plus one or more non-partial responses (text before a
+#   function call is handed on by itself): the validator sees all of the
+#   non-partial parts together, and an accepted lower-tier answer is replayed
+#   with its partial chunks, so streaming consumers (the page preview) see the
+#   same sequence as from a model called directly.
+#
+#   `cascade_report()` shows, per stage, how often each tier answered, the
+#   escalation rate, and the latency saved (time the top tier would have
+#   taken, minus the time the cheaper answers took) and wasted (time spent on
+#   answers that failed validation).
+# =============================================================================
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from utils.agent_hooks import request_agent_name
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: StageCascadeStats
+# -----------------------------------------------------------------------------
+@dataclass
+class StageCascadeStats:
+    """How the cascade behaved for one stage (agent)."""
+    calls: int = 0
+    answered_by: Counter = field(default_factory=Counter)       # Model name -> accepted answers
+    escalations: int = 0                                         # Calls that needed more than one tier
+    exhausted: int = 0                                           # Calls where no tier passed
+    failure_reasons: Counter = field(default_factory=Counter)
+    latency_by_model: dict = field(default_factory=dict)         # Model name -> [total seconds, count]
+    cheap_answer_latencies: list = field(default_factory=list)   # Accepted answers below the top tier
+    wasted_s: float = 0.0                                        # Time spent on rejected answers
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        total = self.latency_by_model.setdefault(model, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+
+    def average_latency(self, model: str) -> Optional[float]:
+        total = self.latency_by_model.get(model)
+        return total[0] / total[1] if total and total[1] else None
+
+
+# Stage name -> stats, shared by every CascadeLlm in the process.
+_stage_stats: dict[str, StageCascadeStats] = {}
+
+
+# -----------------------------------------------------------------------------
+# CLASS: CascadeLlm
+# -----------------------------------------------------------------------------
+class CascadeLlm(BaseLlm):
+    """Tries `tiers` from cheapest to strongest until `validator` accepts an answer."""
+
+    tiers: list[BaseLlm]
+    validator: Any   # Callable[[LlmResponse], Optional[str]], see utils/validators.py
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        stats = _stage_stats.setdefault(request_agent_name(llm_request), StageCascadeStats())
+        stats.calls += 1
+
+        for index, tier in enumerate(self.tiers):
+            is_last = index == len(self.tiers) - 1
+            request = llm_request.model_copy(deep=True)
+            request.model = tier.model
+            start = time.perf_counter()
+
+            if is_last:
+                # Nothing left to escalate to: stream the answer straight through.
+                answers: list[LlmResponse] = []
+                async for response in tier.generate_content_async(request, stream=stream):
+                    if not response.partial:
+                        answers.append(response)
+                    yield response
+                stats.record_latency(tier.model, time.perf_counter() - start)
+                reason = self.validator(merge_answers(answers)) if answers else "no answer"
+                if reason:
+                    stats.exhausted += 1
+                    stats.failure_reasons[f"{tier.model}: {reason}"] += 1
+                stats.answered_by[tier.model] += 1
+                if index > 0:
+                    stats.escalations += 1
+                return
+
+            responses = [response async for response in tier.generate_content_async(request, stream=stream)]
+            answers = [response for response in responses if not response.partial]
+            elapsed = time.perf_counter() - start
+            stats.record_latency(tier.model, elapsed)
+            reason = self.validator(merge_answers(answers)) if answers else "no answer"
+            if reason is None:
+                stats.answered_by[tier.model] += 1
+                stats.cheap_answer_latencies.append(elapsed)
+                if index > 0:
+                    stats.escalations += 1
+                for response in responses:
+                    yield response
+                return
+            stats.failure_reasons[f"{tier.model}: {reason}"] += 1
+            stats.wasted_s += elapsed
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: merge_answers
+# -----------------------------------------------------------------------------
+def merge_answers(answers: list[LlmResponse]) -> LlmResponse:
+    """
+    One response with the parts of all non-partial `answers` (the pieces of
+    one streamed answer); everything else is taken from the last one.
+    """
+    last = answers[-1]
+    if len(answers) == 1:
+        return last
+    parts = [part for answer in answers if answer.content for part in answer.content.parts or []]
+    role = last.content.role if last.content and last.content.role else "model"
+    return last.model_copy(update={"content": types.Content(role=role, parts=parts)})
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: cascade_report
+# -----------------------------------------------------------------------------
+def cascade_report(top_model: Optional[str] = None) -> dict:
+    """
+    Per-stage escalation rates and latency numbers.
+
+    Args:
+        top_model (str): The strongest tier, used to estimate the latency saved
+            by cheaper answers. Defaults to the slowest model seen per stage.
+    """
+    report = {}
+    for stage, stats in _stage_stats.items():
+        averages = {model: stats.average_latency(model) for model in stats.latency_by_model}
+        reference = averages.get(top_model) if top_model else max(averages.values(), default=None)
+        saved = (sum(max(0.0, reference - latency) for latency in stats.cheap_answer_latencies)
+                 if reference is not None else None)
+        report[stage] = {
+            "calls": stats.calls,
+            "answered_by": dict(stats.answered_by),
+            "escalation_rate": round(stats.escalations / stats.calls, 3) if stats.calls else 0.0,
+            "exhausted": stats.exhausted,
+            "avg_latency_s": {model: round(value, 3) for model, value in averages.items() if value is not None},
+            "latency_saved_s": round(saved, 3) if saved is not None else None,
+            "latency_wasted_s": round(stats.wasted_s, 3),
+            "top_failure_reasons": dict(stats.failure_reasons.most_common(5)),
+        }
+    return report
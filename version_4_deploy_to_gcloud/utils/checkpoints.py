@@ -0,0 +1,161 @@
+# =============================================================================
+# FILE: checkpoints.py
+# PURPOSE:
+#   Stage-level checkpoints for the website builder pipeline, so a run that
+#   fails near the end (e.g. in designer_agent) can be retried without redoing
+#   the questions and the five research calls.
+#
+#   Every agent with an `output_key` is a "stage". When a stage finishes, its
+#   output is saved to a small JSON file named after a hash of everything that
+#   went into it:
+#     - the stage name, its model and its instruction (the instruction file)
+#     - the user's message (the topic)
+#     - the state values its instruction refers to (the outputs of earlier stages)
+#   Before a stage runs, we look for a checkpoint with the same hash. If there
+#   is one, the stage is skipped and its saved output is put back into the
+#   session state. The first stage whose inputs changed (or that never
+#   finished) runs normally, and so does every stage after it, because their
+#   inputs change with it.
+#
+#   Switching it on:
+#       PIPELINE_CHECKPOINT_DIR=checkpoints uv run python3 -m agent_runner
+# =============================================================================
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+from google.genai import types
+
+from utils.agent_hooks import add_callback, for_each_agent, referenced_state_keys
+
+logger = logging.getLogger(__name__)
+
+# Environment variable that enables checkpoints and names their directory.
+CHECKPOINT_DIR_ENV = "PIPELINE_CHECKPOINT_DIR"
+
+
+# -----------------------------------------------------------------------------
+# CLASS: StageCheckpointer
+# -----------------------------------------------------------------------------
+class StageCheckpointer:
+    """Saves and restores the `output_key` result of every pipeline stage."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.restored: Counter = Counter()   # Stage name -> times skipped
+        self.saved: Counter = Counter()      # Stage name -> checkpoints written
+        self._stages: dict[str, Any] = {}
+        self._pending: dict[tuple, str] = {}
+
+    # --- Wiring ---------------------------------------------------------------
+    def instrument(self, root_agent: Any) -> Any:
+        """
+        Attaches checkpointing to every agent under `root_agent` that has an
+        `output_key`.
+
+        Returns:
+            The same root agent, for convenient chaining.
+        """
+        for_each_agent(root_agent, self._instrument_agent)
+        return root_agent
+
+    def _instrument_agent(self, agent: Any) -> None:
+        if not getattr(agent, "output_key", None):
+            return
+        # The agent itself is kept (not its fingerprint): a reloaded prompt
+        # (utils/prompt_registry.py) changes the definition, and with it the key.
+        self._stages[agent.name] = agent
+        add_callback(agent, "before_agent_callback", self.before_agent)
+        add_callback(agent, "after_agent_callback", self.after_agent)
+
+    # --- Keys -----------------------------------------------------------------
+    def stage_key(self, agent_name: str, callback_context) -> str:
+        """Hash of the stage definition and of all the inputs it reads."""
+        agent = self._stages[agent_name]
+        user_content = callback_context.user_content
+        material = {
+            "stage": agent_name,
+            "definition": _agent_fingerprint(agent),
+            "user": [part.text for part in user_content.parts or [] if part.text] if user_content else [],
+            "inputs": {key: callback_context.state.get(key) for key in referenced_state_keys(agent)},
+        }
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, agent_name: str, key: str) -> Path:
+        return self.directory / f"{agent_name}_{key[:24]}.json"
+
+    # --- ADK callbacks --------------------------------------------------------
+    def before_agent(self, callback_context) -> Optional[types.Content]:
+        agent_name = callback_context.agent_name
+        # Copies of a stage share its callbacks under another name (e.g. the
+        # "<name>_hedge" run of utils/fanout.py); they are not checkpointed.
+        if agent_name not in self._stages:
+            return None
+        key = self.stage_key(agent_name, callback_context)
+        path = self._path(agent_name, key)
+        if not path.exists():
+            self._pending[(callback_context.invocation_id, agent_name)] = key
+            return None
+
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+        # Put the saved output back where the next stages expect it; returning
+        # content makes ADK skip this stage and emit the content as its event.
+        callback_context.state[checkpoint["output_key"]] = checkpoint["output"]
+        self.restored[agent_name] += 1
+        logger.info("Checkpoint: reusing the saved output of %s", agent_name)
+        output = checkpoint["output"]
+        text = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        return types.Content(role="model", parts=[types.Part(text=text)])
+
+    def after_agent(self, callback_context) -> None:
+        agent_name = callback_context.agent_name
+        key = self._pending.pop((callback_context.invocation_id, agent_name), None)
+        if key is None:
+            return None
+        output_key = self._stages[agent_name].output_key
+        output = callback_context.state.get(output_key)
+        if output is None:
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = {"stage": agent_name, "output_key": output_key, "output": output, "created": time.time()}
+        # Write to a temporary file first, so a crash never leaves half a checkpoint.
+        path = self._path(agent_name, key)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(checkpoint, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, path)
+        self.saved[agent_name] += 1
+        return None
+
+
+# -----------------------------------------------------------------------------
+# HELPERS
+# -----------------------------------------------------------------------------
+def _agent_fingerprint(agent: Any) -> dict:
+    """The parts of an agent's definition that change what it produces."""
+    model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", str(agent.model))
+    instruction = agent.instruction if isinstance(agent.instruction, str) else getattr(
+        agent.instruction, "__qualname__", repr(agent.instruction))
+    return {
+        "model": model,
+        "instruction": hashlib.sha256(instruction.encode("utf-8")).hexdigest(),
+        "tools": sorted(getattr(tool, "name", getattr(tool, "__name__", str(tool))) for tool in agent.tools),
+    }
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: checkpointer_from_env
+# -----------------------------------------------------------------------------
+def checkpointer_from_env() -> Optional[StageCheckpointer]:
+    """
+    Returns a StageCheckpointer if PIPELINE_CHECKPOINT_DIR is set, otherwise None.
+    """
+    directory = os.environ.get(CHECKPOINT_DIR_ENV)
+    return StageCheckpointer(directory) if directory else None
@@ -0,0 +1,130 @@
+# =============================================================================
+# FILE: deferred_app.py
+# PURPOSE:
+#   Lets uvicorn bind its port before the ADK FastAPI app exists.
+#
+#   `get_fast_api_app()` needs all of google.adk (plus FastAPI, SQLAlchemy,
+#   OpenTelemetry, ...) to be imported, and uvicorn only binds once `main:app`
+#   has been imported and its startup has run. On a Cloud Run cold start the
+#   container therefore sits there for seconds without listening.
+#
+#   `DeferredApp` is a tiny ASGI app that uvicorn can start at once. When the
+#   server starts, it builds the real app in a worker thread (so the event loop
+#   stays free) and runs the real app's startup; requests that arrive
+#   before that is done wait for it, and every request after is passed
+#   straight through.
+#
+#   An optional `warm_up` coroutine runs as part of that build, after the
+#   port is bound (main.py builds the lazy pipeline stages with it). If it
+#   fails, the build fails and is logged, and the next request tries again.
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: DeferredApp
+# -----------------------------------------------------------------------------
+class DeferredApp:
+    """ASGI app that starts immediately and builds the real app in the background."""
+
+    def __init__(self, factory: Callable[[], Any], warm_up: Optional[Callable[[], Awaitable]] = None) -> None:
+        """
+        Args:
+            factory (Callable): Builds and returns the real ASGI app
+                (e.g. a function calling get_fast_api_app). It runs in a thread.
+            warm_up (Callable): Optional coroutine function awaited after the
+                factory, before any request is passed to the app.
+        """
+        self._factory = factory
+        self._warm_up = warm_up
+        self._app: Optional[Any] = None
+        self._build: Optional[asyncio.Future] = None
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._to_app: Optional[asyncio.Queue] = None
+        self._from_app: Optional[asyncio.Queue] = None
+        self._lifespan_state: dict = {}
+        self.build_seconds: Optional[float] = None
+
+    # --- Building the real app ---------------------------------------------------
+    def start_building(self) -> None:
+        """Starts building the real app, unless it is built or being built."""
+        if self._build is None:
+            self._build = asyncio.ensure_future(self._build_app())
+
+    async def _build_app(self) -> None:
+        start = time.perf_counter()
+        try:
+            app = await asyncio.to_thread(self._factory)
+            if self._warm_up is not None:
+                await self._warm_up()
+        except Exception:
+            logger.exception("Building the application failed")
+            raise
+        await self._start_lifespan(app)
+        self._app = app
+        self.build_seconds = time.perf_counter() - start
+        logger.info("Application built in %.2fs", self.build_seconds)
+
+    async def _get_app(self) -> Any:
+        if self._app is not None:
+            return self._app
+        self.start_building()
+        build = self._build
+        try:
+            await asyncio.shield(build)
+        except Exception:
+            # Let the next request try again instead of failing forever.
+            if self._build is build:
+                self._build = None
+            raise
+        return self._app
+
+    # --- Lifespan of the real app -------------------------------------------------
+    async def _start_lifespan(self, app: Any) -> None:
+        """Runs the real app's startup handlers (if it has any)."""
+        self._to_app, self._from_app = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": self._lifespan_state}
+        self._lifespan_task = asyncio.create_task(app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "lifespan.startup"})
+        reply = asyncio.ensure_future(self._from_app.get())
+        await asyncio.wait({reply, self._lifespan_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            # The app does not support lifespan events.
+            reply.cancel()
+            self._lifespan_task = None
+            return
+        if reply.result()["type"] == "lifespan.startup.failed":
+            raise RuntimeError(f"Application startup failed: {reply.result().get('message', '')}")
+
+    async def _stop_lifespan(self) -> None:
+        if self._lifespan_task is None or self._lifespan_task.done():
+            return
+        await self._to_app.put({"type": "lifespan.shutdown"})
+        await asyncio.wait({asyncio.ensure_future(self._from_app.get()), self._lifespan_task},
+                           return_when=asyncio.FIRST_COMPLETED)
+
+    # --- ASGI entry point -----------------------------------------------------------
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    self.start_building()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    if self._build is not None and not self._build.done():
+                        self._build.cancel()
+                    await self._stop_lifespan()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        app = await self._get_app()
+        if self._lifespan_state:
+            scope = dict(scope, state={**scope.get("state", {}), **self._lifespan_state})
+        await app(scope, receive, send)
@@ -0,0 +1,157 @@
+# =============================================================================
+# FILE: event_sink.py
+# PURPOSE:
+#   Decides how much of every agent event gets printed by the runners.
+#
+#   Turning every event into pretty, syntax-highlighted JSON is expensive
+#   (model_dump + json.dumps + Pygments) and floods the terminal in the
+#   multi-agent pipelines. An "event sink" receives each event and prints it
+#   at one of three verbosity levels:
+#     - silent:  prints nothing
+#     - summary: one short line per event (author, type, elapsed ms, tokens)
+#     - json:    the full, highlighted JSON dump (the original behaviour)
+#   Serialization only happens inside the sink that needs it.
+# =============================================================================
+
+import json
+import sys
+import time
+from typing import Any, Optional, TextIO
+
+# The verbosity levels a runner can ask for, from quietest to loudest.
+VERBOSITY_LEVELS = ("silent", "summary", "json")
+
+
+# -----------------------------------------------------------------------------
+# CLASS: EventSink (base class)
+# -----------------------------------------------------------------------------
+class EventSink:
+    """
+    Receives agent events one by one. The base class ignores them all, which
+    makes it the "silent" level.
+    """
+
+    def start_turn(self) -> None:
+        """Called before the first event of a turn (resets the timer)."""
+
+    def emit(self, event: Any, index: int) -> None:
+        """
+        Handles one event.
+
+        Args:
+            event: The ADK event yielded by `runner.run_async()`.
+            index (int): 1-based position of the event within the turn.
+        """
+
+
+# -----------------------------------------------------------------------------
+# CLASS: SummaryEventSink
+# -----------------------------------------------------------------------------
+class SummaryEventSink(EventSink):
+    """
+    Prints one line per event, built only from attributes the event already
+    has in memory - nothing is serialized.
+
+    Example line:
+        #  7  +1834.2ms  QuestionResearcher3       text(1204)      in=812 out=301
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self._stream = stream
+        self._turn_start = time.perf_counter()
+
+    def start_turn(self) -> None:
+        self._turn_start = time.perf_counter()
+
+    def emit(self, event: Any, index: int) -> None:
+        elapsed_ms = (time.perf_counter() - self._turn_start) * 1000
+        usage = getattr(event, "usage_metadata", None)
+        tokens = ""
+        if usage is not None:
+            tokens = f"in={usage.prompt_token_count or 0} out={usage.candidates_token_count or 0}"
+        line = f"#{index:>3}  +{elapsed_ms:8.1f}ms  {event.author or '?':<28} {describe_event(event):<32} {tokens}"
+        (self._stream or sys.stdout).write(line.rstrip() + "\n")
+
+
+# -----------------------------------------------------------------------------
+# CLASS: JsonEventSink
+# -----------------------------------------------------------------------------
+class JsonEventSink(EventSink):
+    """
+    Prints every event as indented JSON, syntax highlighted with `rich` unless
+    `highlight=False`. `rich` is only imported when this sink is created.
+    """
+
+    def __init__(self, highlight: bool = True, console: Any = None) -> None:
+        self._highlight = highlight
+        self._console = console
+        if highlight and console is None:
+            from rich.console import Console
+            self._console = Console()
+
+    def emit(self, event: Any, index: int) -> None:
+        title = f"============Event #{index}============="
+        try:
+            if hasattr(event, "root"):  # Check if the event is wrapped by the SDK
+                data = event.root.model_dump(mode="json", exclude_none=True)
+            else:
+                data = event.model_dump(mode="json", exclude_none=True)
+            json_str = json.dumps(data, indent=2, ensure_ascii=False)
+        except Exception as e:
+            # Print fallback text if serialization fails
+            print(f"\n=== {title} ===\nError printing JSON: {e}\n{event!r}")
+            return
+
+        if not self._highlight:
+            print(f"\n=== {title} ===\n{json_str}")
+            return
+
+        from rich.syntax import Syntax
+        self._console.print(f"\n=== {title} ===", markup=False, highlight=False)
+        self._console.print(Syntax(json_str, "json", theme="monokai", line_numbers=False))
+
+
+# -----------------------------------------------------------------------------
+# HELPERS
+# -----------------------------------------------------------------------------
+def describe_event(event: Any) -> str:
+    """
+    Returns a short label for the kind of event, e.g. "call:write_to_file",
+    "response:google_search", "text(1204)" or "partial(56)".
+    """
+    calls = event.get_function_calls()
+    if calls:
+        return "call:" + ",".join(call.name for call in calls)
+    responses = event.get_function_responses()
+    if responses:
+        return "response:" + ",".join(response.name for response in responses)
+
+    text_length = 0
+    if event.content and event.content.parts:
+        text_length = sum(len(part.text) for part in event.content.parts if part.text)
+    if event.partial:
+        return f"partial({text_length})"
+    if text_length:
+        return f"text({text_length})"
+    if event.actions and (event.actions.state_delta or event.actions.transfer_to_agent):
+        return "state/transfer"
+    return "event"
+
+
+def make_event_sink(verbosity: str) -> EventSink:
+    """
+    Creates the sink for a verbosity level.
+
+    Args:
+        verbosity (str): One of VERBOSITY_LEVELS ("silent", "summary", "json").
+
+    Returns:
+        EventSink: The matching sink.
+    """
+    if verbosity == "silent":
+        return EventSink()
+    if verbosity == "summary":
+        return SummaryEventSink()
+    if verbosity == "json":
+        return JsonEventSink()
+    raise ValueError(f"Unknown verbosity '{verbosity}'. Choose one of: {', '.join(VERBOSITY_LEVELS)}")
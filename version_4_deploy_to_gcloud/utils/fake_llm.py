@@ -0,0 +1,269 @@
+# =============================================================================
+# FILE: fake_llm.py
+# PURPOSE:
+#   A local, deterministic stand-in for Gemini, used to benchmark and load-test
+#   the agent pipelines without network access or API quota.
+#
+#   `FakeLlm` plugs into ADK like any other model (it is a `BaseLlm`), so an
+#   LlmAgent cannot tell the difference. It answers from a small script:
+#     - scripted or templated text ($topic, $agent and $model are filled in)
+#     - configurable latency, token counts and streaming chunk size
+#     - scripted function calls (e.g. write_to_file, google_search) followed
+#       by a text answer once the tool has responded
+#   The same request always produces the same response.
+#
+#   Switching it on:
+#       USE_FAKE_LLM=TRUE                  -> agents built with utils.models.get_model()
+#                                             use FakeLlm instead of Gemini
+#       FAKE_LLM_CONFIG=path/to/fake.json  -> optional script (see DEFAULT_CONFIG)
+#   `install_fake_llm_override()` goes one step further and routes EVERY
+#   "gemini-*" model name in the process to FakeLlm, which also covers agents
+#   defined elsewhere (other versions, YAML configs).
+# =============================================================================
+
+import asyncio
+import json
+import os
+import re
+from string import Template
+from typing import Any, AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import Field
+
+# Environment variables that control the fake backend.
+USE_FAKE_LLM_ENV = "USE_FAKE_LLM"
+FAKE_LLM_CONFIG_ENV = "FAKE_LLM_CONFIG"
+
+# ADK tells every model its agent's name in the system instruction.
+_AGENT_NAME_PATTERN = re.compile(r'Your internal name is "([^"]+)"')
+
+# Deterministic filler used to pad responses up to `min_chars`.
+_FILLER = (
+    "This paragraph is deterministic filler text produced by the fake model so that "
+    "benchmarks move realistic amounts of text through the pipeline. "
+)
+
+# The built-in script: enough for the website builder pipelines to run end to end.
+DEFAULT_CONFIG: dict = {
+    "latency_ms": 50,          # Time before the first chunk / response
+    "chunk_latency_ms": 5,     # Extra time per streamed chunk
+    "chunk_chars": 200,        # Streaming chunk size (0 = one single chunk)
+    "output_tokens": None,     # Fixed output token count (None = estimate from text)
+    "rules": [
+        {
+            "agent": "questions_generator_agent",
+            "text": "1. What is $topic?\n2. Why does $topic matter today?\n3. How does $topic work?\n"
+                    "4. How does $topic compare to the alternatives?\n5. What is the future impact of $topic?",
+        },
+        {
+            "agent": "QuestionResearcher.*",
+            "text": "## Research answer from $agent\n\nKey findings about $topic, with sources.",
+            "min_chars": 2000,
+        },
+        {
+            "agent": "code_writer_agent|website_builder_simple",
+            "function_call": {
+                "name": "write_to_file",
+                "args": {"content": "<!DOCTYPE html>\n<html>\n<head><title>$topic</title>"
+                                    "<style>body { font-family: sans-serif; }</style></head>\n"
+                                    "<body><h1>$topic</h1><p>Generated by $model.</p></body>\n</html>\n"},
+            },
+            "after_function_text": "The page about $topic was written to a file.",
+        },
+    ],
+    "default_text": "# Output of $agent\n\nStructured notes about $topic.",
+    "default_min_chars": 1500,
+}
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: load_fake_llm_config
+# -----------------------------------------------------------------------------
+def load_fake_llm_config() -> dict:
+    """
+    Returns DEFAULT_CONFIG, updated with the JSON file named by FAKE_LLM_CONFIG
+    (if set). Keys in the file replace the default keys.
+    """
+    config = dict(DEFAULT_CONFIG)
+    config_path = os.environ.get(FAKE_LLM_CONFIG_ENV)
+    if config_path:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+
+def fake_llm_enabled() -> bool:
+    """True when USE_FAKE_LLM is set to a truthy value (TRUE / 1 / yes)."""
+    return os.environ.get(USE_FAKE_LLM_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+# -----------------------------------------------------------------------------
+# CLASS: FakeLlm
+# -----------------------------------------------------------------------------
+class FakeLlm(BaseLlm):
+    """
+    A scripted model. Rules are checked in order; the first rule whose
+    "agent" regex matches the calling agent's name (and whose optional
+    "match" regex is found in the prompt) decides the response.
+    """
+
+    model: str = "fake-llm"
+    config: dict = Field(default_factory=load_fake_llm_config)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        # Lets YAML configs and plain strings use e.g. model: fake-gemini-2.5-flash
+        return [r"fake-.*"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        agent_name = _agent_name(llm_request)
+        prompt_text = _request_text(llm_request)
+        rule = self._find_rule(agent_name, prompt_text)
+        variables = {"agent": agent_name, "topic": _topic(llm_request), "model": self.model}
+        prompt_tokens = max(1, len(prompt_text) // 4)
+
+        latency_ms = rule.get("latency_ms", self.config.get("latency_ms", 0))
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        # --- Scripted function call (only if the agent actually has the tool) ---
+        function_call = rule.get("function_call")
+        last_turn_was_tool = _last_content_is_function_response(llm_request)
+        if function_call and not last_turn_was_tool and function_call["name"] in llm_request.tools_dict:
+            args = _render(function_call.get("args", {}), variables)
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name=function_call["name"], args=args))
+                ]),
+                usage_metadata=self._usage(prompt_tokens, json.dumps(args), rule),
+                turn_complete=True,
+            )
+            return
+
+        # --- Text response (optionally streamed in chunks) ---
+        if function_call and last_turn_was_tool:
+            template, min_chars = rule.get("after_function_text", "Done."), rule.get("min_chars", 0)
+        elif "text" in rule:
+            template, min_chars = rule["text"], rule.get("min_chars", 0)
+        else:
+            template = self.config.get("default_text", "")
+            min_chars = rule.get("min_chars", self.config.get("default_min_chars", 0))
+        text = _render(template, variables)
+        if min_chars and len(text) < min_chars:
+            text += "\n\n" + (_FILLER * (min_chars // len(_FILLER) + 1))[: min_chars - len(text)]
+
+        chunk_chars = self.config.get("chunk_chars", 0)
+        if stream and chunk_chars and len(text) > chunk_chars:
+            chunk_latency_ms = self.config.get("chunk_latency_ms", 0)
+            for start in range(0, len(text), chunk_chars):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[start:start + chunk_chars])]),
+                    partial=True,
+                )
+                if chunk_latency_ms:
+                    await asyncio.sleep(chunk_latency_ms / 1000)
+
+        final = {"turn_complete": True}
+        # Older google-adk releases (the locked 1.9.0) have no finish_reason field.
+        if "finish_reason" in LlmResponse.model_fields:
+            final["finish_reason"] = types.FinishReason.STOP
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=self._usage(prompt_tokens, text, rule),
+            **final,
+        )
+
+    def _find_rule(self, agent_name: str, prompt_text: str) -> dict:
+        for rule in self.config.get("rules", []):
+            if "agent" in rule and not re.fullmatch(rule["agent"], agent_name):
+                continue
+            if "match" in rule and not re.search(rule["match"], prompt_text):
+                continue
+            return rule
+        return {}
+
+    def _usage(self, prompt_tokens: int, output_text: str, rule: dict) -> types.GenerateContentResponseUsageMetadata:
+        output_tokens = rule.get("output_tokens", self.config.get("output_tokens")) or max(1, len(output_text) // 4)
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+
+# -----------------------------------------------------------------------------
+# HELPERS
+# -----------------------------------------------------------------------------
+def _agent_name(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    match = _AGENT_NAME_PATTERN.search(instruction) if isinstance(instruction, str) else None
+    return match.group(1) if match else "agent"
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    """All the text the model would read: system instruction plus contents."""
+    texts = []
+    if llm_request.config and isinstance(llm_request.config.system_instruction, str):
+        texts.append(llm_request.config.system_instruction)
+    for content in llm_request.contents or []:
+        texts.extend(part.text for part in content.parts or [] if part.text)
+    return "\n".join(texts)
+
+
+def _topic(llm_request: LlmRequest) -> str:
+    """The first user message of the conversation, i.e. the topic."""
+    for content in llm_request.contents or []:
+        if content.role == "user":
+            for part in content.parts or []:
+                if part.text:
+                    return part.text.strip()
+    return "the topic"
+
+
+def _last_content_is_function_response(llm_request: LlmRequest) -> bool:
+    if not llm_request.contents:
+        return False
+    return any(part.function_response for part in llm_request.contents[-1].parts or [])
+
+
+def _render(value: Any, variables: dict) -> Any:
+    """Fills $placeholders in strings (recursively inside dicts and lists)."""
+    if isinstance(value, str):
+        return Template(value).safe_substitute(variables)
+    if isinstance(value, dict):
+        return {key: _render(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_render(item, variables) for item in value]
+    return value
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: install_fake_llm_override
+# -----------------------------------------------------------------------------
+class _GeminiOverrideLlm(FakeLlm):
+    """FakeLlm registered under the Gemini model names."""
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"gemini-.*"]
+
+
+def install_fake_llm_override() -> None:
+    """
+    Routes every "gemini-*" model name in this process to FakeLlm, including
+    agents that were defined with a plain model string. Call it before the
+    first model call.
+    """
+    LLMRegistry.register(FakeLlm)
+    LLMRegistry.register(_GeminiOverrideLlm)
+    # Some ADK versions memoize model-name lookups; forget the old answers.
+    cache_clear = getattr(LLMRegistry.resolve, "cache_clear", None)
+    if cache_clear is not None:
+        cache_clear()
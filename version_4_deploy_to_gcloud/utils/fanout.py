@@ -0,0 +1,313 @@
+# =============================================================================
+# FILE: fanout.py
+# PURPOSE:
+#   A parallel agent whose width is decided at runtime.
+#
+#   ADK's ParallelAgent always runs all of its sub-agents. For the research
+#   stage that means five researchers even for a topic that only needs two
+#   questions. `DynamicFanOutAgent` reads a numbered list from the session state
+#   (the questions) and runs one sub-agent per item:
+#     - at least `min_agents` and at most as many as it has sub-agents
+#     - at most `max_concurrency` of them at the same time (separately from
+#       how many run in total)
+#   The sub-agents are built up front (so tracing, caching and checkpoint
+#   callbacks reach them like any other agent); only the ones needed run.
+#
+#   Before the sub-agents start, item N is stored in the state under
+#   `item_state_key_template` (e.g. "research_question_3"), so each sub-agent's
+#   instruction can refer to its own item (an empty string when it has none). Their outputs are folded into
+#   `combined_output_key` as each one finishes (a running merge).
+#
+#   Quorum mode: a plain parallel stage is as slow as its slowest sub-agent.
+#   With `quorum` set, the stage waits for only that many sub-agents; after
+#   that, the stragglers get `straggler_grace_s` more seconds and are then
+#   cancelled, and the next stage starts from the merge of what has finished.
+#
+#   Tail-latency controls:
+#     - hedging: when a sub-agent is still running after the `hedge_percentile`
+#       of recent sub-agent latencies, a copy of it (named "<name>_hedge", with
+#       the private output key "<output_key>_hedge") starts on its own branch;
+#       the first of the two to finish wins, the other is cancelled, and a
+#       winning hedge's answer is copied to the original output key
+#     - deadline: after `deadline_s`, whatever is still running is cancelled
+#   Sub-agents that did not finish get a "missing" marker in their output key,
+#   and every run stores its numbers (hedges fired / won, estimated time
+#   saved, missing outputs) in state['<name>_metrics'].
+# =============================================================================
+
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from pydantic import PrivateAttr
+
+# "1. What is X?", "2) Why ...", "- Question 3: ..." and similar list items.
+_LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*]\s*)?(?:question\s*)?\d+\s*[.):]\s*(.+?)\s*$", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: parse_numbered_list
+# -----------------------------------------------------------------------------
+def parse_numbered_list(text: str) -> list[str]:
+    """
+    Extracts the items of a numbered list, e.g. the questions written by
+    questions_generator_agent. Returns an empty list if there is none.
+    """
+    items = []
+    for line in (text or "").splitlines():
+        match = _LIST_ITEM_PATTERN.match(line)
+        if match:
+            items.append(match.group(1).strip("*_ "))
+    return items
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: FanOutMetrics
+# -----------------------------------------------------------------------------
+@dataclass
+class FanOutMetrics:
+    """Tail-latency counters, for one run or summed over all runs."""
+    runs: int = 0                    # Sub-agent runs started
+    finished: int = 0                # ... that produced an answer in time
+    missing: int = 0                 # ... cut off by the quorum grace period or the deadline
+    hedges_fired: int = 0            # Duplicate runs started for slow sub-agents
+    hedge_wins: int = 0              # Duplicates that finished before the original
+    estimated_saved_s: float = 0.0   # Estimated latency saved by the hedge wins
+
+    def add(self, other: "FanOutMetrics") -> None:
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: DynamicFanOutAgent
+# -----------------------------------------------------------------------------
+class DynamicFanOutAgent(BaseAgent):
+    """Runs one sub-agent per item of a list in the session state."""
+
+    items_state_key: str                                # State key holding the numbered list
+    item_state_key_template: str = "item_{n}"           # Where item N is stored for sub-agent N
+    combined_output_key: Optional[str] = None           # Where all sub-agent outputs are combined
+    min_agents: int = 1
+    max_concurrency: int = 5
+    quorum: Optional[int] = None                        # Finished sub-agents needed to move on (None = all)
+    straggler_grace_s: float = 0.0                      # Extra wait for the rest once the quorum is reached
+    deadline_s: Optional[float] = None                  # Hard limit for the whole stage (None = no limit)
+    hedge_percentile: Optional[float] = None            # Hedge after this latency percentile (None = never)
+    hedge_min_samples: int = 5                          # Latencies needed before the percentile is trusted
+    hedge_initial_delay_s: Optional[float] = None       # Hedge delay until then (None = no hedging yet)
+
+    _latencies: deque = PrivateAttr(default_factory=lambda: deque(maxlen=200))
+    _metrics: FanOutMetrics = PrivateAttr(default_factory=FanOutMetrics)
+
+    @property
+    def metrics(self) -> FanOutMetrics:
+        """Counters summed over every run of this agent in this process."""
+        return self._metrics
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        items = parse_numbered_list(str(ctx.session.state.get(self.items_state_key, "")))
+        count = min(len(self.sub_agents), max(self.min_agents, len(items)))
+        agents = self.sub_agents[:count]
+        run_metrics = FanOutMetrics(runs=count)
+
+        # Give every sub-agent its own item before any of them starts. Every key
+        # is written, so no sub-agent sees an item a previous turn left behind:
+        # a sub-agent without an item (fewer items parsed than min_agents) gets
+        # "" and the keys of the sub-agents that do not run are cleared.
+        state_delta = {self.item_state_key_template.format(n=n): items[n - 1] if n <= min(count, len(items)) else ""
+                       for n in range(1, len(self.sub_agents) + 1)}
+        state_delta[f"{self.name}_count"] = count
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    actions=EventActions(state_delta=state_delta))
+
+        finished: list[BaseAgent] = []
+        async for event, finished_agent in self._run_sub_agents(ctx, agents, run_metrics):
+            if event is not None:
+                yield event
+                continue
+            # One more sub-agent is done: fold its output into the running merge.
+            finished.append(finished_agent)
+            if self.combined_output_key:
+                yield self._merge_event(ctx, agents, finished, items)
+
+        # Mark the outputs that never arrived, so later stages know they are missing.
+        missing = [agent for agent in agents if agent not in finished]
+        run_metrics.finished, run_metrics.missing = len(finished), len(missing)
+        self._metrics.add(run_metrics)
+        state_delta = {f"{self.name}_missing": [agent.name for agent in missing],
+                       f"{self.name}_metrics": asdict(run_metrics)}
+        for agent in missing:
+            if getattr(agent, "output_key", None):
+                state_delta[agent.output_key] = "[MISSING: research did not finish in time and was skipped]"
+        yield Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                    actions=EventActions(state_delta=state_delta))
+        if missing and self.combined_output_key:
+            yield self._merge_event(ctx, agents, finished, items, include_missing=True)
+
+    def _merge_event(self, ctx: InvocationContext, agents: list[BaseAgent], finished: list[BaseAgent],
+                     items: list[str], include_missing: bool = False) -> Event:
+        """The combined outputs of the finished sub-agents (and optionally the missing markers), in item order."""
+        sections = []
+        for n, agent in enumerate(agents, start=1):
+            if agent not in finished and not include_missing:
+                continue
+            output = ctx.session.state.get(getattr(agent, "output_key", None) or "", "")
+            title = items[n - 1] if n <= len(items) else agent.name
+            sections.append(f"### {n}. {title}\n\n{output}")
+        return Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                     actions=EventActions(state_delta={self.combined_output_key: "\n\n".join(sections)}))
+
+    # --- Running the sub-agents -------------------------------------------------
+    def _branch_ctx(self, ctx: InvocationContext, suffix: str) -> InvocationContext:
+        """A context on its own branch, so parallel runs do not see each other's conversation."""
+        branch = f"{self.name}.{suffix}"
+        return ctx.model_copy(update={"branch": f"{ctx.branch}.{branch}" if ctx.branch else branch})
+
+    def _hedge_delay(self) -> Optional[float]:
+        """How long a sub-agent may run before it gets a hedged duplicate."""
+        if self.hedge_percentile is None:
+            return None
+        if len(self._latencies) < self.hedge_min_samples:
+            return self.hedge_initial_delay_s
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _forward(self, agent: BaseAgent, agent_ctx: InvocationContext, queue: asyncio.Queue) -> None:
+        """Passes the events of one run to the consumer, one at a time."""
+        async for event in agent.run_async(agent_ctx):
+            handled = asyncio.Event()
+            await queue.put((event, handled, None, None))
+            await handled.wait()
+
+    def _hedge_agent(self, agent: BaseAgent) -> BaseAgent:
+        """
+        The copy of `agent` that runs the hedge. Its own name keeps the cache
+        and trace keys (invocation id, agent name) of the two runs apart (the
+        checkpointer does not know the name and leaves the copy alone), and
+        its private output key stops it from overwriting the answer of the
+        original.
+        """
+        update = {"name": f"{agent.name}_hedge"}
+        if getattr(agent, "output_key", None):
+            update["output_key"] = f"{agent.output_key}_hedge"
+        return agent.model_copy(update=update)
+
+    async def _run_hedged(self, agent: BaseAgent, ctx: InvocationContext, queue: asyncio.Queue,
+                          run_metrics: FanOutMetrics) -> None:
+        """Runs `agent`; if it is slow, races it against a duplicate run."""
+        start = time.monotonic()
+        primary = asyncio.create_task(self._forward(agent, self._branch_ctx(ctx, agent.name), queue))
+        hedge_agent: Optional[BaseAgent] = None
+        hedge: Optional[asyncio.Task] = None
+        pending = {primary}
+        winner: Optional[asyncio.Task] = None
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    hedge_agent = self._hedge_agent(agent)
+                    hedge = asyncio.create_task(
+                        self._forward(hedge_agent, self._branch_ctx(ctx, f"{agent.name}.hedge"), queue))
+                    pending.add(hedge)
+                    run_metrics.hedges_fired += 1
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                for task in done:
+                    if task.exception() is not None and (pending or winner is not None):
+                        # The other run may still answer; say why this one could not.
+                        logger.warning("%s: the %s run of %s failed: %r", self.name,
+                                       "hedged" if task is hedge else "original", agent.name, task.exception())
+                if winner is None and not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+        elapsed = time.monotonic() - start
+        if winner is primary:
+            self._latencies.append(elapsed)
+        else:
+            # The original would have taken at least as long as the hedge did;
+            # estimate it from the recent runs that were slower than this one.
+            run_metrics.hedge_wins += 1
+            slower = [latency for latency in self._latencies if latency > elapsed]
+            if slower:
+                run_metrics.estimated_saved_s += round(sum(slower) / len(slower) - elapsed, 3)
+            # The hedge answered under its private key: copy the answer to the
+            # original's key. This comes after any event the original still had queued.
+            if getattr(agent, "output_key", None):
+                handled = asyncio.Event()
+                copy = Event(invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+                             actions=EventActions(state_delta={
+                                 agent.output_key: ctx.session.state.get(hedge_agent.output_key, "")}))
+                await queue.put((copy, handled, None, None))
+                await handled.wait()
+
+    async def _run_sub_agents(self, ctx: InvocationContext, agents: list[BaseAgent], run_metrics: FanOutMetrics
+                              ) -> AsyncGenerator[tuple[Optional[Event], Optional[BaseAgent]], None]:
+        """
+        Runs `agents` concurrently (at most `max_concurrency` at once).
+
+        Yields `(event, None)` for every sub-agent event as it arrives, and
+        `(None, agent)` when a sub-agent has finished. Stops early (cancelling
+        the rest) at the deadline, or once the quorum is reached and the grace
+        period is over.
+
+        Like ParallelAgent, each sub-agent waits until its previous event has
+        been handled by the runner (and saved to the session) before it
+        continues.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_one(agent: BaseAgent) -> None:
+            try:
+                async with semaphore:
+                    await self._run_hedged(agent, ctx, queue, run_metrics)
+            except Exception as error:
+                queue.put_nowait((None, None, None, error))
+                return
+            queue.put_nowait((None, None, agent, None))
+
+        tasks = [asyncio.create_task(run_one(agent)) for agent in agents]
+        quorum = len(agents) if self.quorum is None else max(1, min(self.quorum, len(agents)))
+        finished = 0
+        deadline = None if self.deadline_s is None else time.monotonic() + self.deadline_s
+        cutoff = deadline
+        try:
+            while finished < len(tasks):
+                timeout = None if cutoff is None else cutoff - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    event, handled, finished_agent, error = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if error is not None:
+                    raise error
+                if event is None:
+                    finished += 1
+                    if finished == quorum and self.quorum is not None:
+                        grace_end = time.monotonic() + self.straggler_grace_s
+                        cutoff = grace_end if deadline is None else min(deadline, grace_end)
+                    yield None, finished_agent
+                    continue
+                yield event, None
+                handled.set()
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -3,40 +3,39 @@
 # PURPOSE:
 #   Provides a utility function `load_instructions_file` that reads plain text
 #   from a file — typically used to load prompt instructions or descriptions
-#   for LLM agents. If the file is not found or unreadable, a default string is returned.
+#   for LLM agents.
+#
+#   Kept for existing callers: the agents now use the prompt registry
+#   (utils/prompt_registry.py) directly, which caches and hot-reloads the files.
+#   This function reads through the same registry.
 # =============================================================================
 
-# Import the `os` module for working with file paths and environment context (not used here but common in loaders).
-import os
+import logging
+from typing import Optional
+
+from utils.prompt_registry import PromptNotFoundError, prompts
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------
 # FUNCTION: load_instructions_file
 # -----------------------------------------------------------------------------
-def load_instructions_file(filename: str, default: str = "") -> str:
+def load_instructions_file(filename: str, default: Optional[str] = None) -> str:
     """
     Loads instruction or description text from a given file path.
 
     Args:
-        filename (str): Path to the file to read (relative or absolute).
-        default (str): Default string to return if the file is not found or fails to load.
+        filename (str): Path to the file (absolute, or relative to the project folder).
+        default (str): Returned if the file is missing or empty. Without a
+            default, a missing or empty file raises PromptNotFoundError.
 
     Returns:
-        str: The file contents if successful, or the fallback default string.
+        str: The file contents, or the default.
     """
-
     try:
-        # Attempt to open the file in read mode with UTF-8 encoding.
-        # This ensures support for non-ASCII characters in prompt files.
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read()  # Read and return the entire contents of the file.
-
-    except FileNotFoundError:
-        # If the file doesn't exist, log a warning and fall back to the default value.
-        print(f"[WARNING] File not found: {filename}. Using default.")
-
-    except Exception as e:
-        # Catch any other exception (e.g. permission issues, IO errors) and log it.
-        print(f"[ERROR] Failed to load {filename}: {e}")
-
-    # Return the fallback default string if anything goes wrong.
-    return default
\ No newline at end of file
+        return prompts.get(filename)
+    except PromptNotFoundError:
+        if default is None:
+            raise
+        logger.warning("Prompt not found or empty: %s. Using default.", filename)
+        return default
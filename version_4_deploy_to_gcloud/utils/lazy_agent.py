@@ -0,0 +1,162 @@
+# =============================================================================
+# FILE: lazy_agent.py
+# PURPOSE:
+#   Builds the pipeline's sub-agents on first use instead of at import time.
+#
+#   Importing agents/root_website_builder/agent.py used to import all six
+#   stage modules, and each of them reads its instruction files and builds its
+#   agents (the research stage builds ten researchers). On Cloud Run that work
+#   happens during the cold start, before the first request is served.
+#
+#   A `LazyAgent` stands in for one stage. It only knows the stage's name and
+#   where the real agent lives ("agents.designer.agent:designer_agent"); the
+#   module is imported the first time the stage runs, and the LazyAgent then
+#   hands the run to the real agent. The import runs in a worker thread (a
+#   stage reads its prompt files and builds its agents), behind a lock so that
+#   concurrent runs build the stage once, and the event loop keeps serving.
+#
+#   `build_lazy_agents(root_agent)` builds every stage up front; with
+#   DEFERRED_STARTUP, main.py calls it right after the port is bound, so the
+#   first run does not pay for the stages and a broken stage (e.g. a missing
+#   prompt file) fails at startup instead of in the middle of a run.
+#
+#   The stand-in is transparent for the instrumentation helpers: features that
+#   use `agent_hooks.for_each_agent` (tracing, caches, checkpoints) are applied
+#   to the real agent as soon as it is built.
+#
+#   LAZY_AGENTS=FALSE builds every stage at import time again.
+# =============================================================================
+
+import asyncio
+import importlib
+import os
+import time
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from pydantic import PrivateAttr
+
+from utils.agent_hooks import iter_agents
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: lazy_agents_enabled
+# -----------------------------------------------------------------------------
+def lazy_agents_enabled() -> bool:
+    """True unless LAZY_AGENTS is set to FALSE."""
+    return os.environ.get("LAZY_AGENTS", "TRUE").upper() != "FALSE"
+
+
+def _import_target(target: str) -> BaseAgent:
+    """Imports "package.module:attribute" and returns the attribute."""
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: LazyAgent
+# -----------------------------------------------------------------------------
+class LazyAgent(BaseAgent):
+    """Stands in for the agent at `target` until it first runs."""
+
+    target: str   # "package.module:attribute" of the real agent
+
+    _agent: Optional[BaseAgent] = PrivateAttr(default=None)
+    _when_built: list = PrivateAttr(default_factory=list)
+    _build_seconds: Optional[float] = PrivateAttr(default=None)
+    _build_lock: Optional[asyncio.Lock] = PrivateAttr(default=None)
+
+    @property
+    def built(self) -> bool:
+        return self._agent is not None
+
+    @property
+    def build_seconds(self) -> Optional[float]:
+        """How long the import and construction took (None before the first run)."""
+        return self._build_seconds
+
+    def when_built(self, callback: Callable[[BaseAgent], Any]) -> None:
+        """Calls `callback(real_agent)` once the agent is built (now, if it already is)."""
+        if self._agent is not None:
+            callback(self._agent)
+        else:
+            self._when_built.append(callback)
+
+    def build(self) -> BaseAgent:
+        """Imports and returns the real agent (only the first call does any work)."""
+        if self._agent is None:
+            start = time.perf_counter()
+            self._adopt(_import_target(self.target), time.perf_counter() - start)
+        return self._agent
+
+    async def build_async(self) -> BaseAgent:
+        """Like build(), with the import in a worker thread; concurrent callers wait for one build."""
+        if self._agent is None:
+            if self._build_lock is None:
+                self._build_lock = asyncio.Lock()
+            async with self._build_lock:
+                if self._agent is None:
+                    start = time.perf_counter()
+                    agent = await asyncio.to_thread(_import_target, self.target)
+                    self._adopt(agent, time.perf_counter() - start)
+        return self._agent
+
+    def _adopt(self, agent: BaseAgent, seconds: float) -> None:
+        if self._agent is not None:
+            return
+        # The real agent takes the stand-in's place in the tree.
+        agent.parent_agent = self.parent_agent
+        self._agent = agent
+        self._build_seconds = seconds
+        callbacks, self._when_built = self._when_built, []
+        for callback in callbacks:
+            callback(agent)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        agent = await self.build_async()
+        async for event in agent.run_async(ctx):
+            yield event
+
+    async def _run_live_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        agent = await self.build_async()
+        async for event in agent.run_live(ctx):
+            yield event
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: lazy_agent
+# -----------------------------------------------------------------------------
+def lazy_agent(name: str, target: str, description: str = "") -> BaseAgent:
+    """
+    Returns a LazyAgent for the agent at `target`, or the agent itself when
+    LAZY_AGENTS=FALSE.
+
+    Args:
+        name (str): The real agent's name (the stand-in uses the same one).
+        target (str): "package.module:attribute" of the real agent.
+        description (str): Shown for the stand-in before it is built.
+    """
+    if not lazy_agents_enabled():
+        return _import_target(target)
+    return LazyAgent(name=name, target=target, description=description)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: build_lazy_agents
+# -----------------------------------------------------------------------------
+async def build_lazy_agents(root_agent: BaseAgent) -> dict[str, float]:
+    """
+    Builds every lazy stage below `root_agent`, one after the other. An error
+    (e.g. a missing prompt file) is raised here rather than when the stage runs.
+
+    Returns:
+        dict: The build time in seconds of each stage built, by name.
+    """
+    seconds = {}
+    for agent in list(iter_agents(root_agent)):
+        if isinstance(agent, LazyAgent) and not agent.built:
+            await agent.build_async()
+            seconds[agent.name] = agent.build_seconds
+    return seconds
@@ -0,0 +1,77 @@
+# =============================================================================
+# FILE: models.py
+# PURPOSE:
+#   One place that decides which model object every LlmAgent gets.
+#
+#   Agents call `get_model("gemini-2.5-flash-lite")` instead of passing the
+#   model name directly. Normally this just returns the name (ADK then uses
+#   Gemini), but it lets us swap the backend for the whole pipeline from the
+#   environment - e.g. USE_FAKE_LLM=TRUE selects the local FakeLlm for
+#   offline benchmarking, and MODEL_RATE_LIMITS puts every call behind the
+#   shared rate limiter. `get_cascade_model` does the same for a list of
+#   models tried cheapest first (MODEL_CASCADE=TRUE, see utils/cascade.py).
+# =============================================================================
+
+import os
+from typing import Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.registry import LLMRegistry
+
+from utils.cascade import CascadeLlm
+from utils.fake_llm import FakeLlm, fake_llm_enabled
+from utils.rate_limiter import RateLimitedLlm, get_rate_limiter
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_model
+# -----------------------------------------------------------------------------
+def get_model(model_name: str) -> Union[str, BaseLlm]:
+    """
+    Returns the model an agent should use.
+
+    Args:
+        model_name (str): The Gemini model the agent is designed for,
+            e.g. "gemini-2.5-flash-lite".
+
+    Returns:
+        Union[str, BaseLlm]: The model name itself, a FakeLlm when
+        USE_FAKE_LLM is enabled, and either of them wrapped in a
+        RateLimitedLlm when MODEL_RATE_LIMITS is set. Every variant keeps the
+        Gemini name because built-in tools such as google_search check it
+        before every call.
+    """
+    model: Union[str, BaseLlm] = FakeLlm(model=model_name) if fake_llm_enabled() else model_name
+
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        inner = model if isinstance(model, BaseLlm) else LLMRegistry.new_llm(model_name)
+        model = RateLimitedLlm(model=model_name, inner=inner, limiter=limiter)
+    return model
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_cascade_model
+# -----------------------------------------------------------------------------
+def get_cascade_model(model_names: list[str], validator) -> Union[str, BaseLlm]:
+    """
+    Returns a model that tries `model_names` cheapest first and only escalates
+    to the next one when `validator` rejects the answer.
+
+    Args:
+        model_names (list[str]): Gemini models, cheapest first.
+        validator: A validator from utils/validators.py.
+
+    Returns:
+        Union[str, BaseLlm]: A CascadeLlm when MODEL_CASCADE is enabled,
+        otherwise get_model(model_names[0]) - the stage behaves as before.
+        Every tier goes through get_model, so fake models and rate limits apply.
+    """
+    if os.environ.get("MODEL_CASCADE", "FALSE").upper() != "TRUE" or len(model_names) < 2:
+        return get_model(model_names[0])
+
+    tiers = []
+    for model_name in model_names:
+        model = get_model(model_name)
+        tiers.append(model if isinstance(model, BaseLlm) else LLMRegistry.new_llm(model_name))
+    return CascadeLlm(model=model_names[0], tiers=tiers, validator=validator)
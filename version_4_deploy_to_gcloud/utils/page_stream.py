@@ -0,0 +1,384 @@
+# =============================================================================
+# FILE: page_stream.py
+# PURPOSE:
+#   Streams the page that code_writer_agent is writing into a preview file
+#   while the model is still generating it.
+#
+#   code_writer_agent first shows the page in an ```html block and then calls
+#   write_to_file with the same code. Without streaming, nothing is on disk
+#   until the last token has arrived and the tool has run.
+#
+#   With STREAMING_PAGE=TRUE, the instrumented agent (code_writer_agent)
+#   runs in SSE streaming mode - only that agent: the other stages keep
+#   their single, non-partial responses, so their callbacks, caches and
+#   cascades work as without streaming - and:
+#     - every partial model response is scanned for the ```html block, and its
+#       text is appended to a preview file as it arrives
+#       (output/<run>_preview.html), so the page can be opened - and a browser
+#       renders it progressively - after a few seconds;
+#     - the preview is also served at GET /previews/<invocation id>, which
+#       keeps the response open and sends new bytes as they are written. When
+#       the page is saved, the reader gets the rest of the final file if the
+#       preview was the start of it; otherwise the response ends there. The
+#       preview is model output, so it is sandboxed like the artifact routes
+#       (Content-Security-Policy: sandbox, X-Content-Type-Options: nosniff);
+#     - the final page is still written atomically by write_to_file (or, if
+#       the model never calls the tool, from the complete block when the agent
+#       finishes, through the same save_page - so it also lands in the
+#       artifact store when ARTIFACT_STORE is set), and the preview file is
+#       removed;
+#     - time to first byte and total time of every streamed page are kept for
+#       `report()`.
+#
+#   The preview file name and URL are put in the session state
+#   (page_preview_file / page_preview_url).
+# =============================================================================
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from utils.agent_hooks import add_callback
+from utils.output_writer import OutputWriter, get_output_writer
+
+# Start of the page: an ```html fence, or the document itself.
+_FENCE_START = re.compile(r"```html[^\n]*\n", re.IGNORECASE)
+_DOCUMENT_START = re.compile(r"<!doctype html|<html[\s>]", re.IGNORECASE)
+_FENCE_END = "```"
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: streaming_pages_enabled
+# -----------------------------------------------------------------------------
+def streaming_pages_enabled() -> bool:
+    """True if STREAMING_PAGE is set to TRUE."""
+    return os.environ.get("STREAMING_PAGE", "FALSE").upper() == "TRUE"
+
+
+# -----------------------------------------------------------------------------
+# CLASS: HtmlBlockExtractor
+# -----------------------------------------------------------------------------
+class HtmlBlockExtractor:
+    """
+    Finds the HTML page in text that arrives in pieces, and returns the page's
+    text piece by piece. Fences and surrounding prose are left out; a closing
+    fence split across two pieces is handled.
+    """
+
+    def __init__(self) -> None:
+        self.state = "searching"   # -> "inside" -> "done"
+        self._pending = ""
+        self._fenced = False
+        self._tail = ""          # last characters of the page, to find a split </html>
+
+    def feed(self, text: str) -> str:
+        """Returns the page text contained in `text` (may be empty)."""
+        if self.state == "done" or not text:
+            return ""
+        self._pending += text
+        if self.state == "searching":
+            fence = _FENCE_START.search(self._pending)
+            document = _DOCUMENT_START.search(self._pending)
+            if fence and (not document or fence.start() < document.start()):
+                self._pending, self._fenced = self._pending[fence.end():], True
+            elif document and not fence:
+                self._pending = self._pending[document.start():]
+            else:
+                # Keep just enough text to recognise a start marker split across pieces.
+                self._pending = self._pending[-32:]
+                return ""
+            self.state = "inside"
+
+        if self._fenced:
+            end = self._pending.find(_FENCE_END)
+            if end >= 0:
+                page, self._pending, self.state = self._pending[:end], "", "done"
+                return page
+            # Hold back trailing backticks: they may be the start of the closing fence.
+            keep = len(self._pending) - len(self._pending.rstrip("`"))
+            page, self._pending = self._pending[:len(self._pending) - keep], self._pending[len(self._pending) - keep:]
+            return page
+        # Without a fence the page ends at </html> (which may be split across pieces).
+        page, self._pending = self._pending, ""
+        combined = (self._tail + page).lower()
+        end = combined.find("</html>")
+        if end >= 0:
+            page, self.state = page[:end + len("</html>") - len(self._tail)], "done"
+        self._tail = (self._tail + page)[-6:]
+        return page
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: PageStream
+# -----------------------------------------------------------------------------
+@dataclass
+class PageStream:
+    """The preview of one run's page."""
+    run_id: str
+    agent_name: str
+    preview_path: Path
+    model_started: float
+    extractor: HtmlBlockExtractor = field(default_factory=HtmlBlockExtractor)
+    written: int = 0
+    first_byte_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    final_path: Optional[str] = None
+    status: str = "streaming"
+    _file: Any = None
+
+    def append(self, text: str) -> None:
+        if self._file is None:
+            self._file = open(self.preview_path, "a", encoding="utf-8")
+        self._file.write(text)
+        # Flush every piece so readers of the preview see it right away.
+        self._file.flush()
+        self.written += len(text)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def timings(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "agent": self.agent_name,
+            "status": self.status,
+            "chars": self.written,
+            "first_byte_s": round(self.first_byte_at - self.model_started, 3) if self.first_byte_at else None,
+            "total_s": round(self.finished_at - self.model_started, 3) if self.finished_at else None,
+            "file": self.final_path,
+        }
+
+
+# -----------------------------------------------------------------------------
+# CLASS: PageStreamer
+# -----------------------------------------------------------------------------
+class PageStreamer:
+    """Writes the page of each run into a preview file while it is generated."""
+
+    def __init__(self, writer: OutputWriter, keep_finished: int = 200) -> None:
+        self.writer = writer
+        self.keep_finished = keep_finished
+        self._streams: dict[str, PageStream] = {}
+        self._model_started: dict[str, float] = {}
+        self._pending_extractors: dict[str, HtmlBlockExtractor] = {}   # runs whose page has not started yet
+        self._lock = threading.Lock()
+
+    # --- Wiring ---------------------------------------------------------------
+    def instrument(self, agent: Any) -> Any:
+        """Streams the pages written by `agent` (e.g. code_writer_agent), running it in SSE mode."""
+        add_callback(agent, "before_agent_callback", self.before_agent, first=True)
+        add_callback(agent, "before_model_callback", self.before_model)
+        add_callback(agent, "after_model_callback", self.after_model)
+        add_callback(agent, "after_agent_callback", self.after_agent)
+        return agent
+
+    def stream(self, run_id: str) -> Optional[PageStream]:
+        return self._streams.get(run_id)
+
+    # --- Streaming --------------------------------------------------------------
+    def _open(self, run_id: str, agent_name: str, extractor: HtmlBlockExtractor) -> PageStream:
+        self.writer.directory.mkdir(parents=True, exist_ok=True)
+        name = self.writer.unique_name(run_id=run_id, suffix="preview.html")
+        stream = PageStream(run_id=run_id, agent_name=agent_name, preview_path=self.writer.directory / name,
+                            model_started=self._model_started.get(run_id, time.perf_counter()), extractor=extractor)
+        with self._lock:
+            self._streams[run_id] = stream
+            # Forget the oldest finished runs.
+            finished = [key for key, old in self._streams.items() if old.finished_at]
+            for key in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._streams[key]
+        return stream
+
+    async def on_text(self, run_id: str, agent_name: str, text: str) -> Optional[PageStream]:
+        """
+        Feeds one piece of streamed model text; appends the page part of it to
+        the run's preview file (opened on the first page text).
+
+        Returns:
+            PageStream: The run's stream, or None if no page has started yet.
+        """
+        stream = self._streams.get(run_id)
+        if stream is not None:
+            if stream.finished_at:
+                return stream
+            extractor = stream.extractor
+        else:
+            # Until the page starts, the extractor (and the text it buffered) waits here.
+            extractor = self._pending_extractors.setdefault(run_id, HtmlBlockExtractor())
+        page_text = extractor.feed(text)
+        if stream is None:
+            if extractor.state == "searching":
+                return None
+            del self._pending_extractors[run_id]
+            stream = self._open(run_id, agent_name, extractor)
+        if page_text:
+            await asyncio.to_thread(stream.append, page_text)
+            if stream.first_byte_at is None:
+                stream.first_byte_at = time.perf_counter()
+        return stream
+
+    async def finish(self, run_id: str, final_path: Optional[str], status: str = "committed") -> None:
+        """Marks the run's page as written to `final_path` and removes its preview file."""
+        stream = self._streams.get(run_id)
+        self._model_started.pop(run_id, None)
+        self._pending_extractors.pop(run_id, None)
+        if stream is None or stream.finished_at:
+            return
+        stream.finished_at = time.perf_counter()
+        stream.final_path, stream.status = final_path, status
+        stream.close()
+        await asyncio.to_thread(_remove, stream.preview_path)
+
+    # --- ADK callbacks ------------------------------------------------------------
+    def before_agent(self, callback_context) -> None:
+        """Turns on SSE streaming for this agent's run only (each agent runs with its own context copy)."""
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+
+        invocation = callback_context._invocation_context
+        run_config = invocation.run_config or RunConfig()
+        if run_config.streaming_mode != StreamingMode.SSE:
+            invocation.run_config = run_config.model_copy(update={"streaming_mode": StreamingMode.SSE})
+        return None
+
+    def before_model(self, callback_context, llm_request) -> None:
+        self._model_started.setdefault(callback_context.invocation_id, time.perf_counter())
+        return None
+
+    async def after_model(self, callback_context, llm_response) -> None:
+        # Only the partial responses are fed: in SSE mode the final response
+        # repeats the whole text that the partial ones already delivered.
+        if not llm_response.partial or not llm_response.content or not llm_response.content.parts:
+            return None
+        text = "".join(part.text for part in llm_response.content.parts if part.text and not part.thought)
+        run_id = callback_context.invocation_id
+        had_stream = run_id in self._streams
+        stream = await self.on_text(run_id, callback_context.agent_name, text)
+        if stream is not None and not had_stream:
+            callback_context.state["page_preview_file"] = stream.preview_path.as_posix()
+            callback_context.state["page_preview_url"] = f"/previews/{run_id}"
+        return None
+
+    async def after_agent(self, callback_context) -> None:
+        """Commits a complete page the model did not save itself; drops an incomplete preview."""
+        run_id = callback_context.invocation_id
+        stream = self._streams.get(run_id)
+        if stream is None or stream.finished_at:
+            self._model_started.pop(run_id, None)
+            self._pending_extractors.pop(run_id, None)
+            return None
+        if stream.extractor.state == "done":
+            # Saved the way write_to_file saves (artifact store or output folder).
+            from tools.file_writer_tool import save_page
+
+            content = await asyncio.to_thread(stream.preview_path.read_text, encoding="utf-8")
+            result = await save_page(content, callback_context)
+            await self.finish(stream.run_id, result["file"])   # save_page already did, for the shared streamer
+            stream.status = "committed_from_stream"
+        else:
+            await self.finish(stream.run_id, None, status="incomplete")
+        return None
+
+    # --- Reading the preview --------------------------------------------------------
+    async def follow(self, run_id: str, poll_s: float = 0.1) -> AsyncIterator[bytes]:
+        """
+        Yields the preview's bytes as they are written, until the page is
+        finished. Then the rest of the final file follows if the preview was
+        its start; otherwise (the final page differs) the stream ends there.
+        """
+        stream = self._streams[run_id]
+        position = 0
+        sent = hashlib.sha256()
+        while stream.finished_at is None:
+            try:
+                chunk = await asyncio.to_thread(_read_from, stream.preview_path, position)
+            except FileNotFoundError:
+                chunk = b""   # Not created yet, or removed because the page was just finished
+            if chunk:
+                position += len(chunk)
+                sent.update(chunk)
+                yield chunk
+            elif stream.finished_at is None:
+                await asyncio.sleep(poll_s)
+
+        if stream.final_path:
+            try:
+                final = await asyncio.to_thread(Path(stream.final_path).read_bytes)
+            except FileNotFoundError:
+                return
+            if hashlib.sha256(final[:position]).digest() == sent.digest() and len(final) > position:
+                yield final[position:]
+
+    # --- Reporting ------------------------------------------------------------------
+    def report(self) -> dict:
+        """Per streamed page: status, characters, time to first byte and total time."""
+        runs = [stream.timings() for stream in self._streams.values()]
+        first_bytes = sorted(run["first_byte_s"] for run in runs if run["first_byte_s"] is not None)
+        totals = sorted(run["total_s"] for run in runs if run["total_s"] is not None)
+        return {
+            "pages": len(runs),
+            "first_byte_s_p50": first_bytes[len(first_bytes) // 2] if first_bytes else None,
+            "total_s_p50": totals[len(totals) // 2] if totals else None,
+            "runs": runs,
+        }
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _read_from(path: Path, position: int) -> bytes:
+    with open(path, "rb") as file:
+        file.seek(position)
+        return file.read()
+
+
+_shared_streamer: Optional[PageStreamer] = None
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_page_streamer
+# -----------------------------------------------------------------------------
+def get_page_streamer() -> Optional[PageStreamer]:
+    """
+    Returns the process-wide PageStreamer if STREAMING_PAGE=TRUE, otherwise
+    None. Every caller gets the same instance.
+    """
+    global _shared_streamer
+    if _shared_streamer is None and streaming_pages_enabled():
+        _shared_streamer = PageStreamer(get_output_writer())
+    return _shared_streamer
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: page_preview_router
+# -----------------------------------------------------------------------------
+def page_preview_router(streamer: PageStreamer) -> Any:
+    """The GET /previews/{run_id} route, ready for `app.include_router(...)`."""
+    from fastapi import APIRouter, HTTPException
+    from fastapi.responses import StreamingResponse
+
+    from utils.artifact_routes import PAGE_SECURITY_HEADERS
+
+    router = APIRouter(prefix="/previews", tags=["previews"])
+
+    @router.get("/{run_id}")
+    async def page_preview(run_id: str) -> StreamingResponse:
+        if streamer.stream(run_id) is None:
+            raise HTTPException(status_code=404, detail="No page is being written for this run")
+        # no-store: the preview changes until the page is finished.
+        return StreamingResponse(streamer.follow(run_id), media_type="text/html; charset=utf-8",
+                                 headers={"cache-control": "no-store", "x-accel-buffering": "no",
+                                          **PAGE_SECURITY_HEADERS})
+
+    return router
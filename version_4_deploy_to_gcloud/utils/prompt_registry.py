@@ -0,0 +1,260 @@
+# =============================================================================
+# FILE: prompt_registry.py
+# PURPOSE:
+#   One registry for every prompt file (instructions.txt / description.txt)
+#   the agents use. It replaces `load_instructions_file`, which
+#     - resolved paths against the current working directory,
+#     - read the file again on every call,
+#     - printed a warning and returned "" for a missing file, so an agent
+#       could quietly run with an empty prompt.
+#
+#   The registry instead:
+#     - resolves names like "agents/designer/instructions.txt" against the
+#       project folder, wherever the process was started from;
+#     - caches every file, keyed by its mtime and size;
+#     - fails fast: a missing or empty prompt raises PromptNotFoundError when
+#       the agent module is imported;
+#     - hot-reloads: agents record which field comes from which prompt with
+#       `prompts.bind(...)`, and `prompts.instrument(root_agent)` checks
+#       the files (at most once per PROMPT_RELOAD_INTERVAL_S) before an agent
+#       runs and puts the changed text into the live agents. No restart is
+#       needed;
+#     - reports the size of each prompt, with an estimated token count.
+#
+#   PROMPT_HOT_RELOAD=FALSE turns the file checks off (e.g. in production).
+#
+#   Usage (from the version_4_deploy_to_gcloud folder), to list every prompt
+#   file with its size:
+#       uv run python -m utils.prompt_registry
+# =============================================================================
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from utils.agent_hooks import add_callback, for_each_agent
+
+logger = logging.getLogger(__name__)
+
+# The project folder (version_4_deploy_to_gcloud); prompt names are relative to it.
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Rough size of a token in characters for English prompts (Gemini averages about 4).
+CHARS_PER_TOKEN = 4
+
+
+class PromptNotFoundError(FileNotFoundError):
+    """A prompt file is missing, unreadable or empty."""
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: Prompt
+# -----------------------------------------------------------------------------
+@dataclass
+class Prompt:
+    """One cached prompt file."""
+    name: str
+    path: Path
+    text: str
+    mtime_ns: int
+    size: int
+    loads: int = 1
+
+    @property
+    def token_estimate(self) -> int:
+        return math.ceil(len(self.text) / CHARS_PER_TOKEN)
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: Binding
+# -----------------------------------------------------------------------------
+@dataclass
+class Binding:
+    """An agent field whose value is rendered from a prompt."""
+    agent: Any
+    field_name: str
+    prompt_name: str
+    render: Optional[Callable[[str], str]] = None
+
+    def apply(self, text: str) -> str:
+        value = self.render(text) if self.render else text
+        setattr(self.agent, self.field_name, value)
+        return value
+
+
+# -----------------------------------------------------------------------------
+# CLASS: PromptRegistry
+# -----------------------------------------------------------------------------
+@dataclass
+class PromptRegistry:
+    """Loads, caches and hot-reloads the prompt files of the project."""
+
+    base_dir: Path = PROJECT_DIR
+    hot_reload: bool = True
+    reload_interval_s: float = 1.0
+    reloads: int = 0
+
+    _prompts: dict = field(default_factory=dict)       # name -> Prompt
+    _bindings: list = field(default_factory=list)      # Binding
+    _broken: dict = field(default_factory=dict)        # name -> (mtime_ns, size) of a bad version, logged once
+    _last_check: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    # --- Loading ---------------------------------------------------------------
+    def path_for(self, name: Union[str, Path]) -> Path:
+        """Absolute path of a prompt; relative names are resolved against base_dir."""
+        path = Path(name)
+        return path if path.is_absolute() else self.base_dir / path
+
+    def _read(self, name: str) -> Prompt:
+        path = self.path_for(name)
+        try:
+            stat = path.stat()
+            text = path.read_text(encoding="utf-8")
+        except OSError as error:
+            raise PromptNotFoundError(f"Prompt {name!r} could not be read from {path}: {error}") from error
+        if not text.strip():
+            raise PromptNotFoundError(f"Prompt {name!r} at {path} is empty")
+        return Prompt(name=name, path=path, text=text, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+    def prompt(self, name: str) -> Prompt:
+        """The cached prompt, read from disk the first time (raises PromptNotFoundError)."""
+        with self._lock:
+            prompt = self._prompts.get(name)
+            if prompt is None:
+                prompt = self._prompts[name] = self._read(name)
+            return prompt
+
+    def get(self, name: str) -> str:
+        """The text of a prompt (raises PromptNotFoundError)."""
+        return self.prompt(name).text
+
+    def bind(self, agent: Any, field_name: str, name: str, render: Optional[Callable[[str], str]] = None) -> str:
+        """
+        Sets `agent.<field_name>` from a prompt, and keeps it up to date on reload.
+
+        Args:
+            agent: The agent to update (an LlmAgent, or any agent for descriptions).
+            field_name (str): e.g. "instruction" or "description".
+            name (str): The prompt name, e.g. "agents/designer/instructions.txt".
+            render (Callable): Optional; builds the field value from the prompt
+                text (e.g. to put a header in front of shared instructions).
+
+        Returns:
+            str: The value that was set.
+        """
+        binding = Binding(agent, field_name, name, render)
+        value = binding.apply(self.get(name))
+        with self._lock:
+            self._bindings.append(binding)
+        return value
+
+    def bind_agent(self, agent: Any, **fields: str) -> Any:
+        """
+        Binds several fields of one agent, e.g.
+        `prompts.bind_agent(agent, instruction="agents/x/instructions.txt", description="agents/x/description.txt")`.
+
+        Returns:
+            The same agent, for convenient chaining.
+        """
+        for field_name, name in fields.items():
+            self.bind(agent, field_name, name)
+        return agent
+
+    # --- Hot reload --------------------------------------------------------------
+    def refresh(self, force: bool = False) -> list[str]:
+        """
+        Re-reads the prompt files that changed on disk and updates the bound
+        agents. A file that became missing or empty keeps its old text.
+
+        Returns:
+            list[str]: Names of the prompts that were reloaded.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_check < self.reload_interval_s:
+                return []
+            self._last_check = now
+            changed = []
+            for name, prompt in list(self._prompts.items()):
+                try:
+                    stat = prompt.path.stat()
+                    version = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    version = None
+                if version == (prompt.mtime_ns, prompt.size) or version == self._broken.get(name, ()):
+                    continue
+                try:
+                    new_prompt = self._read(name)
+                except PromptNotFoundError as error:
+                    self._broken[name] = version
+                    logger.error("%s; keeping the loaded text", error)
+                    continue
+                self._broken.pop(name, None)
+                new_prompt.loads = prompt.loads + 1
+                self._prompts[name] = new_prompt
+                if new_prompt.text != prompt.text:
+                    changed.append(name)
+            for binding in self._bindings:
+                if binding.prompt_name in changed:
+                    binding.apply(self._prompts[binding.prompt_name].text)
+        if changed:
+            self.reloads += len(changed)
+            logger.info("Reloaded prompts: %s", ", ".join(changed))
+        return changed
+
+    def before_agent(self, callback_context) -> None:
+        self.refresh()
+        return None
+
+    def instrument(self, root_agent: Any) -> Any:
+        """
+        Checks for changed prompt files before every agent run (if hot reload
+        is on), so edits take effect in the running process.
+
+        Returns:
+            The same root agent, for convenient chaining.
+        """
+        if self.hot_reload:
+            for_each_agent(root_agent, lambda agent: add_callback(agent, "before_agent_callback", self.before_agent, first=True))
+        return root_agent
+
+    # --- Reporting ---------------------------------------------------------------
+    def report(self) -> dict:
+        """Per prompt: path, characters, estimated tokens, loads and the agent fields it feeds."""
+        with self._lock:
+            bound_to: dict[str, list[str]] = {}
+            for binding in self._bindings:
+                bound_to.setdefault(binding.prompt_name, []).append(f"{binding.agent.name}.{binding.field_name}")
+            return {
+                name: {
+                    "path": str(prompt.path),
+                    "chars": len(prompt.text),
+                    "token_estimate": prompt.token_estimate,
+                    "loads": prompt.loads,
+                    "bound_to": bound_to.get(name, []),
+                }
+                for name, prompt in sorted(self._prompts.items())
+            }
+
+
+# The registry every agent module uses.
+prompts = PromptRegistry(
+    hot_reload=os.environ.get("PROMPT_HOT_RELOAD", "TRUE").upper() != "FALSE",
+    reload_interval_s=float(os.environ.get("PROMPT_RELOAD_INTERVAL_S", "1")),
+)
+
+
+if __name__ == "__main__":
+    for prompt_path in sorted(PROJECT_DIR.glob("agents/*/*.txt")):
+        try:
+            prompts.get(prompt_path.relative_to(PROJECT_DIR).as_posix())
+        except PromptNotFoundError as error:
+            print(f"   skipped: {error}")
+    for prompt_name, entry in prompts.report().items():
+        print(f"{entry['token_estimate']:>7} tokens  {entry['chars']:>7} chars  {prompt_name}")
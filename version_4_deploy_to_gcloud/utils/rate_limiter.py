@@ -0,0 +1,413 @@
+# =============================================================================
+# FILE: rate_limiter.py
+# PURPOSE:
+#   One process-wide gate in front of every Gemini call, so several sessions
+#   running at once (e.g. behind main.py on Cloud Run) share the project's
+#   quota instead of each retrying on its own after a 429.
+#
+#   Per model it enforces:
+#     - requests per minute and tokens per minute (token buckets)
+#     - an adaptive concurrency limit (AIMD): +1 slot per "window" of
+#       successful calls, halved on a 429, reduced when the time per output
+#       token climbs well above its recent best (per token, so a long page
+#       and a one-line answer sharing a model are compared fairly)
+#     - a shared cool-down after a 429, so waiting calls back off together
+#       instead of stampeding the API again
+#   Waiting calls are served in priority order: interactive turns first,
+#   batch jobs after them (see `use_priority`).
+#
+#   `RateLimitedLlm` wraps any model (Gemini or FakeLlm) and is what
+#   utils.models.get_model() returns when the limiter is enabled. Tools that
+#   call Gemini themselves (e.g. the search backend) use `limiter.acquire()`.
+#
+#   Switching it on:
+#       MODEL_RATE_LIMITS='{"gemini-2.5-flash-lite": {"rpm": 1000, "tpm": 1000000}}'
+#   or MODEL_RATE_LIMITS=path/to/limits.json. The key "*" sets the limits for
+#   models that are not listed. Per model: rpm, tpm, max_concurrency.
+# =============================================================================
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Iterator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+# Environment variable with the per-model limits (JSON text or a JSON file path).
+RATE_LIMITS_ENV = "MODEL_RATE_LIMITS"
+
+# Lower number = served first.
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Calls with fewer output tokens say little about generation speed (their time
+# is mostly the time to the first token), so they do not feed the latency signal.
+MIN_LATENCY_SAMPLE_TOKENS = 64
+# How far the best time per token moves towards each new sample, so that one
+# unusually fast call does not stay the baseline for good.
+BASELINE_DRIFT = 0.05
+
+# The priority of the calls made by the current task (inherited by sub-tasks).
+current_priority: contextvars.ContextVar[str] = contextvars.ContextVar("model_call_priority", default="interactive")
+
+
+@contextlib.contextmanager
+def use_priority(priority: str) -> Iterator[None]:
+    """Runs the enclosed code (and the tasks it creates) at `priority`."""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: TokenBucket
+# -----------------------------------------------------------------------------
+class TokenBucket:
+    """A bucket refilled continuously at `per_minute`, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.per_minute = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        self._refill()
+        amount = min(amount, self.per_minute)   # A request bigger than the bucket waits for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        """Takes `amount` (the level may go below zero to pay back an underestimate)."""
+        self._refill()
+        self.level -= amount
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: ModelStats
+# -----------------------------------------------------------------------------
+@dataclass
+class ModelStats:
+    """Counters for one model."""
+    requests: int = 0
+    throttled: int = 0                       # 429 / RESOURCE_EXHAUSTED answers
+    retries: int = 0
+    queue_wait_total_s: float = 0.0
+    queue_wait_max_s: float = 0.0
+    recent_waits: deque = field(default_factory=lambda: deque(maxlen=500))
+    waits_by_priority: dict = field(default_factory=dict)
+
+    def record_wait(self, wait_s: float, priority: str) -> None:
+        self.requests += 1
+        self.queue_wait_total_s += wait_s
+        self.queue_wait_max_s = max(self.queue_wait_max_s, wait_s)
+        self.recent_waits.append(wait_s)
+        per_priority = self.waits_by_priority.setdefault(priority, {"requests": 0, "wait_total_s": 0.0})
+        per_priority["requests"] += 1
+        per_priority["wait_total_s"] += wait_s
+
+
+# -----------------------------------------------------------------------------
+# CLASS: ModelGate
+# -----------------------------------------------------------------------------
+class ModelGate:
+    """The buckets, concurrency limit and waiting queue of one model."""
+
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.limit = float(max(1, max_concurrency // 2))   # AIMD starts in the middle
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.waiters: list = []                            # heap of (priority, seq, tokens, future)
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.best_s_per_token: Optional[float] = None
+        self.consecutive_429 = 0
+        self.stats = ModelStats()
+
+
+# -----------------------------------------------------------------------------
+# CLASS: Permit
+# -----------------------------------------------------------------------------
+class Permit:
+    """One admitted call. Report how it went with `done()`."""
+
+    def __init__(self, limiter: "RateLimiter", gate: ModelGate, reserved_tokens: int) -> None:
+        self._limiter = limiter
+        self._gate = gate
+        self._reserved = reserved_tokens
+        self._start = time.monotonic()
+        self._released = False
+
+    def done(self, used_tokens: Optional[int] = None, throttled: bool = False,
+             output_tokens: Optional[int] = None) -> None:
+        """Releases the slot and feeds the outcome to the AIMD controller."""
+        self._finish(used_tokens, throttled, output_tokens, feedback=True)
+
+    def cancel(self, used_tokens: Optional[int] = None) -> None:
+        """Releases the slot of a call that was cancelled or failed, without feeding the AIMD controller."""
+        self._finish(used_tokens, False, None, feedback=False)
+
+    def _finish(self, used_tokens: Optional[int], throttled: bool, output_tokens: Optional[int],
+                feedback: bool) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._limiter._release(self._gate, time.monotonic() - self._start, used_tokens,
+                               self._reserved, throttled, output_tokens, feedback)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: RateLimiter
+# -----------------------------------------------------------------------------
+class RateLimiter:
+    """Process-wide admission control for model calls."""
+
+    def __init__(self, limits: dict) -> None:
+        self.limits = limits
+        self._gates: dict[str, ModelGate] = {}
+        self._seq = itertools.count()
+
+    def _gate(self, model: str) -> ModelGate:
+        gate = self._gates.get(model)
+        if gate is None:
+            config = self.limits.get(model) or self.limits.get("*") or {}
+            gate = ModelGate(
+                rpm=float(config.get("rpm", 60)),
+                tpm=float(config.get("tpm", 1_000_000)),
+                max_concurrency=int(config.get("max_concurrency", 16)),
+            )
+            self._gates[model] = gate
+        return gate
+
+    # --- Admission ------------------------------------------------------------
+    async def acquire(self, model: str, tokens: int, priority: Optional[str] = None) -> Permit:
+        """
+        Waits until a call to `model` using about `tokens` tokens may start.
+        Always call `permit.done()` afterwards.
+        """
+        priority = priority or current_priority.get()
+        gate = self._gate(model)
+        future = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        heapq.heappush(gate.waiters, (PRIORITIES.get(priority, len(PRIORITIES)), next(self._seq), tokens, future))
+        self._pump(gate)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: give the slot (and the tokens) back.
+                Permit(self, gate, tokens).cancel(used_tokens=0)
+            raise
+        gate.stats.record_wait(time.monotonic() - queued_at, priority)
+        return Permit(self, gate, tokens)
+
+    def _pump(self, gate: ModelGate) -> None:
+        """Admits waiting calls in priority order while budget and slots allow."""
+        if gate.timer is not None:
+            gate.timer.cancel()
+            gate.timer = None
+        while gate.waiters:
+            _, _, tokens, future = gate.waiters[0]
+            if future.cancelled():
+                heapq.heappop(gate.waiters)
+                continue
+            if gate.in_flight >= int(gate.limit):
+                return   # A finishing call pumps again
+            wait_s = max(gate.paused_until - time.monotonic(),
+                         gate.requests.wait_time(1), gate.tokens.wait_time(tokens))
+            if wait_s > 0:
+                gate.timer = asyncio.get_running_loop().call_later(wait_s, self._pump, gate)
+                return
+            heapq.heappop(gate.waiters)
+            gate.requests.take(1)
+            gate.tokens.take(tokens)
+            gate.in_flight += 1
+            future.set_result(None)
+
+    def _release(self, gate: ModelGate, latency_s: float, used_tokens: Optional[int],
+                 reserved_tokens: int, throttled: bool, output_tokens: Optional[int] = None,
+                 feedback: bool = True) -> None:
+        gate.in_flight -= 1
+        if used_tokens is not None:
+            # Settle the difference between the estimate and the real usage.
+            gate.tokens.take(used_tokens - reserved_tokens)
+
+        if not feedback:
+            pass   # Cancelled or failed: says nothing about the backend's capacity
+        elif throttled:
+            # Multiplicative decrease, plus a shared cool-down that grows with
+            # every 429 in a row (with jitter, so waiters do not wake together).
+            gate.stats.throttled += 1
+            gate.consecutive_429 += 1
+            gate.limit = max(1.0, gate.limit / 2)
+            backoff = min(60.0, 2 ** gate.consecutive_429) * random.uniform(0.75, 1.25)
+            gate.paused_until = max(gate.paused_until, time.monotonic() + backoff)
+        else:
+            gate.consecutive_429 = 0
+            s_per_token = latency_s / output_tokens if output_tokens and output_tokens >= MIN_LATENCY_SAMPLE_TOKENS else None
+            if s_per_token is not None:
+                if gate.best_s_per_token is None or s_per_token < gate.best_s_per_token:
+                    gate.best_s_per_token = s_per_token
+                else:
+                    gate.best_s_per_token += (s_per_token - gate.best_s_per_token) * BASELINE_DRIFT
+            if s_per_token is not None and s_per_token > 4 * gate.best_s_per_token and latency_s > 5:
+                # The backend is generating more slowly: back off a little.
+                gate.limit = max(1.0, gate.limit * 0.9)
+            else:
+                # Additive increase: about +1 slot per `limit` successful calls.
+                gate.limit = min(float(gate.max_concurrency), gate.limit + 1 / gate.limit)
+        self._pump(gate)
+
+    def record_retry(self, model: str) -> None:
+        self._gate(model).stats.retries += 1
+
+    # --- Reporting ------------------------------------------------------------
+    def report(self) -> dict:
+        """Per-model counters, including queue wait times."""
+        report = {}
+        for model, gate in self._gates.items():
+            stats = gate.stats
+            waits = sorted(stats.recent_waits)
+            report[model] = {
+                "requests": stats.requests,
+                "throttled": stats.throttled,
+                "retries": stats.retries,
+                "concurrency_limit": round(gate.limit, 2),
+                "in_flight": gate.in_flight,
+                "waiting": len(gate.waiters),
+                "queue_wait_avg_s": round(stats.queue_wait_total_s / stats.requests, 3) if stats.requests else 0.0,
+                "queue_wait_p95_s": round(waits[int(len(waits) * 0.95)] if waits else 0.0, 3),
+                "queue_wait_max_s": round(stats.queue_wait_max_s, 3),
+                "by_priority": {
+                    name: {"requests": item["requests"],
+                           "queue_wait_avg_s": round(item["wait_total_s"] / item["requests"], 3)}
+                    for name, item in stats.waits_by_priority.items()
+                },
+            }
+        return report
+
+
+# -----------------------------------------------------------------------------
+# CLASS: RateLimitedLlm
+# -----------------------------------------------------------------------------
+class RateLimitedLlm(BaseLlm):
+    """
+    Any model, behind the shared RateLimiter. Calls throttled with a 429 are
+    retried (up to `max_retries`) after the shared cool-down.
+    """
+
+    inner: BaseLlm
+    limiter: Any
+    max_retries: int = 4
+    expected_output_tokens: int = 1024
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimate = estimate_request_tokens(llm_request, self.expected_output_tokens)
+        for attempt in range(self.max_retries + 1):
+            permit = await self.limiter.acquire(self.model, estimate)
+            yielded = False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    if is_throttled_response(response):
+                        if not yielded and attempt < self.max_retries:
+                            raise _Throttled()
+                        permit.done(throttled=True)   # The last attempt: passed on, but still a 429
+                    if not response.partial and response.usage_metadata is not None:
+                        usage = response.usage_metadata
+                        permit.done(used_tokens=usage.total_token_count, output_tokens=usage.candidates_token_count)
+                    yielded = True
+                    yield response
+                permit.done()
+                return
+            except _Throttled:
+                permit.done(throttled=True)
+            except Exception as error:
+                if is_throttled_error(error):
+                    permit.done(throttled=True)
+                if yielded or attempt >= self.max_retries or not is_throttled_error(error):
+                    raise
+            finally:
+                # Cancelled, or failed with another error: release without feedback.
+                permit.cancel()
+            self.limiter.record_retry(self.model)
+
+
+class _Throttled(Exception):
+    """A 429 answer that arrived as a response instead of an exception."""
+
+
+# -----------------------------------------------------------------------------
+# HELPERS
+# -----------------------------------------------------------------------------
+def estimate_request_tokens(llm_request: LlmRequest, expected_output_tokens: int) -> int:
+    """A rough token count (4 characters per token) for the request plus its answer."""
+    chars = 0
+    config = llm_request.config
+    if config is not None and isinstance(config.system_instruction, str):
+        chars += len(config.system_instruction)
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call or part.function_response:
+                chars += len(str(part.function_call or part.function_response))
+    max_output = config.max_output_tokens if config is not None and config.max_output_tokens else expected_output_tokens
+    return chars // 4 + max_output
+
+
+def is_throttled_error(error: Exception) -> bool:
+    """True for quota errors (HTTP 429 / RESOURCE_EXHAUSTED) from google-genai."""
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+
+def is_throttled_response(response: LlmResponse) -> bool:
+    return str(response.error_code or "") in ("429", "RESOURCE_EXHAUSTED")
+
+
+def load_rate_limits() -> Optional[dict]:
+    """The limits from MODEL_RATE_LIMITS (JSON text or a file path), or None if unset."""
+    value = os.environ.get(RATE_LIMITS_ENV, "").strip()
+    if not value:
+        return None
+    if value.startswith("{"):
+        return json.loads(value)
+    with open(value, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_shared_limiter: Optional[RateLimiter] = None
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_rate_limiter
+# -----------------------------------------------------------------------------
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    Returns the process-wide RateLimiter if MODEL_RATE_LIMITS is set,
+    otherwise None. Every caller gets the same instance.
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        limits = load_rate_limits()
+        if limits is not None:
+            _shared_limiter = RateLimiter(limits)
+    return _shared_limiter
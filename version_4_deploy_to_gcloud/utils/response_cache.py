@@ -0,0 +1,387 @@
+# =============================================================================
+# FILE: response_cache.py
+# PURPOSE:
+#   An opt-in cache for model responses, so regenerating a page for a topic we
+#   have already seen does not pay for the same model calls again.
+#
+#   The cache sits in the LlmAgent model-call path (before/after model
+#   callbacks). Every request gets a content-addressed key, a SHA-256 over:
+#     - the model name
+#     - the rendered instruction (what the model actually reads)
+#     - the state values the instruction refers to ({var} and state['var'])
+#     - the tool declarations
+#     - the conversation contents and generation settings
+#   If anything that can change the answer changes, the key changes too.
+#
+#   Two tiers:
+#     - memory: an in-process LRU, evicted by total size in bytes
+#     - SQLite: a persistent file shared between runs, entries expire after a TTL
+#   A SQLite hit is copied into memory, so the next hit is cheaper.
+#
+#   Switching it on:
+#       LLM_RESPONSE_CACHE=cache/responses.sqlite   -> both tiers
+#       LLM_RESPONSE_CACHE=memory                   -> in-process LRU only
+#       LLM_RESPONSE_CACHE_TTL_HOURS=24             -> SQLite TTL (default 24)
+#       LLM_RESPONSE_CACHE_MEMORY_MB=64             -> LRU size (default 64)
+#       LLM_RESPONSE_CACHE_AGENTS=designer_agent,...-> only cache these agents
+# =============================================================================
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from utils.agent_hooks import add_callback, for_each_agent, referenced_state_keys
+
+# Environment variables that control the cache.
+RESPONSE_CACHE_ENV = "LLM_RESPONSE_CACHE"
+RESPONSE_CACHE_TTL_ENV = "LLM_RESPONSE_CACHE_TTL_HOURS"
+RESPONSE_CACHE_MEMORY_ENV = "LLM_RESPONSE_CACHE_MEMORY_MB"
+RESPONSE_CACHE_AGENTS_ENV = "LLM_RESPONSE_CACHE_AGENTS"
+
+# Bump when the key layout changes, so old SQLite entries are never reused.
+_KEY_VERSION = 1
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: CacheStats
+# -----------------------------------------------------------------------------
+@dataclass
+class CacheStats:
+    """Hit/miss counters, overall and per agent."""
+    memory_hits: int = 0
+    sqlite_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    skipped: int = 0            # answers not stored (cut off, blocked, ...)
+    evictions: int = 0
+    saved_prompt_tokens: int = 0
+    saved_output_tokens: int = 0
+    by_agent: dict = field(default_factory=dict)
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.sqlite_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def count(self, agent_name: str, outcome: str) -> None:
+        per_agent = self.by_agent.setdefault(agent_name, {"hits": 0, "misses": 0})
+        per_agent[outcome] += 1
+
+
+# -----------------------------------------------------------------------------
+# CLASS: MemoryTier
+# -----------------------------------------------------------------------------
+class MemoryTier:
+    """An LRU of serialized responses, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> int:
+        """Stores `value` and returns how many entries were evicted."""
+        if len(value) > self.max_bytes:
+            return 0
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= len(old)
+        self._entries[key] = value
+        self.size_bytes += len(value)
+        evicted = 0
+        while self.size_bytes > self.max_bytes:
+            _, dropped = self._entries.popitem(last=False)
+            self.size_bytes -= len(dropped)
+            evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: SqliteTier
+# -----------------------------------------------------------------------------
+class SqliteTier:
+    """A persistent key/value table of serialized responses with a TTL."""
+
+    def __init__(self, path: str, ttl_s: float) -> None:
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL,"
+            " agent TEXT, model TEXT)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND created > ?",
+                (key, time.time() - self.ttl_s),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: bytes, agent: str, model: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, agent, model) VALUES (?, ?, ?, ?, ?)",
+                (key, value, time.time(), agent, model),
+            )
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and returns how many were removed."""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM responses WHERE created <= ?", (time.time() - self.ttl_s,))
+            self._db.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+@dataclass
+class _PendingAnswer:
+    """A missed request whose answer is still arriving."""
+    key: str
+    streamed: bool = False                  # partial chunks were seen (SSE mode)
+    finish_reason: Optional[Any] = None     # reported by the last streamed chunk
+    parts: list = field(default_factory=list)   # non-partial pieces before the last one
+
+
+# -----------------------------------------------------------------------------
+# CLASS: ResponseCache
+# -----------------------------------------------------------------------------
+class ResponseCache:
+    """
+    Serves repeated model requests from the memory or SQLite tier.
+
+    `before_model` returns the cached LlmResponse on a hit (ADK then skips the
+    model call); `after_model` stores complete responses after a miss.
+    """
+
+    def __init__(self, sqlite_path: Optional[str] = None, ttl_s: float = 24 * 3600,
+                 memory_bytes: int = 64 * 1024 * 1024, agent_names: Optional[set[str]] = None) -> None:
+        self.memory = MemoryTier(memory_bytes)
+        self.sqlite = SqliteTier(sqlite_path, ttl_s) if sqlite_path else None
+        self.agent_names = agent_names
+        self.stats = CacheStats()
+        self._agents: dict[str, Any] = {}
+        self._pending: dict[tuple, _PendingAnswer] = {}
+        self._lock = threading.Lock()
+
+    # --- Wiring ---------------------------------------------------------------
+    def instrument(self, root_agent: Any) -> Any:
+        """
+        Attaches the cache to every LlmAgent under `root_agent` (or only to the
+        agents named in `agent_names`).
+
+        Returns:
+            The same root agent, for convenient chaining.
+        """
+        for_each_agent(root_agent, self._instrument_agent)
+        return root_agent
+
+    def _instrument_agent(self, agent: Any) -> None:
+        if self.agent_names is not None and agent.name not in self.agent_names:
+            return
+        if not add_callback(agent, "before_model_callback", self.before_model):
+            return
+        add_callback(agent, "after_model_callback", self.after_model)
+        # Kept so the state keys follow the current instruction (prompts can be hot-reloaded).
+        self._agents[agent.name] = agent
+
+    # --- Keys -----------------------------------------------------------------
+    def make_key(self, llm_request: LlmRequest, state_values: dict) -> str:
+        """Content-addressed key of one model request."""
+        config = llm_request.config
+        material = {
+            "v": _KEY_VERSION,
+            "model": llm_request.model,
+            "instruction": _jsonable(config.system_instruction) if config else None,
+            "state": state_values,
+            "tools": [_jsonable(tool) for tool in (config.tools or [])] if config else [],
+            "config": _jsonable(config, exclude={"system_instruction", "tools", "http_options"}) if config else None,
+            "contents": [_content_for_key(content) for content in llm_request.contents or []],
+        }
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    # --- ADK callbacks --------------------------------------------------------
+    def before_model(self, callback_context, llm_request) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        agent = self._agents.get(agent_name)
+        state_keys = referenced_state_keys(agent) if agent is not None else []
+        state_values = {name: callback_context.state.get(name) for name in state_keys}
+        key = self.make_key(llm_request, state_values)
+
+        with self._lock:
+            value = self.memory.get(key)
+            tier = "memory" if value is not None else None
+        if value is None and self.sqlite is not None:
+            value = self.sqlite.get(key)
+            if value is not None:
+                tier = "sqlite"
+                with self._lock:
+                    self.stats.evictions += self.memory.put(key, value)
+
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+                self.stats.count(agent_name, "misses")
+                self._pending[(callback_context.invocation_id, agent_name)] = _PendingAnswer(key)
+                return None
+            if tier == "memory":
+                self.stats.memory_hits += 1
+            else:
+                self.stats.sqlite_hits += 1
+            self.stats.count(agent_name, "hits")
+
+        response = LlmResponse.model_validate_json(value)
+        usage = response.usage_metadata
+        if usage is not None:
+            with self._lock:
+                self.stats.saved_prompt_tokens += usage.prompt_token_count or 0
+                self.stats.saved_output_tokens += usage.candidates_token_count or 0
+        return response
+
+    def after_model(self, callback_context, llm_response) -> None:
+        # A streamed (SSE) answer arrives as partial chunks, then one or more
+        # non-partial responses: text that came before a function call is
+        # handed on by itself, then the call. Those pieces are collected and
+        # stored as one answer once the last one is in (the model reported a
+        # finish reason). Errors and empty responses are never cached.
+        run_key = (callback_context.invocation_id, callback_context.agent_name)
+        with self._lock:
+            pending = self._pending.get(run_key)
+        if pending is None:
+            return None
+        if llm_response.partial:
+            pending.streamed = True
+            pending.finish_reason = getattr(llm_response, "finish_reason", None) or pending.finish_reason
+            return None
+        if llm_response.error_code or llm_response.content is None:
+            with self._lock:
+                self._pending.pop(run_key, None)
+            return None
+        # Older google-adk releases (the locked 1.9.0) have no LlmResponse.finish_reason;
+        # there the first non-partial response is taken as the whole answer.
+        reports_finish = "finish_reason" in type(llm_response).model_fields
+        finish_reason = getattr(llm_response, "finish_reason", None) or pending.finish_reason
+        if pending.streamed and reports_finish and finish_reason is None and not llm_response.turn_complete:
+            pending.parts.extend(llm_response.content.parts or [])
+            return None
+        with self._lock:
+            self._pending.pop(run_key, None)
+        # Only answers the model finished normally: a page cut off at MAX_TOKENS
+        # (or a blocked answer) would otherwise be replayed for the whole TTL.
+        if finish_reason not in (None, types.FinishReason.STOP):
+            with self._lock:
+                self.stats.skipped += 1
+            return None
+        if pending.parts:
+            content = types.Content(role=llm_response.content.role or "model",
+                                    parts=pending.parts + list(llm_response.content.parts or []))
+            llm_response = llm_response.model_copy(update={"content": content})
+        key = pending.key
+
+        value = llm_response.model_dump_json(exclude_none=True).encode("utf-8")
+        with self._lock:
+            self.stats.evictions += self.memory.put(key, value)
+            self.stats.stores += 1
+        if self.sqlite is not None:
+            self.sqlite.put(key, value, callback_context.agent_name, llm_response.model_version or "")
+        return None
+
+    # --- Reporting ------------------------------------------------------------
+    def report(self) -> dict:
+        """The current counters as a plain dict (e.g. for JSON output)."""
+        with self._lock:
+            report = asdict(self.stats)
+            report.update(
+                hits=self.stats.hits, hit_rate=round(self.stats.hit_rate, 3),
+                memory_entries=len(self.memory), memory_bytes=self.memory.size_bytes,
+            )
+        return report
+
+    def format_report(self) -> str:
+        """A one-line summary for the console."""
+        s = self.stats
+        return (f"Response cache: {s.hits} hits ({s.memory_hits} memory, {s.sqlite_hits} sqlite), "
+                f"{s.misses} misses, hit rate {s.hit_rate:.0%}, "
+                f"saved {s.saved_prompt_tokens} prompt / {s.saved_output_tokens} output tokens")
+
+
+# -----------------------------------------------------------------------------
+# HELPERS
+# -----------------------------------------------------------------------------
+def _jsonable(value: Any, exclude: Optional[set] = None) -> Any:
+    """Turns a pydantic object (or anything else) into JSON-friendly data."""
+    if hasattr(value, "model_dump"):
+        try:
+            return value.model_dump(mode="json", exclude_none=True, exclude=exclude)
+        except Exception:
+            # e.g. a response_schema given as a Python class
+            return str(value)
+    return value
+
+
+def _content_for_key(content: Any) -> Any:
+    """
+    A content entry without the random function-call ids ADK generates, so the
+    same conversation produces the same key in every run.
+    """
+    data = _jsonable(content)
+    for part in data.get("parts", []) if isinstance(data, dict) else []:
+        for name in ("function_call", "function_response"):
+            if isinstance(part.get(name), dict):
+                part[name].pop("id", None)
+    return data
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: response_cache_from_env
+# -----------------------------------------------------------------------------
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """
+    Returns a ResponseCache configured from the environment, or None if
+    LLM_RESPONSE_CACHE is not set.
+    """
+    target = os.environ.get(RESPONSE_CACHE_ENV, "").strip()
+    if not target:
+        return None
+    agents = os.environ.get(RESPONSE_CACHE_AGENTS_ENV, "").strip()
+    return ResponseCache(
+        sqlite_path=None if target.lower() == "memory" else target,
+        ttl_s=float(os.environ.get(RESPONSE_CACHE_TTL_ENV, "24")) * 3600,
+        memory_bytes=int(float(os.environ.get(RESPONSE_CACHE_MEMORY_ENV, "64")) * 1024 * 1024),
+        agent_names={name.strip() for name in agents.split(",") if name.strip()} if agents else None,
+    )
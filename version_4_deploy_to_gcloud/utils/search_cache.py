@@ -0,0 +1,290 @@
+# =============================================================================
+# FILE: search_cache.py
+# PURPOSE:
+#   A shared cache for web search results, so the questions generator and the
+#   five parallel researchers stop paying for the same search again and again.
+#
+#   - Queries are normalized first ("  What is AI? " and "what is ai" are the
+#     same search).
+#   - Results live in memory for the whole process and, optionally, in a
+#     SQLite file shared between runs. Entries expire after a TTL.
+#   - Single-flight: when several agents ask for the same query at the same
+#     time, only the first one calls the backend; the others wait for its
+#     result instead of starting their own search. If the first caller is
+#     cancelled, the others are not: one of them starts the search again.
+#   - Every run (ADK invocation) gets a small report: searches requested,
+#     served from the cache, coalesced, and sent to the backend.
+#
+#   The backend is any async function `query -> dict`. `gemini_search_backend`
+#   runs the query through Gemini's Google Search grounding; `fake_search_backend`
+#   returns deterministic results for offline runs (USE_FAKE_LLM=TRUE).
+# =============================================================================
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+SearchBackend = Callable[[str], Awaitable[dict]]
+
+# Environment variables that control the cache.
+SEARCH_CACHE_ENV = "SEARCH_CACHE"
+SEARCH_CACHE_TTL_ENV = "SEARCH_CACHE_TTL_HOURS"
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: normalize_query
+# -----------------------------------------------------------------------------
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query: Unicode-normalized, case-folded, with
+    collapsed whitespace and without surrounding quotes or punctuation.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.strip(" \"'`.,;:!?")
+
+
+class SearchOwnerCancelled(Exception):
+    """The search a caller was waiting for was cancelled by the caller that started it."""
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: RunSearchStats
+# -----------------------------------------------------------------------------
+@dataclass
+class RunSearchStats:
+    """What happened to the searches of one run."""
+    requested: int = 0       # Searches the agents asked for
+    cache_hits: int = 0      # Served from memory or SQLite
+    coalesced: int = 0       # Waited for an identical search already in flight
+    backend_calls: int = 0   # Actually sent to the search backend
+    backend_time_s: float = 0.0
+
+    @property
+    def saved(self) -> int:
+        return self.cache_hits + self.coalesced
+
+
+# -----------------------------------------------------------------------------
+# CLASS: SearchCache
+# -----------------------------------------------------------------------------
+class SearchCache:
+    """Normalizing, single-flight search cache with a memory and a SQLite tier."""
+
+    def __init__(self, backend: SearchBackend, sqlite_path: Optional[str] = None,
+                 ttl_s: float = 24 * 3600) -> None:
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self._memory: dict[str, tuple[float, dict]] = {}
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._runs: dict[str, RunSearchStats] = {}
+        self._db_lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                " query TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # --- Lookup ---------------------------------------------------------------
+    async def search(self, query: str, run_id: str = "default") -> dict:
+        """
+        Returns the search result for `query`, calling the backend only if no
+        fresh result is cached and no identical search is already running.
+        """
+        stats = self._runs.setdefault(run_id, RunSearchStats())
+        stats.requested += 1
+        key = normalize_query(query)
+
+        while True:
+            cached = self._get_cached(key)
+            if cached is not None:
+                stats.cache_hits += 1
+                return cached
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            try:
+                result = await asyncio.shield(in_flight)
+            except SearchOwnerCancelled:
+                # The caller that started this search was cancelled (not us):
+                # look again, and start the search ourselves if nobody else has.
+                continue
+            stats.coalesced += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            start = time.perf_counter()
+            stats.backend_calls += 1
+            result = await self.backend(query)
+            stats.backend_time_s += time.perf_counter() - start
+            self._store(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Never cancel the shared future: the waiters did not cancel their
+            # search. They get a retryable error and one of them searches again.
+            self._release(key, future)
+            future.set_exception(SearchOwnerCancelled(query))
+            future.exception()
+            raise
+        except Exception as error:
+            # Waiters get the same error; nothing is cached.
+            future.set_exception(error)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        finally:
+            self._release(key, future)
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def _get_cached(self, key: str) -> Optional[dict]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[0] < self.ttl_s:
+                return entry[1]
+            del self._memory[key]
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT result, created FROM searches WHERE query = ? AND created > ?",
+                (key, now - self.ttl_s),
+            ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        self._memory[key] = (row[1], result)
+        return result
+
+    def _store(self, key: str, result: dict) -> None:
+        created = time.time()
+        self._memory[key] = (created, result)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO searches (query, result, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), created),
+                )
+                self._db.commit()
+
+    # --- Reporting ------------------------------------------------------------
+    def run_report(self, run_id: str) -> dict:
+        """The search statistics of one run, as a plain dict."""
+        stats = self._runs.get(run_id, RunSearchStats())
+        report = asdict(stats)
+        report["saved"] = stats.saved
+        report["backend_time_s"] = round(stats.backend_time_s, 3)
+        return report
+
+    def pop_run_report(self, run_id: str) -> dict:
+        """Like run_report, but forgets the run afterwards."""
+        report = self.run_report(run_id)
+        self._runs.pop(run_id, None)
+        return report
+
+
+# -----------------------------------------------------------------------------
+# SEARCH BACKENDS
+# -----------------------------------------------------------------------------
+def gemini_search_backend(model: str = "gemini-2.5-flash-lite") -> SearchBackend:
+    """
+    A backend that answers the query with Gemini's Google Search grounding
+    (the same search the built-in google_search tool performs) and returns
+    the answer together with its sources. The calls share the model rate
+    limiter with the agents when it is enabled.
+    """
+    from google import genai
+    from google.genai import types
+
+    from utils.rate_limiter import get_rate_limiter, is_throttled_error
+
+    client = genai.Client()
+    config = types.GenerateContentConfig(tools=[types.Tool(google_search=types.GoogleSearch())])
+    limiter = get_rate_limiter()
+
+    async def search(query: str) -> dict:
+        if limiter is None:
+            response = await client.aio.models.generate_content(model=model, contents=query, config=config)
+        else:
+            permit = await limiter.acquire(model, len(query) // 4 + 1024)
+            try:
+                response = await client.aio.models.generate_content(model=model, contents=query, config=config)
+            except Exception as error:
+                if is_throttled_error(error):
+                    permit.done(throttled=True)
+                else:
+                    permit.cancel()
+                raise
+            except asyncio.CancelledError:
+                permit.cancel()
+                raise
+            usage = response.usage_metadata
+            permit.done(used_tokens=usage.total_token_count if usage else None,
+                        output_tokens=usage.candidates_token_count if usage else None)
+        sources, search_queries = [], []
+        candidate = response.candidates[0] if response.candidates else None
+        grounding = candidate.grounding_metadata if candidate else None
+        if grounding is not None:
+            search_queries = list(grounding.web_search_queries or [])
+            for chunk in grounding.grounding_chunks or []:
+                if chunk.web is not None:
+                    sources.append({"title": chunk.web.title, "url": chunk.web.uri})
+        return {"query": query, "answer": response.text or "", "sources": sources,
+                "search_queries": search_queries}
+
+    return search
+
+
+def fake_search_backend(latency_ms: float = 300) -> SearchBackend:
+    """A deterministic, offline backend for benchmarks and USE_FAKE_LLM runs."""
+
+    async def search(query: str) -> dict:
+        await asyncio.sleep(latency_ms / 1000)
+        return {
+            "query": query,
+            "answer": f"Deterministic summary of what the web says about: {query}",
+            "sources": [{"title": f"Result {i} for {query}", "url": f"https://example.com/{i}"}
+                        for i in range(1, 6)],
+            "search_queries": [query],
+        }
+
+    return search
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: search_cache_from_env
+# -----------------------------------------------------------------------------
+def search_cache_from_env(make_backend: Callable[[], SearchBackend]) -> Optional[SearchCache]:
+    """
+    Returns a SearchCache if SEARCH_CACHE is set (a SQLite path, or "memory"
+    for an in-process cache only), otherwise None. The backend is only
+    created when the cache is enabled.
+    """
+    target = os.environ.get(SEARCH_CACHE_ENV, "").strip()
+    if not target:
+        return None
+    return SearchCache(
+        make_backend(),
+        sqlite_path=None if target.lower() == "memory" else target,
+        ttl_s=float(os.environ.get(SEARCH_CACHE_TTL_ENV, "24")) * 3600,
+    )
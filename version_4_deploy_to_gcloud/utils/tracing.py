@@ -0,0 +1,258 @@
+# =============================================================================
+# FILE: tracing.py
+# PURPOSE:
+#   Records where the time goes in one run of the website builder pipeline and
+#   saves it as a Chrome trace (open it in https://ui.perfetto.dev or
+#   chrome://tracing).
+#
+#   Every agent invocation, model call and tool call becomes a timed "span",
+#   collected through ADK's before/after callbacks. Each agent gets its own
+#   lane, so the five parallel researchers show up as overlapping bars and the
+#   model/tool calls of an agent nest under that agent's bar.
+#
+#   Tracing is switched on with an environment variable:
+#       PIPELINE_TRACE_DIR=traces adk web ./agents
+#   and one JSON file per run is written to that directory.
+#
+#   Note: google_search is a built-in Gemini tool that runs inside the model
+#   call, so its time is part of the model span (the search queries are added
+#   to that span's details).
+# =============================================================================
+
+import datetime
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.agent_hooks import add_callback, for_each_agent
+
+# Environment variable that enables tracing and names the output directory.
+TRACE_DIR_ENV = "PIPELINE_TRACE_DIR"
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: Span
+# -----------------------------------------------------------------------------
+@dataclass
+class Span:
+    """One timed piece of work (an agent run, a model call or a tool call)."""
+    span_id: int
+    name: str
+    category: str                     # "agent", "model" or "tool"
+    lane: str                         # Which row of the trace it is drawn on
+    start_us: float
+    parent_id: Optional[int] = None
+    end_us: Optional[float] = None
+    args: dict = field(default_factory=dict)
+
+
+# -----------------------------------------------------------------------------
+# CLASS: PipelineTracer
+# -----------------------------------------------------------------------------
+class PipelineTracer:
+    """
+    Collects spans through ADK callbacks and exports one Chrome trace per run.
+
+    A "run" is one ADK invocation (one user message through the root agent);
+    spans are grouped by `invocation_id`.
+    """
+
+    def __init__(self, output_dir: str) -> None:
+        self.output_dir = Path(output_dir)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._runs: dict[str, list[Span]] = {}
+        self._run_start_us: dict[str, float] = {}
+        self._open: dict[tuple, Span] = {}
+        self._parents: dict[str, Optional[str]] = {}
+        self._root_name: Optional[str] = None
+
+    # --- Wiring ---------------------------------------------------------------
+    def instrument(self, root_agent: Any) -> Any:
+        """
+        Attaches the tracing callbacks to `root_agent` and all its sub-agents.
+
+        Returns:
+            The same root agent, for convenient chaining.
+        """
+        self._root_name = root_agent.name
+        for_each_agent(root_agent, self._instrument_agent)
+        return root_agent
+
+    def _instrument_agent(self, agent: Any) -> None:
+        self._parents[agent.name] = agent.parent_agent.name if agent.parent_agent else None
+        add_callback(agent, "before_agent_callback", self.before_agent, first=True)
+        add_callback(agent, "after_agent_callback", self.after_agent, first=True)
+        add_callback(agent, "before_model_callback", self.before_model, first=True)
+        add_callback(agent, "after_model_callback", self.after_model, first=True)
+        add_callback(agent, "before_tool_callback", self.before_tool, first=True)
+        add_callback(agent, "after_tool_callback", self.after_tool, first=True)
+
+    # --- Span bookkeeping -----------------------------------------------------
+    def _now_us(self, invocation_id: str) -> float:
+        now = time.perf_counter_ns() / 1000
+        start = self._run_start_us.setdefault(invocation_id, now)
+        return now - start
+
+    def _open_span(self, key: tuple, invocation_id: str, name: str, category: str,
+                   lane: str, parent_key: Optional[tuple], args: Optional[dict] = None) -> None:
+        with self._lock:
+            # A span that was never closed (e.g. a model call short-circuited
+            # by another callback) is closed when the next one with its key opens.
+            self._close_span(key, {"closed_by": "next_span"})
+            parent = self._open.get(parent_key) if parent_key else None
+            span = Span(
+                span_id=next(self._ids), name=name, category=category, lane=lane,
+                start_us=self._now_us(invocation_id),
+                parent_id=parent.span_id if parent else None, args=args or {},
+            )
+            self._open[key] = span
+            self._runs.setdefault(invocation_id, []).append(span)
+
+    def _close_span(self, key: tuple, args: Optional[dict] = None) -> None:
+        span = self._open.pop(key, None)
+        if span is None:
+            return
+        span.end_us = self._now_us(key[0])
+        if args:
+            span.args.update(args)
+
+    # --- ADK callbacks --------------------------------------------------------
+    def before_agent(self, callback_context) -> None:
+        invocation_id, agent_name = callback_context.invocation_id, callback_context.agent_name
+        parent_name = self._parents.get(agent_name)
+        self._open_span(
+            (invocation_id, "agent", agent_name), invocation_id, agent_name, "agent",
+            lane=agent_name,
+            parent_key=(invocation_id, "agent", parent_name) if parent_name else None,
+        )
+        return None
+
+    def after_agent(self, callback_context) -> None:
+        invocation_id, agent_name = callback_context.invocation_id, callback_context.agent_name
+        with self._lock:
+            # Close model/tool spans of this agent that never saw an "after".
+            for key in [k for k, span in self._open.items()
+                        if k[0] == invocation_id and span.lane == agent_name and span.category != "agent"]:
+                self._close_span(key, {"closed_by": "agent_end"})
+            self._close_span((invocation_id, "agent", agent_name))
+        if agent_name == self._root_name:
+            self.export(invocation_id)
+        return None
+
+    def before_model(self, callback_context, llm_request) -> None:
+        invocation_id, agent_name = callback_context.invocation_id, callback_context.agent_name
+        self._open_span(
+            (invocation_id, "model", agent_name), invocation_id,
+            f"model:{llm_request.model or 'default'}", "model", lane=agent_name,
+            parent_key=(invocation_id, "agent", agent_name),
+            args={"contents": len(llm_request.contents or [])},
+        )
+        return None
+
+    def after_model(self, callback_context, llm_response) -> None:
+        # In streaming mode this runs for every partial chunk; the call is
+        # only finished when the non-partial response arrives.
+        if llm_response.partial:
+            return None
+        args: dict = {}
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            args["prompt_tokens"] = usage.prompt_token_count
+            args["output_tokens"] = usage.candidates_token_count
+        grounding = llm_response.grounding_metadata
+        if grounding is not None and grounding.web_search_queries:
+            args["google_search_queries"] = list(grounding.web_search_queries)
+        if llm_response.error_code:
+            args["error"] = f"{llm_response.error_code}: {llm_response.error_message}"
+        with self._lock:
+            self._close_span((callback_context.invocation_id, "model", callback_context.agent_name), args)
+        return None
+
+    def before_tool(self, tool, args, tool_context) -> None:
+        invocation_id, agent_name = tool_context.invocation_id, tool_context.agent_name
+        self._open_span(
+            (invocation_id, "tool", tool_context.function_call_id), invocation_id,
+            f"tool:{tool.name}", "tool", lane=agent_name,
+            parent_key=(invocation_id, "agent", agent_name),
+        )
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response) -> None:
+        with self._lock:
+            self._close_span((tool_context.invocation_id, "tool", tool_context.function_call_id))
+        return None
+
+    # --- Export ---------------------------------------------------------------
+    def to_chrome_trace(self, invocation_id: str) -> dict:
+        """
+        Converts the spans of one run into the Chrome trace event format.
+
+        Each lane becomes a thread row ("tid"); rows are ordered by first use,
+        so the pipeline reads top to bottom in execution order.
+        """
+        with self._lock:
+            spans = list(self._runs.get(invocation_id, []))
+            end_of_run = self._now_us(invocation_id)
+
+        lanes: dict[str, int] = {}
+        trace_events = []
+        for span in sorted(spans, key=lambda s: s.start_us):
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            end_us = span.end_us if span.end_us is not None else end_of_run
+            args = dict(span.args, span_id=span.span_id, parent_id=span.parent_id)
+            if span.end_us is None:
+                args["unfinished"] = True
+            trace_events.append({
+                "name": span.name, "cat": span.category, "ph": "X",
+                "ts": round(span.start_us, 1), "dur": round(end_us - span.start_us, 1),
+                "pid": 1, "tid": tid, "args": args,
+            })
+        for lane, tid in lanes.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}})
+            trace_events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+        trace_events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self._root_name or "pipeline"}})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export(self, invocation_id: str) -> Path:
+        """
+        Writes the trace of one run to `<output_dir>/<timestamp>_<invocation_id>.json`
+        and forgets its spans.
+
+        Returns:
+            Path: The written trace file.
+        """
+        trace = self.to_chrome_trace(invocation_id)
+        with self._lock:
+            self._runs.pop(invocation_id, None)
+            self._run_start_us.pop(invocation_id, None)
+            for key in [k for k in self._open if k[0] == invocation_id]:
+                del self._open[key]
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+        path = self.output_dir / f"{timestamp}_{invocation_id}.json"
+        path.write_text(json.dumps(trace), encoding="utf-8")
+        return path
+
+    def export_all(self) -> list[Path]:
+        """Exports every run that is still in memory (e.g. runs that failed)."""
+        with self._lock:
+            invocation_ids = list(self._runs)
+        return [self.export(invocation_id) for invocation_id in invocation_ids]
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: tracer_from_env
+# -----------------------------------------------------------------------------
+def tracer_from_env() -> Optional[PipelineTracer]:
+    """
+    Returns a PipelineTracer if PIPELINE_TRACE_DIR is set, otherwise None.
+    """
+    output_dir = os.environ.get(TRACE_DIR_ENV)
+    return PipelineTracer(output_dir) if output_dir else None
@@ -0,0 +1,343 @@
+# =============================================================================
+# FILE: truncation.py
+# PURPOSE:
+#   Detects pages that were cut off (the model hit its output token limit
+#   mid-page) and recovers them by asking the model for the rest of the page
+#   only, instead of running the whole pipeline again.
+#
+#   - `find_truncation(page)` is a local check: a document that starts like a
+#     page (<!DOCTYPE html> / <html>) but has no closing </html>. It also finds
+#     the last safe cut point (an unfinished tag or comment is dropped) and
+#     the elements that are still open.
+#   - `PageRecovery` keeps the cut page of each run (invocation). write_to_file
+#     gives it every page; a cut page is not saved but answered with a
+#     continuation request ("continue after ... and end with </html>"). The
+#     agent then calls continue_page with the rest, and the pieces are
+#     stitched together (text the model repeats from the cut point is dropped).
+#     After PAGE_CONTINUATIONS attempts (default 3) the page is saved as it is.
+#     A page the agent leaves unfinished (it never calls continue_page) is
+#     dropped when the agent ends.
+#   - `PageRecovery.after_model` handles the other case: the answer stops
+#     inside the ```html block (finish reason MAX_TOKENS) before the model
+#     calls write_to_file at all. The cut page is handed to write_to_file as
+#     if the model had called it, which starts the same continuation.
+#   - `report()` gives, per recovered page, the recovery time and the output
+#     tokens saved compared with generating the whole page again.
+#
+#   PAGE_CONTINUATIONS=0 turns the check off.
+# =============================================================================
+
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from utils.agent_hooks import add_callback
+from utils.prompt_registry import CHARS_PER_TOKEN
+from utils.validators import TagBalanceParser, function_calls, response_text
+
+logger = logging.getLogger(__name__)
+
+# A document that starts like this is expected to end with </html>.
+_DOCUMENT_START = re.compile(r"\s*(<!--.*?-->\s*)*(<!doctype html|<html[\s>])", re.IGNORECASE | re.DOTALL)
+_FENCE_START = re.compile(r"```html[^\n]*\n", re.IGNORECASE)
+_FENCED = re.compile(r"^\s*```[\w-]*[^\n]*\n(.*?)(?:```\s*)?$", re.DOTALL)
+
+# Characters of the cut page quoted back to the model, so it knows where to continue.
+TAIL_CHARS = 400
+
+# Longest repeated text (at the start of a continuation) that is looked for and dropped.
+MAX_OVERLAP = 2000
+# Matches at least this long are taken as repetition. Shorter ones (down to
+# MIN_SHORT_OVERLAP) only when they start on a word or tag boundary, end on one
+# too (or hold more than a piece of one word, when the page was cut mid-word),
+# and are more than closing tags: "</div>" may just be the next element to close.
+MIN_OVERLAP = 32
+MIN_SHORT_OVERLAP = 4
+
+_WORD_CHAR = re.compile(r"\w")
+_SEPARATOR = re.compile(r"[\s<>]")
+_ONLY_CLOSING_TAGS = re.compile(r"\s*(</[^>]*>\s*)+")
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: Truncation
+# -----------------------------------------------------------------------------
+@dataclass
+class Truncation:
+    """Where and why a page was cut off."""
+
+    reason: str
+    kept: str                                           # the page up to the last safe point
+    open_elements: list[str] = field(default_factory=list)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: find_truncation
+# -----------------------------------------------------------------------------
+def find_truncation(page: str) -> Optional[Truncation]:
+    """
+    Returns how `page` was cut off, or None if it is complete (or is not a
+    full document, e.g. a fragment, which this check leaves alone).
+    """
+    lowered_end = page[-256:].lower()
+    if "</html" in lowered_end or not _DOCUMENT_START.match(page[:4096]):
+        return None
+    if "</html" in page.lower():
+        return None
+    parser = TagBalanceParser()
+    try:
+        parser.feed(page)
+    except Exception:
+        return Truncation("no closing </html>", page)
+    # The parser keeps back what it could not finish yet: an incomplete tag
+    # or comment is dropped (the model writes it again), text is kept.
+    unparsed = parser.rawdata
+    open_elements = list(parser.open_tags)
+    if unparsed.startswith("<!--"):
+        return Truncation("cut inside a comment", page[:len(page) - len(unparsed)], open_elements)
+    if unparsed.startswith("<"):
+        return Truncation("cut inside a tag", page[:len(page) - len(unparsed)], open_elements)
+    if getattr(parser, "cdata_elem", None):
+        return Truncation(f"cut inside <{parser.cdata_elem}>", page, open_elements)
+    return Truncation("no closing </html>", page, open_elements)
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: continuation_request
+# -----------------------------------------------------------------------------
+def continuation_request(truncation: Truncation, tool_name: str = "continue_page") -> str:
+    """The message that asks the model for the rest of a cut page."""
+    open_elements = " > ".join(truncation.open_elements) or "none"
+    return (
+        f"The page was cut off ({truncation.reason}) and was NOT saved yet. "
+        f"The first {len(truncation.kept)} characters are kept; they end with:\n"
+        f"```html\n{truncation.kept[-TAIL_CHARS:]}\n```\n"
+        f"Elements still open: {open_elements}.\n"
+        f"Call {tool_name} with ONLY the rest of the page: start exactly where the text above stops, "
+        f"close the open elements and end with </html>. Do not repeat what is already written."
+    )
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: stitch
+# -----------------------------------------------------------------------------
+def stitch(kept: str, continuation: str) -> str:
+    """
+    Joins a cut page and its continuation. Fences around the continuation and
+    text it repeats from the end of the cut page are removed; a continuation
+    that is a whole new document replaces the cut page.
+    """
+    fenced = _FENCED.match(continuation)
+    text = fenced.group(1) if fenced else continuation
+    if _DOCUMENT_START.match(text):
+        return text
+    for size in range(min(len(kept), len(text), MAX_OVERLAP), MIN_SHORT_OVERLAP - 1, -1):
+        if kept.endswith(text[:size]) and (size >= MIN_OVERLAP or _is_repetition(kept, text, size)):
+            return kept + text[size:]
+    return kept + text
+
+
+def _is_boundary(before: str, after: str) -> bool:
+    """True between two characters that are not both inside one word (or at either end)."""
+    return not before or not after or not (_WORD_CHAR.match(before) and _WORD_CHAR.match(after))
+
+
+def _is_repetition(kept: str, text: str, size: int) -> bool:
+    """Whether a short overlap of `size` characters looks repeated rather than a chance match."""
+    overlap = text[:size]
+    start = len(kept) - size
+    # A page cut mid-word is repeated from the start of that word ("<p>The sola" + "The solar ...").
+    ends_cleanly = _is_boundary(overlap[-1], text[size:size + 1]) or _SEPARATOR.search(overlap) is not None
+    return (_is_boundary(kept[start - 1:start], overlap[0]) and ends_cleanly
+            and not _ONLY_CLOSING_TAGS.fullmatch(overlap))
+
+
+# -----------------------------------------------------------------------------
+# DATA CLASS: PageCheck
+# -----------------------------------------------------------------------------
+@dataclass
+class PageCheck:
+    """
+    What to do with a page given to write_to_file / continue_page: save
+    `page`, or (when `request` is set) send `request` back to the model.
+    """
+
+    page: str
+    request: Optional[str] = None
+    recovery: Optional[dict] = None      # set when a cut page was completed
+    incomplete: Optional[str] = None     # set when a page is saved still cut off
+
+
+@dataclass
+class _PendingPage:
+    page: str
+    reason: str
+    started: float
+    continuations: int = 0
+    continuation_chars: int = 0
+
+
+# -----------------------------------------------------------------------------
+# CLASS: PageRecovery
+# -----------------------------------------------------------------------------
+class PageRecovery:
+    """
+    Holds the cut page of each run until its continuations complete it. A run
+    that ends without completing its page (see after_agent) drops it, and at
+    most `max_pending` pages are held at once (the oldest goes first), so runs
+    that fail before their agent finishes do not pile up either.
+    """
+
+    def __init__(self, max_continuations: int = 3, tool_name: str = "continue_page",
+                 keep_recoveries: int = 200, max_pending: int = 64) -> None:
+        self.max_continuations = max_continuations
+        self.tool_name = tool_name
+        self.max_pending = max_pending
+        self._write_tool, self._content_arg = "write_to_file", "content"
+        self._pending: dict[str, _PendingPage] = {}
+        self.recoveries: deque = deque(maxlen=keep_recoveries)
+        self.checked = self.truncated = self.gave_up = self.abandoned = 0
+
+    # --- Wiring ---------------------------------------------------------------
+    def instrument(self, agent: Any, write_tool: str = "write_to_file", content_arg: str = "content") -> Any:
+        """
+        Hands a page cut off in `agent`'s answer to its `write_tool` (see
+        after_model) and drops a cut page the agent leaves unfinished.
+        """
+        self._write_tool, self._content_arg = write_tool, content_arg
+        add_callback(agent, "after_model_callback", self.after_model)
+        add_callback(agent, "after_agent_callback", self.after_agent)
+        return agent
+
+    # --- The write path ---------------------------------------------------------
+    def check(self, run_id: str, content: str) -> PageCheck:
+        """Checks a complete page (write_to_file); a cut page is held for continuation."""
+        # A new page replaces a cut page the run was still completing.
+        self._pending.pop(run_id, None)
+        self.checked += 1
+        truncation = find_truncation(content)
+        if truncation is None:
+            return PageCheck(page=content)
+        self.truncated += 1
+        while len(self._pending) >= self.max_pending:
+            self._pending.pop(next(iter(self._pending)))
+            self.abandoned += 1
+        self._pending[run_id] = _PendingPage(truncation.kept, truncation.reason, time.perf_counter())
+        return PageCheck(page=truncation.kept, request=continuation_request(truncation, self.tool_name))
+
+    def resume(self, run_id: str, continuation: str) -> Optional[PageCheck]:
+        """
+        Stitches the next piece of a cut page (continue_page).
+
+        Returns:
+            PageCheck: The completed page, another continuation request, or the
+                       page still cut off once the attempts are used up; None
+                       if the run has no cut page.
+        """
+        pending = self._pending.get(run_id)
+        if pending is None:
+            return None
+        page = stitch(pending.page, continuation)
+        pending.continuations += 1
+        pending.continuation_chars += len(continuation)
+        truncation = find_truncation(page)
+        if truncation is None:
+            del self._pending[run_id]
+            recovery = {
+                "run_id": run_id,
+                "reason": pending.reason,
+                "continuations": pending.continuations,
+                "recovery_s": round(time.perf_counter() - pending.started, 3),
+                "page_chars": len(page),
+                "continuation_chars": pending.continuation_chars,
+                # Output tokens a full regeneration would have cost, minus the continuations.
+                "tokens_saved": math.ceil(max(0, len(page) - pending.continuation_chars) / CHARS_PER_TOKEN),
+            }
+            self.recoveries.append(recovery)
+            return PageCheck(page=page, recovery=recovery)
+        if pending.continuations >= self.max_continuations:
+            del self._pending[run_id]
+            self.gave_up += 1
+            return PageCheck(page=page, incomplete=truncation.reason)
+        pending.page, pending.reason = truncation.kept, truncation.reason
+        return PageCheck(page=truncation.kept, request=continuation_request(truncation, self.tool_name))
+
+    def discard(self, run_id: str) -> bool:
+        """Drops the run's cut page, if it still holds one (the model never completed it)."""
+        if self._pending.pop(run_id, None) is None:
+            return False
+        self.abandoned += 1
+        return True
+
+    # --- ADK callbacks -----------------------------------------------------------
+    def after_agent(self, callback_context) -> None:
+        """The agent is done: a page it did not complete is never continued, so it is dropped."""
+        if self.discard(callback_context.invocation_id):
+            logger.warning("%s ended without completing its cut-off page; the page was not saved",
+                           callback_context.agent_name)
+        return None
+
+    def after_model(self, callback_context, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """
+        When the answer stopped at the token limit inside the ```html block
+        (so write_to_file was never called), replaces it with a write_to_file
+        call carrying the cut page.
+        """
+        # In SSE mode the final, aggregated response reports MAX_TOKENS as its
+        # error code (older google-adk releases have no finish_reason field).
+        finish_reason = getattr(llm_response, "finish_reason", None)
+        if llm_response.partial or types.FinishReason.MAX_TOKENS not in (finish_reason, llm_response.error_code):
+            return None
+        if function_calls(llm_response):
+            return None
+        text = response_text(llm_response)
+        fence = _FENCE_START.search(text)
+        if fence is None or "```" in text[fence.end():]:
+            return None
+        call = types.FunctionCall(name=self._write_tool, args={self._content_arg: text[fence.end():]})
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text[:fence.start()] or "Saving the page."),
+                                                       types.Part(function_call=call)]),
+            usage_metadata=llm_response.usage_metadata,
+        )
+
+    # --- Reporting ------------------------------------------------------------------
+    def report(self) -> dict:
+        """Pages checked, cut, recovered and saved still cut; recovery time and tokens saved."""
+        times = sorted(recovery["recovery_s"] for recovery in self.recoveries)
+        return {
+            "checked": self.checked,
+            "truncated": self.truncated,
+            "recovered": len(self.recoveries),
+            "gave_up": self.gave_up,
+            "abandoned": self.abandoned,
+            "recovery_s_p50": times[len(times) // 2] if times else None,
+            "tokens_saved": sum(recovery["tokens_saved"] for recovery in self.recoveries),
+            "recoveries": list(self.recoveries),
+        }
+
+
+_shared_recovery: Optional[PageRecovery] = None
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: get_page_recovery
+# -----------------------------------------------------------------------------
+def get_page_recovery() -> Optional[PageRecovery]:
+    """
+    Returns the process-wide PageRecovery (PAGE_CONTINUATIONS attempts per
+    page, default 3), or None if PAGE_CONTINUATIONS=0.
+    """
+    global _shared_recovery
+    max_continuations = int(os.environ.get("PAGE_CONTINUATIONS", "3"))
+    if _shared_recovery is None and max_continuations > 0:
+        _shared_recovery = PageRecovery(max_continuations)
+    return _shared_recovery
@@ -0,0 +1,144 @@
+# =============================================================================
+# FILE: validators.py
+# PURPOSE:
+#   Cheap, local checks of a model's answer, used by the model cascade
+#   (utils/cascade.py) to decide whether a cheaper model's answer is good
+#   enough or the call must be escalated to a stronger model.
+#
+#   A validator takes an LlmResponse and returns None when the answer is fine,
+#   or a short reason string when it is not.
+# =============================================================================
+
+import re
+from html.parser import HTMLParser
+from typing import Callable, Optional
+
+from google.adk.models.llm_response import LlmResponse
+
+from utils.fanout import parse_numbered_list
+
+Validator = Callable[[LlmResponse], Optional[str]]
+
+
+def response_text(llm_response: LlmResponse) -> str:
+    """All the text parts of a response, joined."""
+    if llm_response.content is None:
+        return ""
+    return "".join(part.text for part in llm_response.content.parts or [] if part.text)
+
+
+def function_calls(llm_response: LlmResponse) -> list:
+    if llm_response.content is None:
+        return []
+    return [part.function_call for part in llm_response.content.parts or [] if part.function_call]
+
+
+# -----------------------------------------------------------------------------
+# VALIDATOR: not_empty
+# -----------------------------------------------------------------------------
+def not_empty(llm_response: LlmResponse) -> Optional[str]:
+    """Fails on errors and on answers with neither text nor a function call."""
+    if llm_response.error_code:
+        return f"model error {llm_response.error_code}"
+    if not response_text(llm_response).strip() and not function_calls(llm_response):
+        return "empty answer"
+    return None
+
+
+# -----------------------------------------------------------------------------
+# VALIDATOR: numbered_list
+# -----------------------------------------------------------------------------
+def numbered_list(min_items: int, max_items: Optional[int] = None) -> Validator:
+    """The answer must be a numbered list with min_items..max_items entries."""
+
+    def validate(llm_response: LlmResponse) -> Optional[str]:
+        if function_calls(llm_response):
+            return None   # A search call first; the list comes in the final answer
+        count = len(parse_numbered_list(response_text(llm_response)))
+        if count < min_items:
+            return f"{count} list items, expected at least {min_items}"
+        if max_items is not None and count > max_items:
+            return f"{count} list items, expected at most {max_items}"
+        return None
+
+    return validate
+
+
+# -----------------------------------------------------------------------------
+# VALIDATOR: html_document
+# -----------------------------------------------------------------------------
+class TagBalanceParser(HTMLParser):
+    """Counts opened and closed elements (void elements are ignored)."""
+
+    VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.open_tags: list[str] = []
+        self.seen: set[str] = set()
+        self.mismatches = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.seen.add(tag)
+        if tag not in self.VOID:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID:
+            return
+        if tag in self.open_tags:
+            # Close everything up to the matching tag (like a browser would).
+            while self.open_tags and self.open_tags.pop() != tag:
+                self.mismatches += 1
+        else:
+            self.mismatches += 1
+
+
+_HTML_BLOCK_PATTERN = re.compile(r"```html\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
+def html_document(content_arg: str = "content", max_mismatches: int = 3) -> Validator:
+    """
+    The HTML page in the answer must parse: <html>, <head> and <body> present,
+    closed at the end, with at most `max_mismatches` unbalanced tags. The page
+    is taken from a function call's `content_arg` argument (e.g. write_to_file)
+    or from an ```html block in the text. Answers without a page pass.
+    """
+
+    def validate(llm_response: LlmResponse) -> Optional[str]:
+        pages = [call.args.get(content_arg) for call in function_calls(llm_response)
+                 if call.args and isinstance(call.args.get(content_arg), str)]
+        pages += _HTML_BLOCK_PATTERN.findall(response_text(llm_response))
+        for page in pages:
+            parser = TagBalanceParser()
+            try:
+                parser.feed(page)
+                parser.close()
+            except Exception as error:
+                return f"HTML does not parse: {error}"
+            missing = {"html", "head", "body"} - parser.seen
+            if missing:
+                return f"HTML is missing <{'>, <'.join(sorted(missing))}>"
+            if "</html>" not in page.lower():
+                return "HTML is cut off (no closing </html>)"
+            if parser.mismatches > max_mismatches:
+                return f"HTML has {parser.mismatches} unbalanced tags"
+        return None
+
+    return validate
+
+
+# -----------------------------------------------------------------------------
+# FUNCTION: all_of
+# -----------------------------------------------------------------------------
+def all_of(*validators: Validator) -> Validator:
+    """Runs validators in order and returns the first failure."""
+
+    def validate(llm_response: LlmResponse) -> Optional[str]:
+        for validator in validators:
+            reason = validator(llm_response)
+            if reason:
+                return reason
+        return None
+
+    return validate
@@ -0,0 +1,114 @@
+"""Routing accuracy and latency of the local intent router (my_agent/router.py).
+
+Every labelled question in the sample set goes through the router. We report:
+  - coverage: the share of questions routed locally (the rest go to the model)
+  - accuracy of the local decisions, per method (pattern / keywords / classifier)
+  - local routing time per question
+  - the latency saved: one model routing call per locally routed question
+
+A sample labelled null has no single right tutor; routing it locally counts as
+a mistake. The model routing latency is --llm-latency-ms, or measured with
+--llm: root_agent then runs with the router switched off (needs
+GOOGLE_API_KEY), which also gives the model's own routing accuracy.
+
+Usage (from the version_5_config_type folder):
+    uv run python -m benchmarks.router_eval
+    uv run python -m benchmarks.router_eval --llm
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter
+
+from dotenv import load_dotenv
+
+from my_agent.router import DEFAULT_CONFIG_PATH, IntentRouter
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "routing_samples.jsonl")
+ROOT_AGENT_CONFIG = os.path.join(os.path.dirname(__file__), "..", "my_agent", "root_agent.yaml")
+
+
+def load_samples(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as samples_file:
+        return [json.loads(line) for line in samples_file if line.strip()]
+
+
+async def measure_llm_routing(samples: list[dict]) -> tuple[list[float], list[bool]]:
+    """Times root_agent's own routing (until its transfer) for every sample."""
+    os.environ["INTENT_ROUTER"] = "off"
+    from google.adk.agents import config_agent_utils
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    root_agent = config_agent_utils.from_config(os.path.abspath(ROOT_AGENT_CONFIG))
+    runner = InMemoryRunner(agent=root_agent, app_name="router_eval")
+    latencies, correct = [], []
+    for sample in samples:
+        session = await runner.session_service.create_session(app_name="router_eval", user_id="eval",
+                                                              session_id=str(uuid.uuid4()))
+        message = types.Content(role="user", parts=[types.Part(text=sample["text"])])
+        start, chosen = time.perf_counter(), None
+        async for event in runner.run_async(user_id="eval", session_id=session.id, new_message=message):
+            if event.actions and event.actions.transfer_to_agent:
+                chosen = event.actions.transfer_to_agent
+                break
+        latencies.append(time.perf_counter() - start)
+        correct.append(chosen == sample["agent"])
+    return latencies, correct
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Accuracy and latency of the local intent router.")
+    parser.add_argument("--samples", default=SAMPLES_PATH, help="JSONL file with text and agent (or null) per line.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="Router config (default: my_agent/router.yaml).")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Assumed model routing latency without --llm.")
+    parser.add_argument("--llm", action="store_true", help="Measure root_agent's model routing (needs GOOGLE_API_KEY).")
+    args = parser.parse_args()
+
+    load_dotenv()
+    router = IntentRouter.from_yaml(args.config)
+    samples = load_samples(args.samples)
+
+    routed, correct_by_method, mistakes = Counter(), Counter(), []
+    local_seconds = []
+    for sample in samples:
+        decision = router.decide(sample["text"])
+        local_seconds.append(decision.seconds)
+        if decision.agent is None:
+            continue
+        routed[decision.method] += 1
+        if decision.agent == sample["agent"]:
+            correct_by_method[decision.method] += 1
+        else:
+            mistakes.append({"text": sample["text"], "expected": sample["agent"], "routed_to": decision.agent,
+                             "method": decision.method, "confidence": round(decision.confidence, 3)})
+
+    llm_latency_s = args.llm_latency_ms / 1000
+    report = {}
+    if args.llm:
+        latencies, llm_correct = asyncio.run(measure_llm_routing(samples))
+        llm_latency_s = sum(latencies) / len(latencies)
+        report["llm_routing"] = {"accuracy": round(sum(llm_correct) / len(llm_correct), 3),
+                                 "avg_latency_s": round(llm_latency_s, 3)}
+
+    local_count = sum(routed.values())
+    report["local_routing"] = {
+        "samples": len(samples),
+        "coverage": round(local_count / len(samples), 3),
+        "accuracy": round(sum(correct_by_method.values()) / local_count, 3) if local_count else None,
+        "by_method": {method: {"routed": count, "correct": correct_by_method[method]} for method, count in routed.items()},
+        "fallbacks_to_model": len(samples) - local_count,
+        "avg_decision_ms": round(1000 * sum(local_seconds) / len(local_seconds), 3),
+        "mistakes": mistakes,
+    }
+    report["latency_saved_s"] = round(local_count * llm_latency_s - sum(local_seconds), 3)
+    report["latency_saved_per_question_s"] = round(report["latency_saved_s"] / len(samples), 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
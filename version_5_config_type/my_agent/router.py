@@ -0,0 +1,191 @@
+"""Local intent router for the tutor root_agent.
+
+Without it, every turn costs a gemini-flash-latest call just to decide between
+python_tutor_agent and physics_tutor_agent. The router makes that decision
+locally and, when it is confident, hands the turn to the tutor directly; when
+it is not, the root_agent's model decides as before.
+
+It is configured in router.yaml (next to root_agent.yaml), with one entry per
+sub-agent:
+  - patterns: regular expressions; a match in exactly one route decides.
+  - keywords: words or phrases; hits in exactly one route decide, if the
+    classifier agrees.
+  - examples: labelled questions that train a small naive-Bayes classifier,
+    used when the rules above are silent or disagree.
+A decision is only used when its confidence is at least `min_confidence`.
+
+It is wired into root_agent.yaml as a before_model callback:
+
+    before_model_callbacks:
+      - name: my_agent.router.route_before_model
+
+The callback answers with a `transfer_to_agent` function call instead of
+calling the model, so ADK performs the same transfer the model would have.
+Set INTENT_ROUTER=off to always use the model.
+"""
+
+import math
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import yaml
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "router.yaml")
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+# Question words that both tutors see all the time; they only add noise.
+_STOP_WORDS = frozenset(
+    "a an and are as at be can could do does for from how i in is it me my of on or so the this to "
+    "what when where which who why will with would you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case words (without stop words) plus word bigrams."""
+    words = [word for word in _TOKEN.findall(text.lower()) if word not in _STOP_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+@dataclass
+class RouteDecision:
+    """Where a question goes. `agent` is None when the model has to decide."""
+
+    agent: Optional[str]
+    confidence: float
+    method: str          # "pattern", "keywords", "classifier" or "fallback"
+    seconds: float = 0.0
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes over tokenize() features, with add-one smoothing."""
+
+    def __init__(self, documents_by_label: dict[str, list[str]]) -> None:
+        self.labels = [label for label, documents in documents_by_label.items() if documents]
+        self.token_counts = {label: Counter() for label in self.labels}
+        total_documents = sum(len(documents_by_label[label]) for label in self.labels)
+        self.log_priors = {}
+        for label in self.labels:
+            for document in documents_by_label[label]:
+                self.token_counts[label].update(tokenize(document))
+            self.log_priors[label] = math.log(len(documents_by_label[label]) / total_documents)
+        self.vocabulary = set().union(*self.token_counts.values()) if self.labels else set()
+        self.totals = {label: sum(counts.values()) for label, counts in self.token_counts.items()}
+
+    def predict(self, text: str) -> tuple[Optional[str], float]:
+        """Returns the most likely label and its posterior probability."""
+        tokens = [token for token in tokenize(text) if token in self.vocabulary]
+        if not tokens or not self.labels:
+            return None, 0.0
+        scores = {}
+        for label in self.labels:
+            denominator = self.totals[label] + len(self.vocabulary)
+            scores[label] = self.log_priors[label] + sum(
+                math.log((self.token_counts[label][token] + 1) / denominator) for token in tokens
+            )
+        best = max(scores, key=scores.get)
+        normalizer = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / normalizer
+
+
+@dataclass
+class IntentRouter:
+    """Routes a question to a sub-agent with patterns, keywords and a classifier."""
+
+    patterns: dict[str, list[re.Pattern]]
+    keywords: dict[str, list[re.Pattern]]
+    classifier: NaiveBayesClassifier
+    min_confidence: float = 0.75
+    stats: Counter = field(default_factory=Counter)
+    seconds: float = 0.0
+
+    @classmethod
+    def from_yaml(cls, path: str = DEFAULT_CONFIG_PATH) -> "IntentRouter":
+        with open(path, "r", encoding="utf-8") as config_file:
+            config = yaml.safe_load(config_file) or {}
+        routes = config.get("routes") or {}
+        patterns, keywords, documents = {}, {}, {}
+        for agent_name, route in routes.items():
+            route = route or {}
+            patterns[agent_name] = [re.compile(pattern, re.IGNORECASE) for pattern in route.get("patterns", [])]
+            keywords[agent_name] = [re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
+                                    for keyword in route.get("keywords", [])]
+            # Keywords double as tiny training documents for the classifier.
+            documents[agent_name] = list(route.get("examples", [])) + list(route.get("keywords", []))
+        return cls(patterns, keywords, NaiveBayesClassifier(documents), float(config.get("min_confidence", 0.75)))
+
+    def decide(self, text: str) -> RouteDecision:
+        start = time.perf_counter()
+        decision = self._decide(text)
+        decision.seconds = time.perf_counter() - start
+        self.stats[decision.method] += 1
+        self.seconds += decision.seconds
+        return decision
+
+    def _decide(self, text: str) -> RouteDecision:
+        matched = [agent for agent, agent_patterns in self.patterns.items()
+                   if any(pattern.search(text) for pattern in agent_patterns)]
+        if len(matched) == 1:
+            return RouteDecision(matched[0], 1.0, "pattern")
+
+        hits = {agent: sum(1 for keyword in agent_keywords if keyword.search(text))
+                for agent, agent_keywords in self.keywords.items()}
+        hit_agents = [agent for agent, count in hits.items() if count]
+        label, probability = self.classifier.predict(text)
+        if len(hit_agents) == 1:
+            # One unopposed hit is fairly sure, every further hit halves the doubt.
+            # A keyword can still mean something else ("string theory"), so the
+            # classifier has to agree before the model is skipped.
+            confidence = 1.0 - 0.5 ** (hits[hit_agents[0]] + 2)
+            if label != hit_agents[0]:
+                return RouteDecision(None, probability, "fallback")
+            if confidence >= self.min_confidence:
+                return RouteDecision(hit_agents[0], confidence, "keywords")
+
+        if label is not None and probability >= self.min_confidence:
+            return RouteDecision(label, probability, "classifier")
+        return RouteDecision(None, probability, "fallback")
+
+
+_router: Optional[IntentRouter] = None
+
+
+def get_router() -> Optional[IntentRouter]:
+    """The process-wide router, loaded from INTENT_ROUTER_CONFIG (default: router.yaml)."""
+    global _router
+    if os.environ.get("INTENT_ROUTER", "on").lower() in ("off", "false", "0"):
+        return None
+    if _router is None:
+        _router = IntentRouter.from_yaml(os.environ.get("INTENT_ROUTER_CONFIG", DEFAULT_CONFIG_PATH))
+    return _router
+
+
+def route_before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Transfers a new user question straight to a tutor when the router is confident."""
+    router = get_router()
+    last = llm_request.contents[-1] if llm_request.contents else None
+    if router is None or last is None or last.role != "user":
+        return None
+    text = "".join(part.text for part in last.parts or [] if part.text)
+    if not text.strip():
+        return None   # e.g. a function response: let the model continue
+
+    decision = router.decide(text)
+    callback_context.state["routing_decision"] = {
+        "agent": decision.agent, "method": decision.method, "confidence": round(decision.confidence, 3),
+    }
+    sub_agents = {agent.name for agent in callback_context._invocation_context.agent.sub_agents}
+    if decision.agent not in sub_agents:
+        return None   # Not confident (or an unknown route): the model decides
+
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(
+        function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": decision.agent})
+    )]))
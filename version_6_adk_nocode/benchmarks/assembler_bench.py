@@ -0,0 +1,128 @@
+"""Compares the local HTML assembler with the LLM combiner_agent.
+
+Both paths get the same HTML, CSS and JavaScript (a built-in sample page, or
+a JSON file with "html", "css" and "js" keys) and write output.html into a
+temporary folder. For each path we report p50 / p95 latency, output tokens
+and the size of the page.
+
+The LLM path calls gemini-2.5-pro through web_page_generator_3/combiner_agent.yaml,
+so it only runs with --llm and a GOOGLE_API_KEY in the environment (or .env).
+
+Usage (from the version_6_adk_nocode folder):
+    uv run python -m benchmarks.assembler_bench
+    uv run python -m benchmarks.assembler_bench --llm --runs 3 --parts my_page.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+import uuid
+
+from dotenv import load_dotenv
+from google.adk.agents import config_agent_utils
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from web_page_generator_3.html_assembler import assemble_html_document
+from web_page_generator_3.tools.file_writer import write_html_file
+
+COMBINER_CONFIG = os.path.join(os.path.dirname(__file__), "..", "web_page_generator_3", "combiner_agent.yaml")
+
+SAMPLE_PARTS = {
+    "html": "```html\n<header><h1>Coffee Corner</h1><nav><a href=\"#menu\">Menu</a></nav></header>\n"
+            + "".join(f"<section id=\"s{i}\"><h2>Section {i}</h2><p>{'Fresh beans, roasted daily. ' * 8}</p>"
+                      f"<button class=\"more\">More</button></section>\n" for i in range(20))
+            + "<footer>&copy; Coffee Corner</footer>\n```",
+    "css": "".join(f"#s{i} {{ padding: 2rem; background: #f{i % 10}f; }}\n" for i in range(20))
+           + "body { font-family: sans-serif; margin: 0; }\n.more { border-radius: 4px; }\n",
+    "js": "document.querySelectorAll('.more').forEach(button => {\n"
+          "  button.addEventListener('click', () => button.parentElement.classList.toggle('open'));\n});\n",
+}
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _summary(latencies: list[float], output_tokens: list[int], page_bytes: int) -> dict:
+    return {
+        "runs": len(latencies),
+        "p50_s": round(_percentile(latencies, 50), 6),
+        "p95_s": round(_percentile(latencies, 95), 6),
+        "output_tokens_per_run": round(sum(output_tokens) / len(output_tokens)) if output_tokens else 0,
+        "page_bytes": page_bytes,
+    }
+
+
+def bench_local(parts: dict, runs: int) -> dict:
+    """Assembles and saves the page `runs` times, with no model call."""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        document = assemble_html_document(parts["html"], parts["css"], parts["js"])
+        write_html_file(document, "output.html")
+        latencies.append(time.perf_counter() - start)
+    return _summary(latencies, [0] * runs, len(document.encode("utf-8")))
+
+
+async def bench_llm(parts: dict, runs: int) -> dict:
+    """Runs combiner_agent `runs` times on the same parts."""
+    combiner = config_agent_utils.from_config(os.path.abspath(COMBINER_CONFIG))
+    runner = InMemoryRunner(agent=combiner, app_name="assembler_bench")
+    message = types.Content(role="user", parts=[types.Part(text=(
+        f"HTML:\n{parts['html']}\n\nCSS:\n{parts['css']}\n\nJavaScript:\n{parts['js']}"
+    ))])
+
+    latencies, output_tokens = [], []
+    for _ in range(runs):
+        session = await runner.session_service.create_session(app_name="assembler_bench", user_id="bench",
+                                                              session_id=str(uuid.uuid4()))
+        tokens = 0
+        start = time.perf_counter()
+        async for event in runner.run_async(user_id="bench", session_id=session.id, new_message=message):
+            if event.usage_metadata and event.usage_metadata.candidates_token_count:
+                tokens += event.usage_metadata.candidates_token_count
+        latencies.append(time.perf_counter() - start)
+        output_tokens.append(tokens)
+    page_bytes = os.path.getsize("output.html") if os.path.exists("output.html") else 0
+    return _summary(latencies, output_tokens, page_bytes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local HTML assembler vs. the LLM combiner_agent.")
+    parser.add_argument("--parts", metavar="PARTS_JSON", help="JSON file with html, css and js keys (default: a sample page).")
+    parser.add_argument("--runs", type=int, default=100, help="Runs of the local assembler (the LLM path uses --llm-runs).")
+    parser.add_argument("--llm", action="store_true", help="Also run the gemini-2.5-pro combiner_agent (needs GOOGLE_API_KEY).")
+    parser.add_argument("--llm-runs", type=int, default=3, help="Runs of the LLM combiner.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    parts = SAMPLE_PARTS
+    if args.parts:
+        with open(args.parts, "r", encoding="utf-8") as parts_file:
+            parts = json.load(parts_file)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)   # Both paths write output.html into the current folder
+        try:
+            results["local_assembler"] = bench_local(parts, args.runs)
+            if args.llm:
+                results["llm_combiner"] = asyncio.run(bench_llm(parts, args.llm_runs))
+        finally:
+            os.chdir(cwd)
+
+    if "llm_combiner" in results:
+        results["speedup_p50"] = round(results["llm_combiner"]["p50_s"] / max(results["local_assembler"]["p50_s"], 1e-9))
+        results["output_tokens_saved_per_run"] = results["llm_combiner"]["output_tokens_per_run"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
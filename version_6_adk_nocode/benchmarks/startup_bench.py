@@ -0,0 +1,86 @@
+"""Startup time of a YAML agent with and without the compiled agent-graph cache.
+
+Each run is a fresh Python process that imports the agent package the way
+`adk web` does and stops once `root_agent` exists. Three modes are measured:
+  - yaml:  AGENT_GRAPH_CACHE=off, every start parses and validates the YAML
+  - cold:  the cache is cleared first, so the start builds and writes it
+  - warm:  the cache is valid, so the start only unpickles the tree
+For each mode we report p50 / p95 of the time to import google.adk and of the
+time to get root_agent (the part the cache speeds up).
+
+Usage (from the version_6_adk_nocode folder):
+    uv run python -m benchmarks.startup_bench
+    uv run python -m benchmarks.startup_bench --agent-dir ../version_5_config_type/my_agent --runs 20
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_AGENT_DIR = os.path.join(os.path.dirname(__file__), "..", "web_page_generator_3")
+
+# Runs in the child process: time the ADK import and the agent load separately.
+CHILD_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import google.adk.agents
+adk_imported = time.perf_counter()
+importlib.import_module(sys.argv[2]).root_agent
+loaded = time.perf_counter()
+print(json.dumps({"import_adk_s": adk_imported - start, "load_agent_s": loaded - adk_imported}))
+"""
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def run_once(agent_dir: str, env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, os.path.dirname(agent_dir), os.path.basename(agent_dir)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_mode(mode: str, agent_dir: str, cache_dir: str, runs: int) -> dict:
+    env = dict(os.environ, AGENT_GRAPH_CACHE_DIR=cache_dir, AGENT_GRAPH_CACHE="off" if mode == "yaml" else "on")
+    if mode == "warm":
+        run_once(agent_dir, env)   # Make sure a valid entry exists
+    samples = []
+    for _ in range(runs):
+        if mode == "cold":
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        samples.append(run_once(agent_dir, env))
+    return {
+        metric: {"p50_s": round(_percentile([s[metric] for s in samples], 50), 4),
+                 "p95_s": round(_percentile([s[metric] for s in samples], 95), 4)}
+        for metric in ("import_adk_s", "load_agent_s")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup time with and without the agent-graph cache.")
+    parser.add_argument("--agent-dir", default=DEFAULT_AGENT_DIR, help="Agent package with root_agent.yaml.")
+    parser.add_argument("--runs", type=int, default=10, help="Process starts per mode.")
+    args = parser.parse_args()
+
+    agent_dir = os.path.abspath(args.agent_dir)
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for mode in ("yaml", "cold", "warm"):
+            results[mode] = bench_mode(mode, agent_dir, os.path.join(cache_dir, "agent_cache"), args.runs)
+    yaml_load, warm_load = results["yaml"]["load_agent_s"]["p50_s"], results["warm"]["load_agent_s"]["p50_s"]
+    results["load_speedup_p50"] = round(yaml_load / warm_load, 1) if warm_load else None
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
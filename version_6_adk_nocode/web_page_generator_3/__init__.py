@@ -0,0 +1,12 @@
+"""Web page generator built from YAML (root_agent.yaml and the files it includes).
+
+`adk web` picks up `root_agent` from here. It is loaded through the compiled
+agent-graph cache (graph_cache.py), so unchanged YAML is not parsed and
+validated again on every start.
+"""
+
+import os
+
+from .graph_cache import load_agent
+
+root_agent = load_agent(os.path.join(os.path.dirname(__file__), "root_agent.yaml"))
@@ -0,0 +1,221 @@
+"""Content-addressed store for the generated pages.
+
+Without it, save_html_to_file writes every page to the same output.html, so
+each run overwrites the page of the run before. With ARTIFACT_STORE set to a
+folder, pages are kept there instead:
+
+  - one blob per distinct content, named after its SHA-256
+    (objects/3f/3f2a...e1), with a gzip variant (.gz) and, when the optional
+    `brotli` package is installed, a brotli variant (.br) written at save
+    time. Saving a page that is already stored writes no blob again;
+  - one record per save in a SQLite index (index.sqlite) with the file name,
+    session, user, topic and model, so listing and searching never scan the
+    folders.
+
+Files are written to a temporary name and renamed into place. The store
+follows the one of version_4_deploy_to_gcloud (utils/artifact_store.py); the
+two projects are installed separately, so each has its own copy.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:   # Optional: without it only gzip variants are written.
+    brotli = None
+
+# Content-Encoding name -> file suffix of the precompressed variant.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass
+class Artifact:
+    """One saved page: the index record plus the blob it points to."""
+
+    id: str
+    sha256: str
+    size: int
+    created_at: float
+    name: str = ""
+    session_id: str = ""
+    user_id: str = ""
+    topic: str = ""
+    model: str = ""
+    encodings: dict = field(default_factory=dict)   # "gzip"/"br" -> compressed size
+    deduplicated: bool = False                      # True if the blob already existed
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    """Writes to a temporary file next to `target` and renames it over `target`."""
+    handle, temporary = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.replace(temporary, target)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _like_pattern(text: str) -> str:
+    """A LIKE pattern matching `text` literally anywhere (used with ESCAPE '\\')."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class ArtifactStore:
+    """Deduplicated page blobs with precompressed variants and a SQLite index."""
+
+    _SELECT = (
+        "SELECT a.*, b.size, b.gzip_size, b.br_size"
+        " FROM artifacts a JOIN blobs b ON a.sha256 = b.sha256"
+    )
+
+    def __init__(self, root: str = "artifacts", brotli_quality: int = 11, gzip_level: int = 9) -> None:
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, gzip_size INTEGER, br_size INTEGER,"
+            " created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id TEXT PRIMARY KEY, sha256 TEXT NOT NULL REFERENCES blobs(sha256),"
+            " name TEXT, session_id TEXT, user_id TEXT, topic TEXT, model TEXT, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS artifacts_by_time ON artifacts (created_at);"
+            "CREATE INDEX IF NOT EXISTS artifacts_by_session ON artifacts (session_id, created_at);"
+        )
+        self._db.commit()
+
+    def blob_path(self, sha256: str, encoding: Optional[str] = None) -> Path:
+        """Path of a blob, or of its "gzip" / "br" variant."""
+        return self.objects / sha256[:2] / (sha256 + (ENCODINGS[encoding] if encoding else ""))
+
+    def _write_blob(self, sha256: str, data: bytes) -> dict:
+        """Writes the blob and its variants; returns the variant sizes."""
+        self.blob_path(sha256).parent.mkdir(exist_ok=True)
+        variants = {"gzip": gzip.compress(data, compresslevel=self.gzip_level, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(data, quality=self.brotli_quality)
+        sizes = {}
+        for encoding, compressed in variants.items():
+            # A variant that is not smaller than the page is not worth keeping.
+            if len(compressed) < len(data):
+                _atomic_write(self.blob_path(sha256, encoding), compressed)
+                sizes[encoding] = len(compressed)
+        _atomic_write(self.blob_path(sha256), data)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, gzip_size, br_size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sha256, len(data), sizes.get("gzip"), sizes.get("br"), time.time()),
+            )
+            self._db.commit()
+        return sizes
+
+    def save(self, content: str, *, name: str = "", session_id: str = "", user_id: str = "",
+             topic: str = "", model: str = "") -> Artifact:
+        """Stores a page (once per distinct content) and records one artifact for it.
+
+        Args:
+            content: The page.
+            name: The file name the page was saved under, e.g. "output.html".
+            session_id: The ADK session that produced the page.
+            user_id: The user of that session.
+            topic: What the page is about (the user's request); searchable.
+            model: The model that wrote it.
+
+        Returns:
+            The new record; `deduplicated` tells whether the blob already existed.
+        """
+        data = content.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            row = self._db.execute("SELECT gzip_size, br_size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        deduplicated = row is not None and self.blob_path(sha256).exists()
+        if deduplicated:
+            sizes = {encoding: size for encoding, size in (("gzip", row["gzip_size"]), ("br", row["br_size"])) if size}
+        else:
+            sizes = self._write_blob(sha256, data)
+        artifact = Artifact(uuid.uuid4().hex, sha256, len(data), time.time(), name, session_id, user_id,
+                            topic, model, sizes, deduplicated)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO artifacts (id, sha256, name, session_id, user_id, topic, model, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (artifact.id, sha256, name, session_id, user_id, topic, model, artifact.created_at),
+            )
+            self._db.commit()
+        return artifact
+
+    @staticmethod
+    def _artifact(row: sqlite3.Row) -> Artifact:
+        return Artifact(
+            id=row["id"], sha256=row["sha256"], size=row["size"], created_at=row["created_at"],
+            name=row["name"] or "", session_id=row["session_id"] or "", user_id=row["user_id"] or "",
+            topic=row["topic"] or "", model=row["model"] or "",
+            encodings={encoding: size for encoding, size in (("gzip", row["gzip_size"]), ("br", row["br_size"])) if size},
+        )
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """The artifact with this id, or None."""
+        with self._lock:
+            row = self._db.execute(f"{self._SELECT} WHERE a.id = ?", (artifact_id,)).fetchone()
+        return self._artifact(row) if row else None
+
+    def list_artifacts(self, session_id: Optional[str] = None, limit: int = 50) -> list[Artifact]:
+        """The newest artifacts first, optionally of one session only."""
+        where, params = ("WHERE a.session_id = ?", (session_id,)) if session_id else ("", ())
+        with self._lock:
+            rows = self._db.execute(f"{self._SELECT} {where} ORDER BY a.created_at DESC LIMIT ?",
+                                    (*params, limit)).fetchall()
+        return [self._artifact(row) for row in rows]
+
+    def search(self, text: str, session_id: Optional[str] = None, limit: int = 50) -> list[Artifact]:
+        """Artifacts whose topic, name or model contains `text` literally (case-insensitive), newest first."""
+        pattern = _like_pattern(text)
+        condition = "(a.topic LIKE ? ESCAPE '\\' OR a.name LIKE ? ESCAPE '\\' OR a.model LIKE ? ESCAPE '\\')"
+        params = [pattern, pattern, pattern]
+        if session_id:
+            condition += " AND a.session_id = ?"
+            params.append(session_id)
+        with self._lock:
+            rows = self._db.execute(f"{self._SELECT} WHERE {condition} ORDER BY a.created_at DESC LIMIT ?",
+                                    (*params, limit)).fetchall()
+        return [self._artifact(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """The process-wide store in the ARTIFACT_STORE folder, or None if it is not set."""
+    global _store
+    root = os.environ.get("ARTIFACT_STORE")
+    if _store is None and root:
+        _store = ArtifactStore(root, brotli_quality=int(os.environ.get("ARTIFACT_BROTLI_QUALITY", "11")))
+    return _store
+
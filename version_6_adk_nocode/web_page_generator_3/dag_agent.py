@@ -0,0 +1,142 @@
+"""An orchestrator that runs its sub-agents as a dependency graph.
+
+A SequentialAgent runs HTML -> CSS -> JS -> assembler one after the other,
+although CSS and JS only need the HTML. `DagAgent` starts every sub-agent as
+soon as the sub-agents it depends on have finished, so independent stages run
+at the same time:
+
+    html_agent ──┬── css_agent ──┬── assembler_agent
+                 └── js_agent  ──┘
+
+Dependencies come from two places:
+  - `depends_on` in the YAML config (stage name -> names it waits for), and
+  - state keys: an LlmAgent whose instruction uses `{key}` or `{key?}` waits
+    for the sub-agent whose `output_key` is `key`.
+
+Data is passed through the session state. Every stage runs on its own branch,
+so stages running at the same time do not see each other's conversation.
+"""
+
+import asyncio
+import re
+from typing import AsyncGenerator, ClassVar, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.base_agent_config import BaseAgentConfig
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from pydantic import Field, model_validator
+
+_STATE_PLACEHOLDER = re.compile(r"{([A-Za-z_][A-Za-z0-9_]*)\??}")
+
+
+class DagAgentConfig(BaseAgentConfig):
+    """The YAML config of a DagAgent."""
+
+    agent_class: str = "DagAgent"
+    depends_on: dict[str, list[str]] = Field(default_factory=dict)
+    max_concurrency: Optional[int] = None
+
+
+class DagAgent(BaseAgent):
+    """Runs sub-agents concurrently, each one once its dependencies are done."""
+
+    depends_on: dict[str, list[str]] = Field(default_factory=dict)
+    """Stage name -> names of the stages it waits for."""
+
+    max_concurrency: Optional[int] = None
+    """How many stages may run at the same time (None = no limit)."""
+
+    config_type: ClassVar[type[BaseAgentConfig]] = DagAgentConfig
+
+    def dependencies(self) -> dict[str, set[str]]:
+        """Every sub-agent's dependencies: the declared ones plus the state keys it reads."""
+        producers = {agent.output_key: agent.name for agent in self.sub_agents if getattr(agent, "output_key", None)}
+        graph = {}
+        for agent in self.sub_agents:
+            needs = set(self.depends_on.get(agent.name, []))
+            instruction = getattr(agent, "instruction", None)
+            if isinstance(instruction, str):
+                needs |= {producers[key] for key in _STATE_PLACEHOLDER.findall(instruction) if key in producers}
+            needs.discard(agent.name)
+            graph[agent.name] = needs
+        return graph
+
+    @model_validator(mode="after")
+    def _check_graph(self) -> "DagAgent":
+        """Fails at load time on unknown stage names and on cycles."""
+        names = {agent.name for agent in self.sub_agents}
+        for stage, needs in self.depends_on.items():
+            unknown = ({stage} | set(needs)) - names
+            if unknown:
+                raise ValueError(f"{self.name}: depends_on names unknown sub-agents: {', '.join(sorted(unknown))}")
+
+        graph, done = self.dependencies(), set()
+        while len(done) < len(graph):
+            ready = {name for name, needs in graph.items() if name not in done and needs <= done}
+            if not ready:
+                raise ValueError(f"{self.name}: depends_on has a cycle among {', '.join(sorted(set(graph) - done))}")
+            done |= ready
+        return self
+
+    def _branch_ctx(self, ctx: InvocationContext, agent: BaseAgent) -> InvocationContext:
+        branch = f"{self.name}.{agent.name}"
+        return ctx.model_copy(update={"branch": f"{ctx.branch}.{branch}" if ctx.branch else branch})
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        graph = self.dependencies()
+        agents = {agent.name: agent for agent in self.sub_agents}
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        queue: asyncio.Queue = asyncio.Queue()
+        started: set[str] = set()
+        finished: set[str] = set()
+        tasks: list[asyncio.Task] = []
+
+        async def run_stage(agent: BaseAgent) -> None:
+            # Each event waits until the runner has saved it (and its state
+            # changes) before the stage continues, like in ParallelAgent.
+            try:
+                if semaphore is not None:
+                    await semaphore.acquire()
+                try:
+                    async for event in agent.run_async(self._branch_ctx(ctx, agent)):
+                        handled = asyncio.Event()
+                        await queue.put((event, handled, None, None))
+                        await handled.wait()
+                finally:
+                    if semaphore is not None:
+                        semaphore.release()
+            except Exception as error:
+                queue.put_nowait((None, None, None, error))
+                return
+            queue.put_nowait((None, None, agent.name, None))
+
+        def start_ready_stages() -> None:
+            for name, needs in graph.items():
+                if name not in started and needs <= finished:
+                    started.add(name)
+                    tasks.append(asyncio.create_task(run_stage(agents[name])))
+
+        try:
+            start_ready_stages()
+            while len(finished) < len(graph):
+                event, handled, finished_name, error = await queue.get()
+                if error is not None:
+                    raise error
+                if event is None:
+                    # Its output is in the session now: start the stages that were waiting for it.
+                    finished.add(finished_name)
+                    start_ready_stages()
+                    continue
+                yield event
+                handled.set()
+                if ctx.end_invocation:
+                    return
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @classmethod
+    def _parse_config(cls, config: DagAgentConfig, config_abs_path: str, kwargs: dict) -> dict:
+        kwargs.update(depends_on=config.depends_on, max_concurrency=config.max_concurrency)
+        return kwargs
@@ -0,0 +1,175 @@
+"""Compiled agent-graph cache for YAML agent configs.
+
+Building an agent from root_agent.yaml means reading every YAML file it
+includes through `config_path`, validating each one against the AgentConfig
+schema, and importing every dotted tool / callback / agent_class name. That
+happens on every process start, although the files rarely change.
+
+`load_agent(config_path)` does it once and pickles the finished agent tree
+into `.agent_cache/` next to the config. Later starts unpickle it and skip
+parsing and validation. The cache entry records every file the tree was built
+from: the YAML files and the Python modules behind the dotted names. It is
+only used while all of them are unchanged; a file counts as unchanged when its
+mtime and size match, or else when its SHA-256 still matches. A new
+google-adk version also invalidates it.
+
+Set AGENT_GRAPH_CACHE=off to always build from YAML. The cache only ever
+holds pickles this module wrote itself for the local project.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Iterator, Optional
+
+import yaml
+from google.adk.agents import BaseAgent, config_agent_utils
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+
+def _adk_version() -> str:
+    try:
+        return version("google-adk")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _dotted_names(node: Any) -> Iterator[str]:
+    """Every `name` / `agent_class` value in a config that refers to Python code."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("name", "agent_class") and isinstance(value, str) and "." in value:
+                yield value
+            else:
+                yield from _dotted_names(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _dotted_names(item)
+
+
+def _config_files(config_path: str) -> tuple[list[str], set[str]]:
+    """The YAML files reachable from config_path, and the dotted names they use."""
+    files, names, pending = [], set(), [os.path.abspath(config_path)]
+    while pending:
+        path = pending.pop()
+        if path in files:
+            continue
+        files.append(path)
+        with open(path, "r", encoding="utf-8") as config_file:
+            config = yaml.safe_load(config_file) or {}
+        names.update(_dotted_names(config))
+        for sub_agent in config.get("sub_agents") or []:
+            if isinstance(sub_agent, dict) and sub_agent.get("config_path"):
+                pending.append(os.path.join(os.path.dirname(path), sub_agent["config_path"]))
+    return files, names
+
+
+def _module_files(dotted_names: set[str]) -> list[str]:
+    """The source files of the (already imported) modules behind the dotted names."""
+    files = set()
+    for name in dotted_names:
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            module = sys.modules.get(".".join(parts[:end]))
+            if module is not None and getattr(module, "__file__", None):
+                files.add(os.path.abspath(module.__file__))
+                break
+    return sorted(files)
+
+
+def _file_signature(path: str) -> list:
+    """[mtime_ns, size, sha256] of a file."""
+    stat = os.stat(path)
+    with open(path, "rb") as source:
+        digest = hashlib.sha256(source.read()).hexdigest()
+    return [stat.st_mtime_ns, stat.st_size, digest]
+
+
+def _is_unchanged(path: str, signature: list) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if [stat.st_mtime_ns, stat.st_size] == signature[:2]:
+        return True
+    return _file_signature(path)[2] == signature[2]
+
+
+def cache_path_for(config_path: str, cache_dir: Optional[str] = None) -> str:
+    config_path = os.path.abspath(config_path)
+    cache_dir = cache_dir or os.environ.get("AGENT_GRAPH_CACHE_DIR") or os.path.join(
+        os.path.dirname(config_path), ".agent_cache")
+    key = hashlib.sha256(config_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(config_path))[0]}-{key}.pkl")
+
+
+def _load_cached(cache_path: str) -> Optional[BaseAgent]:
+    try:
+        with open(cache_path, "rb") as cache_file:
+            entry = pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        logger.warning("Ignoring unreadable agent cache %s: %s", cache_path, error)
+        return None
+    if entry.get("format") != CACHE_FORMAT or entry.get("adk_version") != _adk_version():
+        return None
+    if not all(_is_unchanged(path, signature) for path, signature in entry["files"].items()):
+        return None
+    # The tree is pickled separately, so a changed module is never imported from a stale entry.
+    try:
+        return pickle.loads(entry["agent"])
+    except Exception as error:
+        logger.warning("Ignoring agent cache %s: %s", cache_path, error)
+        return None
+
+
+def _save(cache_path: str, agent: BaseAgent, files: list[str]) -> None:
+    try:
+        agent_data = pickle.dumps(agent, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as error:
+        logger.warning("Agent tree cannot be cached (%s); it will be built from YAML on every start.", error)
+        return
+    data = pickle.dumps({
+        "format": CACHE_FORMAT,
+        "adk_version": _adk_version(),
+        "files": {path: _file_signature(path) for path in files},
+        "agent": agent_data,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    handle, temporary_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    with os.fdopen(handle, "wb") as cache_file:
+        cache_file.write(data)
+    os.replace(temporary_path, cache_path)
+
+
+def load_agent(config_path: str, cache_dir: Optional[str] = None) -> BaseAgent:
+    """Returns the agent tree of a YAML config, from the cache when it is still valid.
+
+    Args:
+        config_path: The root_agent.yaml to load.
+        cache_dir: Where to keep the compiled tree. Defaults to
+                   AGENT_GRAPH_CACHE_DIR, or `.agent_cache/` next to the config.
+
+    Returns:
+        The root agent, exactly as config_agent_utils.from_config builds it.
+    """
+    if os.environ.get("AGENT_GRAPH_CACHE", "on").lower() in ("off", "false", "0"):
+        return config_agent_utils.from_config(os.path.abspath(config_path))
+
+    cache_path = cache_path_for(config_path, cache_dir)
+    agent = _load_cached(cache_path)
+    if agent is not None:
+        return agent
+
+    yaml_files, dotted_names = _config_files(config_path)
+    agent = config_agent_utils.from_config(os.path.abspath(config_path))
+    _save(cache_path, agent, yaml_files + _module_files(dotted_names))
+    return agent
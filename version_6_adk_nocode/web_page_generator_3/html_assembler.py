@@ -0,0 +1,177 @@
+"""Deterministic assembly of the generated HTML, CSS and JavaScript.
+
+The html_agent, css_agent and js_agent already produce the three parts of the
+page. Joining them needs no model: `assemble_html_document` does it locally,
+`HtmlAssemblerAgent` runs it as a (non-LLM) step of the YAML pipeline, and
+`assemble_web_page` exposes the same thing as a tool for an LlmAgent.
+"""
+
+import asyncio
+import re
+import time
+from typing import AsyncGenerator, ClassVar, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.base_agent_config import BaseAgentConfig
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from web_page_generator_3.tools.file_writer import run_metadata, write_html_file
+
+_FENCED_BLOCK = re.compile(r"```[ \t]*([\w+-]*)[^\n]*\n(.*?)```", re.DOTALL)
+_STRAY_FENCE = re.compile(r"^[ \t]*```[\w+-]*[ \t]*$\n?", re.MULTILINE)
+
+
+def strip_code_fences(text: str, languages: tuple = ()) -> str:
+    """Returns the code inside Markdown fences, or the text with stray fences removed.
+
+    Args:
+        text: A model answer that may wrap its code in ``` fences.
+        languages: Fence languages to prefer (e.g. ("css",)) when the answer
+                   has several fenced blocks.
+
+    Returns:
+        The code without any fence lines.
+    """
+    blocks = _FENCED_BLOCK.findall(text or "")
+    if blocks:
+        preferred = [code for language, code in blocks if language.lower() in languages]
+        return "\n".join(preferred or [code for _, code in blocks]).strip()
+    return _STRAY_FENCE.sub("", text or "").strip()
+
+
+def _unwrap_tag(code: str, tag: str) -> str:
+    """Removes a <style>/<script> wrapper the model added despite its instructions."""
+    match = re.fullmatch(rf"\s*<{tag}\b[^>]*>(.*)</{tag}>\s*", code, re.DOTALL | re.IGNORECASE)
+    return match.group(1).strip() if match else code
+
+
+def _insert_before(document: str, closing_tag: str, snippet: str) -> Optional[str]:
+    """Inserts snippet before the last closing_tag (case-insensitive), or returns None."""
+    position = document.lower().rfind(closing_tag)
+    if position == -1:
+        return None
+    return document[:position] + snippet + document[position:]
+
+
+def assemble_html_document(html: str, css: str = "", js: str = "", title: str = "Generated Page") -> str:
+    """Merges the HTML, CSS and JavaScript into one self-contained HTML document.
+
+    The CSS goes into a <style> element at the end of <head>, the JavaScript
+    into a <script> element at the end of <body>. An HTML fragment is wrapped
+    in a minimal document first.
+
+    Args:
+        html: The HTML page or fragment (may be wrapped in ``` fences).
+        css: The CSS, without <style> tags (fences and tags are tolerated).
+        js: The JavaScript, without <script> tags (fences and tags are tolerated).
+        title: The <title> used when the HTML has no <head>.
+
+    Returns:
+        The complete HTML document.
+    """
+    html = strip_code_fences(html, ("html",))
+    css = _unwrap_tag(strip_code_fences(css, ("css",)), "style")
+    js = _unwrap_tag(strip_code_fences(js, ("js", "javascript")), "script")
+
+    if "<html" not in html.lower():
+        html = f"<html lang=\"en\">\n<body>\n{html}\n</body>\n</html>"
+    if "<head" not in html.lower():
+        head = (
+            "<head>\n<meta charset=\"utf-8\">\n"
+            "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">\n"
+            f"<title>{title}</title>\n</head>\n"
+        )
+        html = re.sub(r"(<html\b[^>]*>\s*)", lambda match: match.group(1) + head, html, count=1, flags=re.IGNORECASE)
+    if not html.lstrip().lower().startswith("<!doctype"):
+        html = "<!DOCTYPE html>\n" + html
+
+    if css:
+        # "</style" inside the CSS would end the element early.
+        style = "<style>\n" + css.replace("</style", "<\\/style") + "\n</style>\n"
+        html = _insert_before(html, "</head>", style) or html
+    if js:
+        script = "<script>\n" + js.replace("</script", "<\\/script") + "\n</script>\n"
+        html = _insert_before(html, "</body>", script) or _insert_before(html, "</html>", script) or html + script
+    return html
+
+
+class HtmlAssemblerAgentConfig(BaseAgentConfig):
+    """The YAML config of an HtmlAssemblerAgent (state keys and output file)."""
+
+    agent_class: str = "HtmlAssemblerAgent"
+    html_key: str = "html_code"
+    css_key: str = "css_code"
+    js_key: str = "js_code"
+    filename: str = "output.html"
+    output_key: Optional[str] = None
+
+
+class HtmlAssemblerAgent(BaseAgent):
+    """Assembles the page from the session state and saves it like save_html_to_file.
+
+    Reads the three parts from state[html_key], state[css_key] and
+    state[js_key] (set by the generators' output_key), and replies with the
+    confirmation message of the save - no model call is made. In the artifact
+    store the page is recorded with the run's session, user and topic.
+    """
+
+    html_key: str = "html_code"
+    css_key: str = "css_code"
+    js_key: str = "js_code"
+    filename: str = "output.html"
+    output_key: Optional[str] = None
+
+    config_type: ClassVar[type[BaseAgentConfig]] = HtmlAssemblerAgentConfig
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        start = time.perf_counter()
+        document = assemble_html_document(
+            str(state.get(self.html_key, "")),
+            str(state.get(self.css_key, "")),
+            str(state.get(self.js_key, "")),
+        )
+        message = await asyncio.to_thread(write_html_file, document, self.filename, run_metadata(ctx))
+        state_delta = {f"{self.name}_seconds": round(time.perf_counter() - start, 6)}
+        if self.output_key:
+            state_delta[self.output_key] = document
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=message)]),
+            actions=EventActions(state_delta=state_delta),
+        )
+
+    @classmethod
+    def _parse_config(cls, config: HtmlAssemblerAgentConfig, config_abs_path: str, kwargs: dict) -> dict:
+        kwargs.update(
+            html_key=config.html_key,
+            css_key=config.css_key,
+            js_key=config.js_key,
+            filename=config.filename,
+            output_key=config.output_key,
+        )
+        return kwargs
+
+
+async def assemble_web_page(tool_context: ToolContext, filename: str = "output.html") -> str:
+    """Combines the generated HTML, CSS and JavaScript into one page and saves it.
+
+    Use this instead of re-typing the code: it reads the parts from the session
+    state (html_code, css_code, js_code).
+
+    Args:
+        filename: The name of the file to save the page to. Defaults to 'output.html'.
+
+    Returns:
+        A confirmation message with the absolute path of the saved file.
+    """
+    state = tool_context.state
+    document = assemble_html_document(
+        str(state.get("html_code", "")), str(state.get("css_code", "")), str(state.get("js_code", ""))
+    )
+    return await asyncio.to_thread(write_html_file, document, filename, run_metadata(tool_context._invocation_context))
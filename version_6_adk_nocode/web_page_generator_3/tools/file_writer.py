@@ -1,17 +1,47 @@
+import asyncio
 import os
+import sqlite3
+from typing import Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.tools.tool_context import ToolContext
+
+from web_page_generator_3.artifact_store import get_artifact_store
+from web_page_generator_3.truncation import page_recovery
+
+
+def run_metadata(ctx: InvocationContext) -> dict:
+    """The session, user, topic (the user's request) and model of a run, for the artifact store."""
+    model = getattr(ctx.agent, "model", "")
+    user_content = ctx.user_content
+    return {
+        "session_id": ctx.session.id,
+        "user_id": ctx.session.user_id,
+        "topic": " ".join(part.text for part in (user_content.parts or []) if part.text).strip() if user_content else "",
+        "model": model if isinstance(model, str) else getattr(model, "model", ""),
+    }
 
-def save_html_to_file(html_content: str, filename: str = "output.html") -> str:
-    """Saves the given HTML content to a file.
+
+def write_html_file(html_content: str, filename: str, metadata: Optional[dict] = None) -> str:
+    """Saves a page into the artifact store (ARTIFACT_STORE) or, without one, to `filename`.
+
+    This blocks (hashing, compression, SQLite or the file write); async code
+    runs it in a thread.
 
     Args:
-        html_content: The HTML content as a string.
-        filename: The name of the file to save the content to.
-                  Defaults to 'output.html'.
+        html_content: The page.
+        filename: The file name; ".html" is added if it has no HTML extension.
+        metadata: session_id, user_id, topic and model for the store (see run_metadata).
 
     Returns:
-        A confirmation message with the absolute path of the saved file.
+        A confirmation message with the path of the saved page, or an error message.
     """
     try:
+        store = get_artifact_store()
+        if store is not None:
+            artifact = store.save(html_content, name=filename, **(metadata or {}))
+            return f"Successfully saved HTML as artifact {artifact.id} at {store.blob_path(artifact.sha256).resolve()}"
+
         # Ensure the filename has an .html extension for safety
         if not filename.lower().endswith(('.html', '.htm')):
             filename += '.html'
@@ -19,5 +49,66 @@ def save_html_to_file(html_content: str, filename: str = "output.html") -> str:
         with open(filename, "w", encoding="utf-8") as f:
             f.write(html_content)
         return f"Successfully saved HTML to {os.path.abspath(filename)}"
-    except IOError as e:
+    except (IOError, sqlite3.Error) as e:
         return f"Error: Could not save file. Reason: {e}"
+
+
+async def _write(html_content: str, filename: str, tool_context: Optional[ToolContext]) -> str:
+    metadata = run_metadata(tool_context._invocation_context) if tool_context is not None else None
+    return await asyncio.to_thread(write_html_file, html_content, filename, metadata)
+
+
+async def save_html_to_file(html_content: str, filename: str = "output.html",
+                            tool_context: Optional[ToolContext] = None) -> str:
+    """Saves the given HTML content to a file.
+
+    With ARTIFACT_STORE set, the page is kept in the artifact store instead,
+    so a new page does not overwrite the last one.
+
+    When a model calls this tool with a page that was cut off (no closing
+    </html>), nothing is saved: the answer asks for the rest of the page,
+    which is sent with continue_html_file.
+
+    Args:
+        html_content: The HTML content as a string.
+        filename: The name of the file to save the content to.
+                  Defaults to 'output.html'.
+
+    Returns:
+        A confirmation message with the absolute path of the saved file, or
+        the request for the rest of a cut-off page.
+    """
+    if tool_context is not None:
+        request = page_recovery.hold(tool_context.invocation_id, html_content, filename)
+        if request:
+            return request
+    return await _write(html_content, filename, tool_context)
+
+
+async def continue_html_file(html_continuation: str, tool_context: ToolContext) -> str:
+    """Adds the rest of a page that save_html_to_file reported as cut off.
+
+    The page is saved (to the file name given to save_html_to_file) once it
+    ends with </html>.
+
+    Args:
+        html_continuation: Only the missing end of the HTML, starting where the
+                           cut page stops.
+
+    Returns:
+        The confirmation message of the save, or a request for the next part.
+    """
+    result = page_recovery.resume(tool_context.invocation_id, html_continuation)
+    if result is None:
+        return "Error: There is no cut-off page to continue. Call save_html_to_file with the complete HTML."
+    if "request" in result:
+        return result["request"]
+    message = await _write(result["page"], result["filename"], tool_context)
+    if "recovery" in result:
+        recovery = result["recovery"]
+        tool_context.state["html_recovery"] = recovery
+        message += (f" (recovered with {recovery['continuations']} continuation(s) in {recovery['recovery_s']}s,"
+                    f" about {recovery['tokens_saved']} output tokens saved)")
+    else:
+        message += f" (the page is still cut off: {result['incomplete']})"
+    return message
@@ -0,0 +1,234 @@
+"""Detection and continuation of HTML pages that were cut off.
+
+A long page from combiner_agent can hit the model's output token limit and
+end mid-tag. `find_truncation` is a local check for that: a document that
+starts like a page (<!DOCTYPE html> / <html>) but never reaches </html>.
+Instead of generating the page again, save_html_to_file keeps the cut page in
+a `PageRecovery` and asks the model for the rest only; continue_html_file
+stitches the pieces together (`stitch`) and saves the page once it is whole.
+"""
+
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# A document that starts like this is expected to end with </html>.
+_DOCUMENT_START = re.compile(r"\s*(<!--.*?-->\s*)*(<!doctype html|<html[\s>])", re.IGNORECASE | re.DOTALL)
+_FENCED = re.compile(r"^\s*```[\w-]*[^\n]*\n(.*?)(?:```\s*)?$", re.DOTALL)
+_WORD_CHAR = re.compile(r"\w")
+_SEPARATOR = re.compile(r"[\s<>]")
+_ONLY_CLOSING_TAGS = re.compile(r"\s*(</[^>]*>\s*)+")
+
+# Characters of the cut page quoted back to the model, so it knows where to continue.
+TAIL_CHARS = 400
+# Repeated text at the start of a continuation is looked for between these lengths.
+MAX_OVERLAP = 2000
+MIN_OVERLAP = 32
+# Shorter repeats (down to this length) only count when they start and end on a
+# word or tag boundary (or hold more than a piece of one word, for a page cut
+# mid-word) and are more than closing tags, which may just be the next to close.
+MIN_SHORT_OVERLAP = 4
+# Rough size of a token in characters (Gemini averages about 4).
+CHARS_PER_TOKEN = 4
+
+
+class _OpenElements(HTMLParser):
+    """Tracks the elements that are still open (void elements are ignored)."""
+
+    VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.open_tags: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in self.VOID:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.open_tags:
+            while self.open_tags.pop() != tag:
+                pass
+
+
+@dataclass
+class Truncation:
+    """Where and why a page was cut off."""
+
+    reason: str
+    kept: str                                   # the page up to the last safe point
+    open_elements: list[str] = field(default_factory=list)
+
+
+def find_truncation(page: str) -> Optional[Truncation]:
+    """Returns how the page was cut off, or None if it is complete.
+
+    Fragments (no <!DOCTYPE html> or <html> at the start) are left alone. An
+    unfinished tag or comment at the end is not part of `kept`.
+    """
+    if "</html" in page[-256:].lower() or not _DOCUMENT_START.match(page[:4096]):
+        return None
+    if "</html" in page.lower():
+        return None
+    parser = _OpenElements()
+    try:
+        parser.feed(page)
+    except Exception:
+        return Truncation("no closing </html>", page)
+    # The parser keeps back what it could not finish yet.
+    unparsed = parser.rawdata
+    if unparsed.startswith("<!--"):
+        return Truncation("cut inside a comment", page[:len(page) - len(unparsed)], parser.open_tags)
+    if unparsed.startswith("<"):
+        return Truncation("cut inside a tag", page[:len(page) - len(unparsed)], parser.open_tags)
+    if getattr(parser, "cdata_elem", None):
+        return Truncation(f"cut inside <{parser.cdata_elem}>", page, parser.open_tags)
+    return Truncation("no closing </html>", page, parser.open_tags)
+
+
+def continuation_request(truncation: Truncation, tool_name: str = "continue_html_file") -> str:
+    """The message that asks the model for the rest of a cut page."""
+    return (
+        f"The HTML was cut off ({truncation.reason}) and was NOT saved yet. "
+        f"The first {len(truncation.kept)} characters are kept; they end with:\n"
+        f"```html\n{truncation.kept[-TAIL_CHARS:]}\n```\n"
+        f"Elements still open: {' > '.join(truncation.open_elements) or 'none'}.\n"
+        f"Call {tool_name} with ONLY the rest of the HTML: start exactly where the text above stops, "
+        f"close the open elements and end with </html>. Do not repeat what is already written."
+    )
+
+
+def stitch(kept: str, continuation: str) -> str:
+    """Joins a cut page and its continuation.
+
+    Fences around the continuation and text it repeats from the end of the cut
+    page are removed; a continuation that is a whole new document replaces the
+    cut page.
+    """
+    fenced = _FENCED.match(continuation)
+    text = fenced.group(1) if fenced else continuation
+    if _DOCUMENT_START.match(text):
+        return text
+    for size in range(min(len(kept), len(text), MAX_OVERLAP), MIN_SHORT_OVERLAP - 1, -1):
+        if kept.endswith(text[:size]) and (size >= MIN_OVERLAP or _is_repetition(kept, text, size)):
+            return kept + text[size:]
+    return kept + text
+
+
+def _is_boundary(before: str, after: str) -> bool:
+    """True between two characters that are not both inside one word (or at either end)."""
+    return not before or not after or not (_WORD_CHAR.match(before) and _WORD_CHAR.match(after))
+
+
+def _is_repetition(kept: str, text: str, size: int) -> bool:
+    """Whether a short overlap of `size` characters looks repeated rather than a chance match."""
+    overlap = text[:size]
+    start = len(kept) - size
+    # A page cut mid-word is repeated from the start of that word ("<p>The sola" + "The solar ...").
+    ends_cleanly = _is_boundary(overlap[-1], text[size:size + 1]) or _SEPARATOR.search(overlap) is not None
+    return (_is_boundary(kept[start - 1:start], overlap[0]) and ends_cleanly
+            and not _ONLY_CLOSING_TAGS.fullmatch(overlap))
+
+
+@dataclass
+class _PendingPage:
+    page: str
+    filename: str
+    started: float
+    continuations: int = 0
+    continuation_chars: int = 0
+
+
+class PageRecovery:
+    """Holds the cut page of each run (invocation) until its continuations complete it.
+
+    `hold` and `resume` return the page to save, or a continuation request in
+    `request`. The last `keep_recoveries` recovered pages are kept in
+    `recoveries` with their recovery time and the output tokens saved compared
+    with generating them again.
+
+    A run that ends without completing its page drops it (`discard`, called by
+    `release_cut_page`), and at most `max_pending` pages are held at once (the
+    oldest goes first).
+    """
+
+    def __init__(self, max_continuations: int = 3, keep_recoveries: int = 200, max_pending: int = 64) -> None:
+        self.max_continuations = max_continuations
+        self.max_pending = max_pending
+        self.recoveries: deque[dict] = deque(maxlen=keep_recoveries)
+        self.abandoned = 0
+        self._pending: dict[str, _PendingPage] = {}
+
+    def hold(self, run_id: str, page: str, filename: str) -> Optional[str]:
+        """Returns a continuation request if the page was cut off (it is then held), else None."""
+        self._pending.pop(run_id, None)
+        truncation = find_truncation(page) if self.max_continuations > 0 else None
+        if truncation is None:
+            return None
+        while len(self._pending) >= self.max_pending:
+            self._pending.pop(next(iter(self._pending)))
+            self.abandoned += 1
+        self._pending[run_id] = _PendingPage(truncation.kept, filename, time.perf_counter())
+        return continuation_request(truncation)
+
+    def discard(self, run_id: str) -> bool:
+        """Drops the run's cut page; returns whether it held one."""
+        if self._pending.pop(run_id, None) is None:
+            return False
+        self.abandoned += 1
+        return True
+
+    def resume(self, run_id: str, continuation: str) -> Optional[dict]:
+        """Stitches the next piece of a held page.
+
+        Returns:
+            None if the run holds no page; otherwise a dict with "request" (ask
+            for more), or "page" and "filename" to save, with "recovery" when
+            the page is complete and "incomplete" when it is saved still cut off.
+        """
+        pending = self._pending.get(run_id)
+        if pending is None:
+            return None
+        page = stitch(pending.page, continuation)
+        pending.continuations += 1
+        pending.continuation_chars += len(continuation)
+        truncation = find_truncation(page)
+        if truncation is None:
+            del self._pending[run_id]
+            recovery = {
+                "continuations": pending.continuations,
+                "recovery_s": round(time.perf_counter() - pending.started, 3),
+                "page_chars": len(page),
+                "tokens_saved": math.ceil(max(0, len(page) - pending.continuation_chars) / CHARS_PER_TOKEN),
+            }
+            self.recoveries.append(recovery)
+            return {"page": page, "filename": pending.filename, "recovery": recovery}
+        if pending.continuations >= self.max_continuations:
+            del self._pending[run_id]
+            return {"page": page, "filename": pending.filename, "incomplete": truncation.reason}
+        pending.page = truncation.kept
+        return {"request": continuation_request(truncation)}
+
+
+# One holder for the process; HTML_CONTINUATIONS=0 turns the check off.
+page_recovery = PageRecovery(int(os.environ.get("HTML_CONTINUATIONS", "3")))
+
+
+def release_cut_page(callback_context) -> None:
+    """After-agent callback: drops a cut page the agent never completed with continue_html_file.
+
+    Wired into combiner_agent.yaml; without it, a run that answers in prose
+    instead of continuing would keep its cut page for the life of the process.
+    """
+    if page_recovery.discard(callback_context.invocation_id):
+        logger.warning("%s ended without completing its cut-off page; the page was not saved",
+                       callback_context.agent_name)
+    return None
@@ -9,7 +9,7 @@
 import asyncio
 import logging
 from client import MCPClient
-from utilities import print_json_response
+from utilities import print_json_response, AsyncStdinReader, TurnScheduler
 
 # ------------------------------------------------------------------------------
 # CONFIGURATION CONSTANTS
@@ -52,7 +52,7 @@ async def chat_loop():
     - Streams and displays agent responses
     """
 
-    print("\n💬 ADK LLM Agent Chat Started. Type 'quit' or ':q' to exit.\n")
+    print("\n💬 ADK LLM Agent Chat Started. Type 'quit' or ':q' to exit, ':cancel' to stop a running turn.\n")
 
     # Initialize the ADK MCP client with app/user/session configuration
     client = MCPClient(
@@ -65,28 +65,49 @@ async def chat_loop():
     # Establish session with the toolset (negotiates with MCP tool servers)
     await client.init_session()
 
+    # One turn = one user message and the streamed agent events. Turns run in
+    # the background so the event loop (and the MCP sessions) never stall
+    # while we wait for the next line of input.
+    async def run_turn(user_input):
+        i = 0
+        # Send the input task to the agent and stream responses
+        async for event in await client.send_task(user_input):
+            i += 1
+            print_json_response(event, f"📦 Event #{i}")
+
+            # Once a final response is received, print and break the loop
+            if hasattr(event, "is_final_response") and event.is_final_response():
+                print(f"\n🧠 Agent Response:\n------------------------\n{event.content.parts[0].text}\n")
+                break
+
+    reader = AsyncStdinReader()
+    scheduler = TurnScheduler(run_turn)
+
     try:
         # Continuous loop to accept user input and handle agent responses
         while True:
-            user_input = input("You: ")
+            user_input = await reader.readline("You: ")
 
-            # Handle quit commands gracefully
-            if user_input.strip().lower() in ["quit", ":q", "exit"]:
+            # Handle quit commands gracefully (None means stdin was closed)
+            if user_input is None or user_input.strip().lower() in ["quit", ":q", "exit"]:
+                if user_input is None:
+                    await scheduler.wait_idle()
                 print("👋 Ending session. Goodbye!")
                 break
 
-            i = 0
-            # Send the input task to the agent and stream responses
-            async for event in await client.send_task(user_input):
-                i += 1
-                print_json_response(event, f"📦 Event #{i}")
-
-                # Once a final response is received, print and break the loop
-                if hasattr(event, "is_final_response") and event.is_final_response():
-                    print(f"\n🧠 Agent Response:\n------------------------\n{event.content.parts[0].text}\n")
-                    break
+            # ':cancel' stops the running turn; other input is queued behind it
+            if user_input.strip().lower() == ":cancel":
+                if not scheduler.cancel_current():
+                    print("No turn is running.")
+                continue
+            if not user_input.strip():
+                continue
+            if scheduler.busy:
+                print(f"⏳ Queued behind the running turn (position {scheduler.pending_count + 1}).")
+            scheduler.submit(user_input)
     finally:
-        # Ensure the session is closed and resources are freed
+        # Stop any running turn, then close the session and free resources
+        await scheduler.close()
         await client.shutdown()
 
 # ------------------------------------------------------------------------------